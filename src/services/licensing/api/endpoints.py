@@ -5,11 +5,15 @@ from fastapi import APIRouter
 from fastapi import status as http_status
 
 from services.licensing import settings
+from services.licensing.authorization import claims_cache
 from services.licensing.business.service import LicensingService
+from services.licensing.cache import hierarchy_index_cache, permissions_cache
+from services.licensing.crypto import crypto_executor
 from services.licensing.exceptions import HTTPException
 from services.licensing.logging import LogLevel
 from services.licensing import __version__
 from services.licensing.settings import transaction_manager, repository
+from services.licensing.tokens import permissions_token_cache
 
 router = APIRouter()
 
@@ -32,6 +36,17 @@ async def get_status() -> dict:
     )
 
 
+@router.get("/stats", status_code=http_status.HTTP_200_OK)
+async def get_stats() -> dict:
+    return {
+        "crypto_executor": crypto_executor.stats(),
+        "claims_cache": claims_cache.stats(),
+        "permissions_cache": permissions_cache.stats(),
+        "permissions_token_cache": permissions_token_cache.stats(),
+        "hierarchy_index_cache": hierarchy_index_cache.stats(),
+    }
+
+
 @router.get("/version", status_code=http_status.HTTP_200_OK)
 async def get_version() -> dict:
     return {
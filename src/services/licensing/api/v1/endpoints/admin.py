@@ -1,6 +1,6 @@
 import datetime
 from dataclasses import asdict
-from typing import Tuple, Any, Dict
+from typing import Tuple, Any, Dict, List
 
 import structlog
 from fastapi import APIRouter, Depends, Query
@@ -11,17 +11,23 @@ from services.licensing.api.v1.schema.license import (
     LicenseUpdateSchema,
     LicenseCreateSchema,
     LicenseCreatedSchema,
+    license_data,
 )
+from services.licensing.api.v1.schema.seat import SeatSchema
 from services.licensing.authorization import authorize_with_admin_token
 from services.licensing.business.service import LicensingService
 from services.licensing.constants import (
     ALLOWED_LICENSE_FILTER_RESTRICTIONS,
     ALLOWED_LICENSE_ORDER_BY_FIELDS,
 )
+from services.licensing.custom_types import MatchMode, SeatStatus, TotalMode
 from services.licensing.exceptions import DuplicateEntryException, HTTPException
 from services.licensing.order_by import get_order_by_fields
 from services.licensing.pagination import (
+    CursorPage,
     CustomPage,
+    cursor_paginate,
+    get_cursor_parameters,
     get_pagination_parameters,
     paginate,
 )
@@ -31,8 +37,7 @@ logger = structlog.stdlib.get_logger(__name__)
 router = APIRouter()
 
 
-@router.get("/licenses", status_code=http_status.HTTP_200_OK)
-async def get_licenses(
+def get_license_filters(
     product_eid: str = Query(None),
     owner_type: str = Query(None),
     owner_level: int = Query(None),
@@ -44,11 +49,10 @@ async def get_licenses(
     is_valid: bool = Query(None),
     created_at: datetime.date = Query(None),
     redeemed_seats: int = Query(None),
-    order_by: str = Query(None),
-    token_data: Tuple[str, Dict[str, Any]] = Depends(authorize_with_admin_token),
-) -> CustomPage[LicenseCompleteSchema]:
+    match_mode: MatchMode = Query(MatchMode.CONTAINS),
+) -> Dict[str, Any]:
     """
-    The "get licenses" route for admins
+    dependency: the filters of the "get licenses" routes for admins
     :param product_eid
     :param owner_type
     :param owner_level
@@ -60,7 +64,41 @@ async def get_licenses(
     :param is_valid
     :param created_at
     :param redeemed_seats: 'percentage of occupied seats - filter
+    :param match_mode: how 'product_eid', 'owner_eid' and 'manager_eid' match:
+        "contains" (default), "prefix" or "exact"
+    :return: the filters as keyword arguments for the service
+    """
+    return dict(
+        product_eid=product_eid,
+        owner_type=owner_type,
+        owner_level=owner_level,
+        owner_eid=owner_eid,
+        manager_eid=manager_eid,
+        valid_from=valid_from,
+        valid_to=valid_to,
+        is_trial=is_trial,
+        created_at=created_at,
+        is_valid=is_valid,
+        redeemed_seats=redeemed_seats,
+        match_mode=match_mode,
+    )
+
+
+@router.get("/licenses", status_code=http_status.HTTP_200_OK)
+async def get_licenses(
+    filters: Dict[str, Any] = Depends(get_license_filters),
+    order_by: str = Query(None),
+    total_mode: TotalMode = Query(TotalMode.EXACT),
+    include_seats: bool = Query(False),
+    token_data: Tuple[str, Dict[str, Any]] = Depends(authorize_with_admin_token),
+) -> CustomPage[LicenseCompleteSchema]:
+    """
+    The "get licenses" route for admins
+    :param filters: see 'get_license_filters'
     :param order_by something like "-id.valid_from.-manager_eid.-product_eid
+    :param total_mode: "exact", "estimated", "cached" or "none" (no total)
+    :param include_seats: include the seat lists (see "/licenses/{uuid}/seats"),
+        otherwise just the number of occupied seats is given
     :param token_data
     :return: a JSON object (usually a list of licenses)
     """
@@ -75,22 +113,57 @@ async def get_licenses(
             get_order_by_fields(order_by, ALLOWED_LICENSE_ORDER_BY_FIELDS),
             payload["filter_restrictions"],
             ALLOWED_LICENSE_FILTER_RESTRICTIONS,
-            product_eid=product_eid,
-            owner_type=owner_type,
-            owner_level=owner_level,
-            owner_eid=owner_eid,
-            manager_eid=manager_eid,
-            valid_from=valid_from,
-            valid_to=valid_to,
-            is_trial=is_trial,
-            created_at=created_at,
-            is_valid=is_valid,
-            redeemed_seats=redeemed_seats,
+            with_seats=include_seats,
+            total_mode=total_mode,
+            **filters,
         )
-        items = [LicenseCompleteSchema.parse_obj(asdict(l_)) for l_ in licenses]
+        items = [
+            LicenseCompleteSchema.parse_obj(license_data(l_, include_seats))
+            for l_ in licenses
+        ]
         return paginate(items, page, page_size, total)
 
 
+@router.get("/licenses/cursor", status_code=http_status.HTTP_200_OK)
+async def get_licenses_by_cursor(
+    filters: Dict[str, Any] = Depends(get_license_filters),
+    order_by: str = Query(None),
+    include_seats: bool = Query(False),
+    cursor_parameters: Tuple[List[Any] | None, int] = Depends(get_cursor_parameters),
+    token_data: Tuple[str, Dict[str, Any]] = Depends(authorize_with_admin_token),
+) -> CursorPage[LicenseCompleteSchema]:
+    """
+    The "get licenses" route for admins (see above) with cursor pagination: the
+    next page is requested by the 'next_cursor' of the former page, which stays
+    fast for deep pages (no OFFSET, no total count).
+    :param filters: see 'get_license_filters'
+    :param order_by something like "-id.valid_from.-manager_eid.-product_eid
+    :param include_seats: include the seat lists
+    :param cursor_parameters: the cursor (from the former page) and the page size
+    :param token_data
+    :return: a JSON object (a list of licenses and the cursor of the next page)
+    """
+    _, payload = token_data
+    after, page_size = cursor_parameters
+
+    async with transaction_manager() as tm:
+        repo = repository(tm.session)
+        licenses, keys = await LicensingService(repo).get_licenses_keyset(
+            page_size,
+            get_order_by_fields(order_by, ALLOWED_LICENSE_ORDER_BY_FIELDS),
+            after,
+            payload["filter_restrictions"],
+            ALLOWED_LICENSE_FILTER_RESTRICTIONS,
+            with_seats=include_seats,
+            **filters,
+        )
+        items = [
+            LicenseCompleteSchema.parse_obj(license_data(l_, include_seats))
+            for l_ in licenses
+        ]
+        return cursor_paginate(items, page_size, keys)
+
+
 @router.post("/licenses", status_code=http_status.HTTP_201_CREATED)
 async def create_license(
     data: LicenseCreateSchema,
@@ -143,11 +216,13 @@ async def create_license(
 @router.get("/licenses/{license_uuid}", status_code=http_status.HTTP_200_OK)
 async def get_license(
     license_uuid: str,
+    archived: bool = Query(False),
     token_data: Tuple[str, Dict[str, Any]] = Depends(authorize_with_admin_token),
 ) -> LicenseCompleteSchema | None:
     """
     The "get details for a specific license" route for admins
     :param license_uuid: the `uuid` of the `License` entity to be selected as the result
+    :param archived: get an archived license (without its seats, see the seats route)
     :param token_data: data gotten from admin token
     :return: a JSON object representing the license details
     """
@@ -157,8 +232,59 @@ async def get_license(
             license_uuid,
             payload["filter_restrictions"],
             ALLOWED_LICENSE_FILTER_RESTRICTIONS,
+            archived,
+        )
+        return (
+            LicenseCompleteSchema.parse_obj(license_data(license_))
+            if license_
+            else None
+        )
+
+
+@router.get("/licenses/{license_uuid}/seats", status_code=http_status.HTTP_200_OK)
+async def get_license_seats(
+    license_uuid: str,
+    status: SeatStatus = Query(None),
+    archived: bool = Query(False),
+    cursor_parameters: Tuple[List[Any] | None, int] = Depends(get_cursor_parameters),
+    token_data: Tuple[str, Dict[str, Any]] = Depends(authorize_with_admin_token),
+) -> CursorPage[SeatSchema]:
+    """
+    The "get the seats of a license" route for admins with cursor pagination: the
+    next page is requested by the 'next_cursor' of the former page.
+    :param license_uuid: the `uuid` of the license
+    :param status: an optional seat status to filter by
+    :param archived: get the archived seats (of an archived license or not) instead
+    :param cursor_parameters: the cursor (from the former page) and the page size
+    :param token_data: data gotten from admin token
+    :return: a JSON object (a list of seats and the cursor of the next page)
+    :raises: 404, if there is no such license
+    """
+    _, payload = token_data
+    after, page_size = cursor_parameters
+
+    async with transaction_manager() as tm:
+        result = await LicensingService(
+            repository(tm.session)
+        ).get_license_seats_keyset(
+            license_uuid,
+            page_size,
+            after,
+            payload["filter_restrictions"],
+            ALLOWED_LICENSE_FILTER_RESTRICTIONS,
+            status,
+            archived,
+        )
+    if result is None:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            message="License not found",
+            license_uuid=license_uuid,
         )
-        return LicenseCompleteSchema.parse_obj(asdict(license_)) if license_ else None
+    seats, keys = result
+    return cursor_paginate(
+        [SeatSchema.parse_obj(asdict(s_)) for s_ in seats], page_size, keys
+    )
 
 
 @router.put("/licenses/{license_uuid}", status_code=http_status.HTTP_200_OK)
@@ -178,7 +304,7 @@ async def update_license(
         await LicensingService(repository(tm.session)).update_license(
             license_uuid,
             payload["filter_restrictions"],
-            **license_update.dict(exclude_unset=True)
+            **license_update.dict(exclude_unset=True),
         )
 
 
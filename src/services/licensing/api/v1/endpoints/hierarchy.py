@@ -2,23 +2,44 @@ from fastapi import APIRouter, Depends, Query, status as http_status, Body
 from dataclasses import asdict
 from typing import List, Dict, Any, Tuple
 
-from services.licensing.api.v1.schema.hierarchy import HierarchiesSchema
+from services.licensing import settings
+from services.licensing.api.v1.schema.hierarchy import (
+    HierarchiesSchema,
+    HierarchySnapshotSchema,
+    StoredHierarchiesSchema,
+)
 from services.licensing.api.v1.schema.license import (
     LicenseActiveSchema,
     LicenseManagedSchema,
     LicenseValidSchema,
+    license_data,
+)
+from services.licensing.api.v1.schema.entity import (
+    EntitiesSchema,
+    EntityActiveLicenseSchema,
+    EntityLicensesSchema,
+    EntitySchema,
+    StoredEntitiesSchema,
+)
+from services.licensing.authorization import (
+    authorize_with_hierarchies_token,
+    authorize_with_hierarchy_provider_token,
+    authorize_with_hierarchy_store_token,
 )
-from services.licensing.api.v1.schema.entity import EntitySchema
-from services.licensing.authorization import authorize_with_hierarchies_token
 from services.licensing.business.service import LicensingService
 
 # TODO: currently not used, but will be used when reactivating 'callback urls'
 # from services.licensing.client import post_request
 from services.licensing.constants import ALLOWED_LICENSE_ORDER_BY_FIELDS
-from services.licensing.hierarchies import parent_entities
+from services.licensing.custom_types import Entity, License, TotalMode
+from services.licensing.exceptions import HTTPException
+from services.licensing.hierarchies import get_hierarchy_index
 from services.licensing.order_by import get_order_by_fields
 from services.licensing.pagination import (
+    CursorPage,
     CustomPage,
+    cursor_paginate,
+    get_cursor_parameters,
     get_pagination_parameters,
     paginate,
 )
@@ -27,6 +48,52 @@ from services.licensing.settings import repository, transaction_manager
 router = APIRouter()
 
 
+def check_hierarchy_store_enabled() -> None:
+    """
+    dependency: the hierarchy store routes are only available, if enabled
+    :raises: 404 in case the hierarchy store is disabled
+    """
+    if not settings.hierarchy_store_enabled:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            message="The hierarchy store is not enabled",
+        )
+
+
+def entity_active_license_items(
+    entities: List[Entity], active_licenses: Dict[Entity, License | None]
+) -> List[EntityActiveLicenseSchema]:
+    """helper: the response items of the 'active license for entities' routes"""
+    return [
+        EntityActiveLicenseSchema(
+            entity_type=e_.type_,
+            entity_eid=e_.eid,
+            license=(
+                LicenseActiveSchema.parse_obj(asdict(active_licenses[e_]))
+                if active_licenses[e_]
+                else None
+            ),
+        )
+        for e_ in entities
+    ]
+
+
+def entity_licenses_items(
+    entities: List[Entity], valid_licenses: Dict[Entity, List[License]]
+) -> List[EntityLicensesSchema]:
+    """helper: the response items of the 'valid licenses for entities' routes"""
+    return [
+        EntityLicensesSchema(
+            entity_type=e_.type_,
+            entity_eid=e_.eid,
+            licenses=[
+                LicenseValidSchema.parse_obj(asdict(l_)) for l_ in valid_licenses[e_]
+            ],
+        )
+        for e_ in entities
+    ]
+
+
 # TODO: currently not used, but will be used when reactivating 'callback urls'
 # async def get_hierarchies(token: str, token_payload: Dict[str, Any]):
 #     """
@@ -44,6 +111,8 @@ router = APIRouter()
 async def get_managed_licenses(
     _: HierarchiesSchema = Body(default_factory=HierarchiesSchema),
     order_by: str = Query(None),
+    total_mode: TotalMode = Query(TotalMode.EXACT),
+    include_seats: bool = Query(False),
     token_data: Tuple[str, Dict[str, Any]] = Depends(authorize_with_hierarchies_token),
 ) -> CustomPage[LicenseManagedSchema]:
     """
@@ -68,6 +137,9 @@ async def get_managed_licenses(
     \f
     :param _: a list of hierarchies of a user (is not used right now)
     :param order_by something like "-id.valid_from.-manager_eid.-product_eid
+    :param total_mode: "exact", "estimated", "cached" or "none" (no total)
+    :param include_seats: include the seat lists, otherwise just the number of
+        occupied seats is given
     :param token_data: info gotten from hierarchies token
     :return: a JSON object (usually a list of accessible product EIDs)
     """
@@ -83,11 +155,57 @@ async def get_managed_licenses(
             get_order_by_fields(order_by, ALLOWED_LICENSE_ORDER_BY_FIELDS),
             payload["iss"],
             payload["sub"],
+            with_seats=include_seats,
+            total_mode=total_mode,
         )
-        items = [LicenseManagedSchema.parse_obj(asdict(l_)) for l_ in licenses]
+        items = [
+            LicenseManagedSchema.parse_obj(license_data(l_, include_seats))
+            for l_ in licenses
+        ]
         return paginate(items, page, page_size, total)
 
 
+@router.post("/licenses/cursor", status_code=http_status.HTTP_200_OK)
+async def get_managed_licenses_by_cursor(
+    _: HierarchiesSchema = Body(default_factory=HierarchiesSchema),
+    order_by: str = Query(None),
+    include_seats: bool = Query(False),
+    cursor_parameters: Tuple[List[Any] | None, int] = Depends(get_cursor_parameters),
+    token_data: Tuple[str, Dict[str, Any]] = Depends(authorize_with_hierarchies_token),
+) -> CursorPage[LicenseManagedSchema]:
+    """
+    All licenses in the hierarchy of a given user that they are managing / have created
+    (see `/licenses`) with cursor pagination: the next page is requested by the
+    'next_cursor' of the former page.
+    \f
+    :param _: a list of hierarchies of a user (is not used right now)
+    :param order_by something like "-id.valid_from.-manager_eid.-product_eid
+    :param include_seats: include the seat lists
+    :param cursor_parameters: the cursor (from the former page) and the page size
+    :param token_data: info gotten from hierarchies token
+    :return: a JSON object (a list of licenses and the cursor of the next page)
+    """
+    _, payload = token_data
+    after, page_size = cursor_parameters
+
+    async with transaction_manager() as tm:
+        licenses, keys = await LicensingService(
+            repository(tm.session)
+        ).get_managed_licenses_keyset(
+            page_size,
+            get_order_by_fields(order_by, ALLOWED_LICENSE_ORDER_BY_FIELDS),
+            after,
+            payload["iss"],
+            payload["sub"],
+            with_seats=include_seats,
+        )
+        items = [
+            LicenseManagedSchema.parse_obj(license_data(l_, include_seats))
+            for l_ in licenses
+        ]
+        return cursor_paginate(items, page_size, keys)
+
+
 @router.put("/licenses/entity-license", status_code=http_status.HTTP_200_OK)
 async def get_active_license_for_entity(
     data: EntitySchema,
@@ -123,7 +241,9 @@ async def get_active_license_for_entity(
     """
     _, payload = token_data
     # TODO: create Entity instances when serializing
-    hierarchies = parent_entities(data.hierarchies, {})
+    hierarchies = get_hierarchy_index(
+        data.hierarchies, payload["hashes"]["hierarchies"]
+    )
 
     async with transaction_manager() as tm:
         active_license = await LicensingService(
@@ -154,7 +274,9 @@ async def get_licenses_for_entity(
     """
     _, payload = token_data
     # TODO: create Entity instances when serializing
-    hierarchies = parent_entities(data.hierarchies, {})
+    hierarchies = get_hierarchy_index(
+        data.hierarchies, payload["hashes"]["hierarchies"]
+    )
 
     async with transaction_manager() as tm:
         return [
@@ -167,6 +289,158 @@ async def get_licenses_for_entity(
         ]
 
 
+@router.put("/licenses/entity-license/batch", status_code=http_status.HTTP_200_OK)
+async def get_active_license_for_entities(
+    data: EntitiesSchema,
+    token_data: Tuple[str, Dict[str, Any]] = Depends(authorize_with_hierarchies_token),
+) -> List[EntityActiveLicenseSchema]:
+    """
+    The "active license for entity" route (see `/licenses/entity-license`) for
+    many entities of the same hierarchies at once.
+    \f
+    :param data: a list of entities (type and eid) and the hierarchies
+    :param token_data: data gotten from hierarchies token
+    :return: a JSON object (a list of entities with their active license)
+    """
+    _, payload = token_data
+    hierarchies = get_hierarchy_index(
+        data.hierarchies, payload["hashes"]["hierarchies"]
+    )
+    entities = [Entity(type_=e_.entity_type, eid=e_.entity_eid) for e_ in data.entities]
+
+    async with transaction_manager() as tm:
+        active_licenses = await LicensingService(
+            repository(tm.session)
+        ).get_active_licenses_for_entity_trees(payload["iss"], entities, hierarchies)
+    return entity_active_license_items(entities, active_licenses)
+
+
+@router.put("/licenses/entity-licenses/batch", status_code=http_status.HTTP_200_OK)
+async def get_licenses_for_entities(
+    data: EntitiesSchema,
+    token_data: Tuple[str, Dict[str, Any]] = Depends(authorize_with_hierarchies_token),
+) -> List[EntityLicensesSchema]:
+    """
+    The "valid licenses for entity" route (see `/licenses/entity-licenses`) for
+    many entities of the same hierarchies at once.
+    \f
+    :param data: a list of entities (type and eid) and the hierarchies
+    :param token_data: data gotten from hierarchies token
+    :return: a JSON object (a list of entities with their valid licenses)
+    """
+    _, payload = token_data
+    hierarchies = get_hierarchy_index(
+        data.hierarchies, payload["hashes"]["hierarchies"]
+    )
+    entities = [Entity(type_=e_.entity_type, eid=e_.entity_eid) for e_ in data.entities]
+
+    async with transaction_manager() as tm:
+        valid_licenses = await LicensingService(
+            repository(tm.session)
+        ).get_valid_licenses_for_entity_trees(payload["iss"], entities, hierarchies)
+    return entity_licenses_items(entities, valid_licenses)
+
+
+@router.put(
+    "/snapshot",
+    status_code=http_status.HTTP_200_OK,
+    dependencies=[Depends(check_hierarchy_store_enabled)],
+)
+async def store_hierarchies(
+    data: StoredHierarchiesSchema,
+    token_data: Tuple[str, Dict[str, Any]] = Depends(
+        authorize_with_hierarchy_store_token
+    ),
+) -> HierarchySnapshotSchema:
+    """
+    Stores a snapshot of the hierarchies of a hierarchy provider (the issuer of
+    the token) in the hierarchy store, so the licenses of entities can be looked
+    up without sending the hierarchies (see `/stored/licenses/...` routes).
+    The snapshot replaces all stored hierarchies of the hierarchy provider, so it
+    has to contain all of its hierarchies. The token has to grant the
+    `hierarchy_store` scope.
+    \f
+    :param data: the hierarchies
+    :param token_data: data gotten from hierarchies token (of the provider)
+    :return: the number of stored entities and ancestor relations
+    """
+    _, payload = token_data
+    hierarchies = get_hierarchy_index(
+        data.hierarchies, payload["hashes"]["hierarchies"]
+    )
+
+    async with transaction_manager() as tm:
+        nof_ancestors = await LicensingService(
+            repository(tm.session)
+        ).store_hierarchies(payload["iss"], hierarchies)
+        await tm.commit()
+    return HierarchySnapshotSchema(
+        nof_entities=len(hierarchies.entities), nof_ancestors=nof_ancestors
+    )
+
+
+@router.put(
+    "/stored/licenses/entity-license",
+    status_code=http_status.HTTP_200_OK,
+    dependencies=[Depends(check_hierarchy_store_enabled)],
+)
+async def get_active_license_for_stored_entities(
+    data: StoredEntitiesSchema,
+    token_data: Tuple[str, Dict[str, Any]] = Depends(
+        authorize_with_hierarchy_provider_token
+    ),
+) -> List[EntityActiveLicenseSchema]:
+    """
+    The "active license for entity" route (see `/licenses/entity-license`) for
+    many entities at once, the ancestors of the entities are taken from the
+    hierarchy store (see `/snapshot`). The token has to grant the
+    `hierarchy_store` scope.
+    \f
+    :param data: a list of entities (type and eid)
+    :param token_data: data gotten from the token of the hierarchy provider
+    :return: a JSON object (a list of entities with their active license)
+    """
+    _, payload = token_data
+    entities = [Entity(type_=e_.entity_type, eid=e_.entity_eid) for e_ in data.entities]
+
+    async with transaction_manager() as tm:
+        active_licenses = await LicensingService(
+            repository(tm.session)
+        ).get_active_licenses_for_entity_trees(payload["iss"], entities)
+    return entity_active_license_items(entities, active_licenses)
+
+
+@router.put(
+    "/stored/licenses/entity-licenses",
+    status_code=http_status.HTTP_200_OK,
+    dependencies=[Depends(check_hierarchy_store_enabled)],
+)
+async def get_licenses_for_stored_entities(
+    data: StoredEntitiesSchema,
+    token_data: Tuple[str, Dict[str, Any]] = Depends(
+        authorize_with_hierarchy_provider_token
+    ),
+) -> List[EntityLicensesSchema]:
+    """
+    The "valid licenses for entity" route (see `/licenses/entity-licenses`) for
+    many entities at once, the ancestors of the entities are taken from the
+    hierarchy store (see `/snapshot`). The token has to grant the
+    `hierarchy_store` scope.
+    \f
+    :param data: a list of entities (type and eid)
+    :param token_data: data gotten from the token of the hierarchy provider
+    :return: a JSON object (a list of entities with their valid licenses)
+    """
+    _, payload = token_data
+    entities = [Entity(type_=e_.entity_type, eid=e_.entity_eid) for e_ in data.entities]
+
+    async with transaction_manager() as tm:
+        valid_licenses = await LicensingService(
+            repository(tm.session)
+        ).get_valid_licenses_for_entity_trees(payload["iss"], entities)
+    return entity_licenses_items(entities, valid_licenses)
+
+
 @router.post("/licenses/{license_id}", status_code=http_status.HTTP_200_OK)
 async def get_managed_license_by_uuid(
     license_id: str,
@@ -210,7 +484,7 @@ async def get_managed_license_by_uuid(
             payload["sub"],
         )
         item = (
-            LicenseManagedSchema.parse_obj(asdict(license_item))
+            LicenseManagedSchema.parse_obj(license_data(license_item))
             if license_item
             else None
         )
@@ -1,6 +1,7 @@
+import asyncio
 import datetime
 import structlog
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, List
 from dataclasses import asdict
 from dateutil.relativedelta import relativedelta
 
@@ -10,28 +11,32 @@ from fastapi import status as http_status
 from services.licensing import settings
 from services.licensing.authorization import (
     authorize_with_memberships_token,
+    authorize_with_members_token,
 )
 from services.licensing.api.v1.schema.license import (
     LicenseCreatedSchema,
     LicenseTrialSchema,
     LicenseAvailableSchema,
 )
-from services.licensing.api.v1.schema.member import MembershipsSchema
+from services.licensing.api.v1.schema.member import MembershipsSchema, MembersSchema
 
 # TODO: currently not used, but will be used when reactivating 'callback urls'
 # from services.licensing.client import post_request
 from services.licensing.business.service import LicensingService
 from services.licensing.constants import ALLOWED_LICENSE_ORDER_BY_FIELDS
-from services.licensing.custom_types import Entity
+from services.licensing.custom_types import Entity, TotalMode
 from services.licensing.exceptions import DuplicateEntryException, HTTPException
 from services.licensing.order_by import get_order_by_fields
 from services.licensing.pagination import (
+    CursorPage,
     CustomPage,
+    cursor_paginate,
+    get_cursor_parameters,
     get_pagination_parameters,
     paginate,
 )
 from services.licensing.settings import transaction_manager, repository
-from services.licensing.tokens import get_expiration_timestamp, create_licensing_token
+from services.licensing.tokens import create_permissions_token
 
 logger = structlog.stdlib.get_logger(__name__)
 router = APIRouter()
@@ -72,18 +77,55 @@ async def get_accessible_products(
     async with transaction_manager() as tm:
         accessible_products = await LicensingService(
             repository(tm.session)
-        ).get_accessible_products(payload["iss"], payload["sub"], memberships)
+        ).get_accessible_products(
+            payload["iss"],
+            payload["sub"],
+            memberships,
+            # the (already checked) memberships hash is used for caching
+            payload["hashes"]["memberships"]["hash"],
+        )
         await tm.commit()
 
-    return create_licensing_token(
-        {
-            "iss": settings.licensing_service_url,
-            "exp": get_expiration_timestamp(settings.permissions_token_livetime_secs),
-            "sub": payload["sub"],
-            "accessible_products": accessible_products,
-            "hierarchy_provider_uri": payload["iss"],
-        }
+    return await create_permissions_token(
+        payload["sub"], payload["iss"], accessible_products
+    )
+
+
+@router.post("/permissions/batch", status_code=http_status.HTTP_200_OK)
+async def get_accessible_products_batch(
+    data: MembersSchema,
+    token_data: Tuple[str, Dict[str, Any]] = Depends(authorize_with_members_token),
+) -> Dict[str, str]:
+    """
+    The "permission" route for many users at once (e.g. all students of a class)
+    :param data: the memberships of every user to get the permissions for
+    :param token_data: info gotten from members token
+    :return: a JSON object with a permissions token per user EID
+    """
+    _, payload = token_data
+    members = {
+        member.user_eid: [
+            Entity(
+                type_=m["type"], eid=m["eid"], level=m.get("level"), name=m.get("name")
+            )
+            for m in member.memberships
+        ]
+        for member in data.members
+    }
+
+    async with transaction_manager() as tm:
+        accessible_products = await LicensingService(
+            repository(tm.session)
+        ).get_accessible_products_batch(payload["iss"], members)
+        await tm.commit()
+
+    tokens = await asyncio.gather(
+        *(
+            create_permissions_token(user_eid, payload["iss"], products)
+            for user_eid, products in accessible_products.items()
+        )
     )
+    return dict(zip(accessible_products, tokens))
 
 
 @router.post(
@@ -201,6 +243,7 @@ async def create_trial_license(
 async def get_available_licenses(
     data: MembershipsSchema = Body(default_factory=MembershipsSchema),
     order_by: str = Query(None),
+    total_mode: TotalMode = Query(TotalMode.EXACT),
     token_data: Tuple[str, Dict[str, Any]] = Depends(authorize_with_memberships_token),
 ) -> CustomPage[LicenseAvailableSchema]:
     """
@@ -226,6 +269,7 @@ async def get_available_licenses(
     \f
     :param _: a list of hierarchies of a user (is not used right now)
     :param order_by something like "-id.valid_from.-manager_eid.-product_eid
+    :param total_mode: "exact", "estimated", "cached" or "none" (no total)
     :param token_data: info gotten from hierarchies token
     :return: a JSON object (usually a list of accessible product EIDs)
     """
@@ -246,6 +290,47 @@ async def get_available_licenses(
             get_order_by_fields(order_by, ALLOWED_LICENSE_ORDER_BY_FIELDS),
             payload["iss"],
             memberships,
+            total_mode=total_mode,
         )
         items = [LicenseAvailableSchema.parse_obj(asdict(l_)) for l_ in licenses]
         return paginate(items, page, page_size, total)
+
+
+@router.post("/licenses/cursor", status_code=http_status.HTTP_200_OK)
+async def get_available_licenses_by_cursor(
+    data: MembershipsSchema = Body(default_factory=MembershipsSchema),
+    order_by: str = Query(None),
+    cursor_parameters: Tuple[List[Any] | None, int] = Depends(get_cursor_parameters),
+    token_data: Tuple[str, Dict[str, Any]] = Depends(authorize_with_memberships_token),
+) -> CursorPage[LicenseAvailableSchema]:
+    """
+    Route for getting all licenses that are available in the entities a given user is
+    member of (see `/licenses`) with cursor pagination: the next page is requested
+    by the 'next_cursor' of the former page.
+    \f
+    :param data: the memberships of the user
+    :param order_by something like "-id.valid_from.-manager_eid.-product_eid
+    :param cursor_parameters: the cursor (from the former page) and the page size
+    :param token_data: info gotten from memberships token
+    :return: a JSON object (a list of licenses and the cursor of the next page)
+    """
+    _, payload = token_data
+    after, page_size = cursor_parameters
+
+    memberships = [
+        Entity(type_=m["type"], eid=m["eid"], level=m.get("level"), name=m.get("name"))
+        for m in data.memberships
+    ]
+
+    async with transaction_manager() as tm:
+        licenses, keys = await LicensingService(
+            repository(tm.session)
+        ).get_licenses_for_entities_keyset(
+            page_size,
+            get_order_by_fields(order_by, ALLOWED_LICENSE_ORDER_BY_FIELDS),
+            after,
+            payload["iss"],
+            memberships,
+        )
+        items = [LicenseAvailableSchema.parse_obj(asdict(l_)) for l_ in licenses]
+        return cursor_paginate(items, page_size, keys)
@@ -1,7 +1,42 @@
+from typing import List
+
+from pydantic import Field
+
+from services.licensing import settings
 from services.licensing.api.v1.schema.base import BaseSchema
+from services.licensing.api.v1.schema.license import (
+    LicenseActiveSchema,
+    LicenseValidSchema,
+)
 
 
 class EntitySchema(BaseSchema):
     entity_type: str
     entity_eid: str
     hierarchies: list
+
+
+class EntityRefSchema(BaseSchema):
+    entity_type: str
+    entity_eid: str
+
+
+class EntitiesSchema(BaseSchema):
+    entities: List[EntityRefSchema] = Field(
+        min_length=1, max_length=settings.entity_licenses_batch_max_size
+    )
+    hierarchies: list
+
+
+class StoredEntitiesSchema(BaseSchema):
+    entities: List[EntityRefSchema] = Field(
+        min_length=1, max_length=settings.entity_licenses_batch_max_size
+    )
+
+
+class EntityLicensesSchema(EntityRefSchema):
+    licenses: List[LicenseValidSchema]
+
+
+class EntityActiveLicenseSchema(EntityRefSchema):
+    license: LicenseActiveSchema | None
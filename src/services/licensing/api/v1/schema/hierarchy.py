@@ -1,6 +1,6 @@
 from typing import List, Dict, Any
 
-from pydantic import conlist
+from pydantic import conlist, field_validator
 
 from services.licensing.api.v1.schema.base import BaseSchema
 
@@ -25,3 +25,29 @@ class HierarchiesSchema(BaseSchema):
                 }
             ]
         }
+
+
+class StoredHierarchiesSchema(HierarchiesSchema):
+    @field_validator("hierarchies")
+    @classmethod
+    def integer_levels(cls, hierarchies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # the levels get stored (as integers) in the hierarchy store
+        nodes = list(hierarchies)
+        while nodes:
+            node = nodes.pop()
+            level = node.get("level")
+            if level is not None:
+                try:
+                    if isinstance(level, bool) or int(level) != float(level):
+                        raise ValueError
+                except (TypeError, ValueError):
+                    raise ValueError(f"invalid level: {level!r}")
+            nodes.extend(
+                c_ for c_ in node.get("children") or [] if isinstance(c_, dict)
+            )
+        return hierarchies
+
+
+class HierarchySnapshotSchema(BaseSchema):
+    nof_entities: int
+    nof_ancestors: int
@@ -1,10 +1,13 @@
 import datetime
-from typing import List, Optional
+from dataclasses import asdict, fields
+from typing import Any, Dict, List, Optional
 from typing_extensions import Annotated
 import uuid as uuid_module
-from pydantic import Field, StringConstraints
+from pydantic import Field, StringConstraints, model_serializer
 
 from services.licensing.api.v1.schema.base import BaseSchema
+from services.licensing.api.v1.schema.seat import SeatSchema
+from services.licensing.custom_types import License
 
 # Custom types
 IntWithInfinity = Annotated[int, Field(strict=True, ge=-1)]
@@ -88,6 +91,21 @@ class LicenseTrialSchema(LicenseBaseDeserializerSchema):
 
 
 # Serializer
+class LicenseSeatsSerializerMixin:
+    """
+    the seat lists ('seats', 'released_seats') are only given on request (see
+    'license_data'), otherwise they are omitted (instead of being null).
+    """
+
+    @model_serializer(mode="wrap")
+    def omit_seats_not_requested(self, handler):
+        data = handler(self)
+        for key in ("seats", "released_seats"):
+            if data.get(key, []) is None:
+                del data[key]
+        return data
+
+
 class LicenseBaseSerializerSchema(BaseSchema):
     uuid: uuid_module.UUID
     product_eid: str
@@ -143,9 +161,12 @@ class LicenseAvailableSchema(LicenseBaseSerializerSchema):
     owner_eids: List[str]
 
 
-class LicenseManagedSchema(LicenseBaseSerializerSchema):
+class LicenseManagedSchema(LicenseSeatsSerializerMixin, LicenseBaseSerializerSchema):
     owner_eids: List[str]
     created_at: datetime.datetime
+    # the seat lists are only given on request ('include_seats'), see above
+    seats: List[SeatSchema] | None = None
+    released_seats: List[SeatSchema] | None = None
 
     class Config:
         json_schema_extra = {
@@ -193,10 +214,28 @@ class LicenseActiveSchema(LicenseValidSchema):
     pass
 
 
-class LicenseCompleteSchema(LicenseBaseSerializerSchema):
+class LicenseCompleteSchema(LicenseSeatsSerializerMixin, LicenseBaseSerializerSchema):
     id: int
     manager_eid: str
     owner_eids: List[str]
     notes: str | None = None
     created_at: datetime.datetime
     updated_at: datetime.datetime | None = None
+    # the seat lists are only given on request ('include_seats'), see above
+    seats: List[SeatSchema] | None = None
+    released_seats: List[SeatSchema] | None = None
+
+
+def license_data(license_: License, include_seats: bool = False) -> Dict[str, Any]:
+    """
+    helper: the data of a license DTO to be serialized. The seat lists are only
+    included on request, otherwise just the number of occupied seats is given.
+    """
+    if include_seats:
+        return asdict(license_)
+    # (the seats are left out, instead of being copied and deleted again)
+    return {
+        f_.name: getattr(license_, f_.name)
+        for f_ in fields(license_)
+        if f_.name not in ("seats", "released_seats")
+    }
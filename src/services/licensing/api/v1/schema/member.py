@@ -1,4 +1,8 @@
-from pydantic import BaseModel as BaseSchema
+from typing import List
+
+from pydantic import BaseModel as BaseSchema, Field, field_validator
+
+from services.licensing import settings
 
 
 class MembershipsSchema(BaseSchema):
@@ -19,3 +23,42 @@ class MembershipsSchema(BaseSchema):
                 }
             ]
         }
+
+
+class MemberSchema(BaseSchema):
+    user_eid: str = Field(min_length=1, max_length=256)
+    memberships: list
+
+
+class MembersSchema(BaseSchema):
+    members: List[MemberSchema] = Field(max_length=settings.permissions_batch_max_size)
+
+    @field_validator("members")
+    @classmethod
+    def unique_user_eids(cls, members: List[MemberSchema]) -> List[MemberSchema]:
+        # the permissions are returned per user EID, so one entry per user only
+        user_eids = [m_.user_eid for m_ in members]
+        if len(set(user_eids)) != len(user_eids):
+            raise ValueError("duplicate user EIDs")
+        return members
+
+    class Config:
+        json_schema_extra = {
+            "examples": [
+                {
+                    "members": [
+                        {
+                            "user_eid": "2@DE_bettermarks",
+                            "memberships": [
+                                {
+                                    "eid": "1@DE_bettermarks",
+                                    "name": "Cypress test class 11",
+                                    "type": "class",
+                                    "level": "1",
+                                }
+                            ],
+                        }
+                    ]
+                }
+            ]
+        }
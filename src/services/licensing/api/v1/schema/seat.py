@@ -0,0 +1,14 @@
+import datetime
+
+from services.licensing.api.v1.schema.base import BaseSchema
+from services.licensing.custom_types import SeatStatus
+
+
+# Serializer
+class SeatSchema(BaseSchema):
+    id: int
+    user_eid: str
+    status: SeatStatus
+    is_occupied: bool
+    occupied_at: datetime.datetime
+    last_accessed_at: datetime.datetime | None = None
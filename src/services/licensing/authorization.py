@@ -1,7 +1,8 @@
 import hashlib
 import json
+import time
 from functools import partial
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 from fastapi import Depends, Request
 from fastapi import status as http_status
@@ -10,15 +11,28 @@ from fastapi.security.utils import get_authorization_scheme_param
 from jwcrypto import jwt, jws
 
 from services.licensing.exceptions import HTTPException
-from services.licensing import settings
+from services.licensing import crypto, settings
+from services.licensing.keys import key_registry
+from services.licensing.cache import TTLCache
+from services.licensing.constants import HIERARCHY_STORE_SCOPE
 from services.licensing.tokens import get_key_from_pem
 
 # a 401 HTTP Exception shortcut used below ...
 HTTP401 = partial(HTTPException, status_code=http_status.HTTP_401_UNAUTHORIZED)
 
+# a 403 HTTP Exception shortcut used below ...
+HTTP403 = partial(HTTPException, status_code=http_status.HTTP_403_FORBIDDEN)
+
 # supported hash algorithms for payload hashes encoded into JWT tokens ...
 HASHING_ALGORITHMS = {"SHA256": hashlib.sha256}
 
+# the claims of already verified tokens keyed by a digest of the token, so
+# repeatedly presented tokens are not verified again until they expire
+claims_cache = TTLCache(
+    maxsize=settings.token_claims_cache_maxsize,
+    ttl_secs=settings.token_claims_cache_ttl_secs,
+)
+
 
 class CustomHTTPBearer(HTTPBearer):
     """
@@ -39,17 +53,62 @@ class CustomHTTPBearer(HTTPBearer):
         return HTTPAuthorizationCredentials(scheme=scheme, credentials=credentials)
 
 
+class Payload(NamedTuple):
+    """
+    some (parsed) value of the request body to check a given hash for and
+    - if available - its serialization as it was sent in the request body
+    """
+
+    value: Any
+    raw: bytes | memoryview | None = None
+
+
+def canonical_json(payload: Any) -> bytes:
+    """
+    the canonical serialization payload hashes are built over: 'json.dumps' with
+    its default settings, that is, keys in document order, separators ", " and
+    ": " and non ASCII characters escaped (UTF-8 encoded).
+    """
+    return json.dumps(payload).encode("utf-8")
+
+
+def raw_payload(body: bytes, payload_key: str) -> memoryview | None:
+    """
+    gets the serialized value of a given key from a raw request body, if the
+    body is an object with just this key serialized in canonical form (e.g. as
+    sent by the 'requests' library): '{"<payload_key>": <value>}'.
+    :return: the serialized value or None, if the body is not of this form.
+    Please note: the result is not guaranteed to be valid JSON at all, so it must
+    only be used to be compared with a hash over some canonical serialization.
+    """
+    prefix = canonical_json({payload_key: None})[: -len(b"null}")]
+    # (the body may be large, so it does not get copied)
+    start, end = 0, len(body)
+    while start < end and body[start] in b" \t\r\n":
+        start += 1
+    while end > start and body[end - 1] in b" \t\r\n":
+        end -= 1
+    if body.startswith(prefix, start) and body.endswith(b"}", start, end):
+        return memoryview(body)[start + len(prefix) : end - 1]
+    return None
+
+
 class PayloadForHashing:
     """
     reads the request body and extracts some requested parameter
-    used to check a given hash for
+    used to check a given hash for.
+    Please note: the request body is parsed just once, as the parsed body is
+    cached by the request and shared with FastAPI's own body parsing.
     """
 
     def __init__(self, payload_key: str):
         self.payload_key = payload_key
 
-    async def __call__(self, request: Request) -> str:
-        return (await request.json()).get(self.payload_key)
+    async def __call__(self, request: Request) -> Payload:
+        return Payload(
+            value=(await request.json()).get(self.payload_key),
+            raw=raw_payload(await request.body(), self.payload_key),
+        )
 
 
 def check_hash(payload_key, payload, payload_hash_dict):
@@ -68,7 +127,8 @@ def check_hash(payload_key, payload, payload_hash_dict):
     also provided hash given in the 'payload_hash_dict' structure.
 
     :param payload_key: some string representing the payload structure to hash
-    :param payload: some object to hash
+    :param payload: some object to hash (optionally along with its raw
+    serialization: if its hash matches, there is no need to serialize the object)
     :param payload_hash_dict: structure holding the hash to be compared to.
     :returns: None in case of success
     :raises: an HTTP 401 error in case of failing hash comparison or missing data
@@ -79,6 +139,10 @@ def check_hash(payload_key, payload, payload_hash_dict):
             message="Token does not contain requested payload hash",
             payload_key=payload_key,
         )
+    if isinstance(payload, Payload):
+        payload, raw = payload
+    else:
+        raw = None
     if payload is None:
         raise HTTP401(message="No payload available to compare with payload hash")
     hashing_alg = HASHING_ALGORITHMS.get(hash_dict.get("alg", "undefined").upper())
@@ -87,8 +151,11 @@ def check_hash(payload_key, payload, payload_hash_dict):
             message="Unsupported hash algorithm", hash_algorithm=hash_dict.get("alg")
         )
 
-    h0 = hashing_alg(json.dumps(payload).encode("utf-8")).hexdigest()
     h1 = hash_dict.get("hash")
+    # fast path: the raw value (if available) already is in canonical form
+    if raw is not None and hashing_alg(raw).hexdigest() == h1:
+        return
+    h0 = hashing_alg(canonical_json(payload)).hexdigest()
     if h0 != h1:
         raise HTTP401(
             message="Payload hash does not match signed hash, maybe has been tampered",
@@ -97,14 +164,33 @@ def check_hash(payload_key, payload, payload_hash_dict):
         )
 
 
+def check_scope(scope: str, payload: Dict[str, Any]):
+    """
+    helper: checks the 'scope' claim (a space separated list of scopes) of a
+    token to contain a given scope
+    :param scope: the required scope
+    :param payload: the claims of the token (including the 'scope' claim)
+    :returns: None in case of success
+    :raises: an HTTP 403 error, if the scope is not granted
+    """
+    scopes = payload["scope"]
+    if not isinstance(scopes, str) or scope not in scopes.split():
+        raise HTTP403(message="Token does not grant requested scope", scope=scope)
+
+
 def get_key(kid):
     """
-    gets a JWK formatted key from a given KID. Currently only PEM
-    formatted keys are supported, no passphrase or other keys.
+    gets a JWK formatted key from a given KID. The key is taken from the key
+    registry, falling back to the keys configured in the settings (PEM formatted
+    keys only, no passphrase or other keys), if the registry has not been loaded
+    (yet).
     :param kid: the given keyID (kid)
     :returns: a valid key (JWK object) gotten from the keyID
     :raises: a 401, if the kid could not be identified
     """
+    key = key_registry.get(kid)
+    if key is not None:
+        return key
     try:
         return get_key_from_pem(
             settings.jwt_verification_keys[kid]["key"].encode("utf-8")
@@ -113,6 +199,23 @@ def get_key(kid):
         raise HTTP401(message="Key ID (kid) cannot be identified", kid=kid)
 
 
+def verify_token(token: str) -> Dict[str, Any]:
+    """
+    deserializes and verifies a given (signed) JWT token. Usually runs within
+    the crypto executor (see 'crypto.py').
+    :param token: the serialized token
+    :return: the claims of the token
+    """
+    # deserialize nested token without decryption to get kid ...
+    jws_token = jwt.JWS()
+    jws_token.deserialize(token)
+    jws_kid = jws_token.jose_header["kid"]
+
+    # verify ...
+    jwt_token = jwt.JWT(key=get_key(jws_kid), jwt=token)
+    return json.loads(jwt_token.claims)
+
+
 async def authorize(
     credentials: HTTPAuthorizationCredentials, requested_claim_keys: List[str] | None
 ) -> Tuple[str, Dict]:
@@ -122,22 +225,22 @@ async def authorize(
     :param requested_claim_keys: a list of 'claim keys' that are required.
     :return: (the token, a dict got from the 'requested' claims keys).
     """
-    try:
-        # deserialize nested token without decryption to get kid ...
-        jws_token = jwt.JWS()
-        jws_token.deserialize(credentials.credentials)
-        jws_kid = jws_token.jose_header["kid"]
-
-        # verify ...
-        jwt_token = jwt.JWT(key=get_key(jws_kid), jwt=credentials.credentials)
-        claims = json.loads(jwt_token.claims)
-
-    except (jwt.JWTExpired, jwt.JWTInvalidClaimValue, KeyError) as exc:
-        raise HTTP401(message="JWT token validation failed", exception=str(exc))
-    except jws.InvalidJWSSignature as exc:
-        raise HTTP401(
-            message="JWS token signature validation failed", exception=str(exc)
-        )
+    digest = hashlib.sha256(credentials.credentials.encode("utf-8")).digest()
+    claims = claims_cache.get(digest) if claims_cache.enabled else None
+    if claims is None:
+        try:
+            claims = await crypto.crypto_executor.run(
+                verify_token, credentials.credentials
+            )
+        except (jwt.JWTExpired, jwt.JWTInvalidClaimValue, KeyError) as exc:
+            raise HTTP401(message="JWT token validation failed", exception=str(exc))
+        except jws.InvalidJWSSignature as exc:
+            raise HTTP401(
+                message="JWS token signature validation failed", exception=str(exc)
+            )
+        # only tokens that expire get cached (until their expiration)
+        if isinstance(claims.get("exp"), (int, float)):
+            claims_cache.set(digest, claims, ttl_secs=claims["exp"] - time.time())
 
     # get the claims
     try:
@@ -179,7 +282,7 @@ async def authorize_with_admin_token(
 
 async def authorize_with_memberships_token(
     credentials: HTTPAuthorizationCredentials = Depends(CustomHTTPBearer()),
-    memberships: Any = Depends(PayloadForHashing("memberships")),
+    memberships: Payload = Depends(PayloadForHashing("memberships")),
 ) -> Tuple[str, Dict[str, Any]]:
     """
     checks the authorization header to be a valid 'membership token'
@@ -193,9 +296,26 @@ async def authorize_with_memberships_token(
     return token, payload
 
 
+async def authorize_with_members_token(
+    credentials: HTTPAuthorizationCredentials = Depends(CustomHTTPBearer()),
+    members: Payload = Depends(PayloadForHashing("members")),
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    checks the authorization header to be a valid 'members token' (the
+    memberships of many users, signed by the hierarchy provider)
+    :param credentials: injected HTTPAuthorizationCredentials object from auth header
+    :param members: injected requested value for a given key from the request body
+    :return: (the token itself, a requested subset of the payload dict)
+    :raises: 401 in case of unsuccessful token validation
+    """
+    token, payload = await authorize(credentials, ["iss", "sub", "hashes"])
+    check_hash("members", members, payload["hashes"])
+    return token, payload
+
+
 async def authorize_with_hierarchies_token(
     credentials: HTTPAuthorizationCredentials = Depends(CustomHTTPBearer()),
-    hierarchies: Any = Depends(PayloadForHashing("hierarchies")),
+    hierarchies: Payload = Depends(PayloadForHashing("hierarchies")),
 ) -> Tuple[str, Dict[str, Any]]:
     """
     checks the authorization header to be a valid 'hierarchies token'
@@ -209,6 +329,43 @@ async def authorize_with_hierarchies_token(
     return token, payload
 
 
+async def authorize_with_hierarchy_provider_token(
+    credentials: HTTPAuthorizationCredentials = Depends(CustomHTTPBearer()),
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    checks the authorization header to be a valid token of a hierarchy provider
+    granting the hierarchy store scope, but without any payload (used for lookups
+    in the hierarchy store)
+    :param credentials: injected HTTPAuthorizationCredentials object from auth header
+    :return: (the token itself, a requested subset of the payload dict)
+    :raises: 401 in case of unsuccessful token validation, 403 if the scope is
+    not granted
+    """
+    token, payload = await authorize(credentials, ["iss", "sub", "scope"])
+    check_scope(HIERARCHY_STORE_SCOPE, payload)
+    return token, payload
+
+
+async def authorize_with_hierarchy_store_token(
+    credentials: HTTPAuthorizationCredentials = Depends(CustomHTTPBearer()),
+    hierarchies: Payload = Depends(PayloadForHashing("hierarchies")),
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    checks the authorization header to be a valid 'hierarchies token' of a
+    hierarchy provider granting the hierarchy store scope (used for storing
+    snapshots in the hierarchy store)
+    :param credentials: injected HTTPAuthorizationCredentials object from auth header
+    :param hierarchies: injected requested value for a given key from the request body
+    :return: (the token itself, a requested subset of the payload dict)
+    :raises: 401 in case of unsuccessful token validation, 403 if the scope is
+    not granted
+    """
+    token, payload = await authorize(credentials, ["iss", "sub", "hashes", "scope"])
+    check_scope(HIERARCHY_STORE_SCOPE, payload)
+    check_hash("hierarchies", hierarchies, payload["hashes"])
+    return token, payload
+
+
 async def authorize_with_shop_token(
     credentials: HTTPAuthorizationCredentials = Depends(CustomHTTPBearer()),
 ) -> Tuple[str, Dict]:
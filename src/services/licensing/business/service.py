@@ -1,19 +1,23 @@
 import datetime
 import uuid as uuid_module
-from functools import reduce
-from typing import List, Dict, Tuple
+from itertools import groupby
+from typing import Any, List, Dict, Tuple
 
+from services.licensing import cache, seat_access, settings
+from services.licensing.cache import PermissionsCache
 from services.licensing.data.repository import LicensingRepository
 from services.licensing.custom_types import (
     SeatStatus,
     Memberships,
-    Hierarchies,
     Entity,
     License,
+    Seat,
     EventLog,
     EventType,
+    TotalMode,
 )
-from services.licensing.hierarchies import get_ancestors
+from services.licensing.hierarchies import HierarchyIndex
+from services.licensing.seat_access import SeatAccessBuffer, is_seat_access_due
 from services.licensing.utils import nof_free_seats
 
 
@@ -22,14 +26,29 @@ class LicensingService:
     Concrete implementation of the business logic
     """
 
-    def __init__(self, licensing_repository: LicensingRepository):
+    def __init__(
+        self,
+        licensing_repository: LicensingRepository,
+        permissions_cache: PermissionsCache | None = None,
+        seat_access_buffer: SeatAccessBuffer | None = None,
+    ):
         self.licensing_repository = licensing_repository
+        self.permissions_cache = (
+            cache.permissions_cache if permissions_cache is None else permissions_cache
+        )
+        self.seat_access_buffer = (
+            seat_access.seat_access_buffer
+            if seat_access_buffer is None
+            else seat_access_buffer
+        )
 
     async def is_db_alive(self) -> bool:
         return await self.licensing_repository.is_db_alive()
 
     async def delete_license(self, license_uuid: str) -> None:
-        await self.licensing_repository.delete_license(license_uuid)
+        l_ = await self.licensing_repository.delete_license(license_uuid)
+        if l_:
+            self.permissions_cache.invalidate_owners(l_.owner_type, l_.owner_eids)
 
     async def create_license(self, **license_data) -> Dict[str, str]:
         data = license_data.copy()
@@ -44,6 +63,7 @@ class LicensingService:
         await self.licensing_repository.create_event_log(
             EventType.LICENSE_CREATED, data
         )
+        self.permissions_cache.invalidate_owners(data["owner_type"], data["owner_eids"])
         return {
             "uuid": data["uuid"],
             "product_eid": data["product_eid"],
@@ -65,6 +85,23 @@ class LicensingService:
             {k: v for k, v in seat_data.items() if k != "ref_license"},
         )
 
+    async def occupy_seat(self, **seat_data) -> bool:
+        """
+        occupies a seat, if the license still has free seats
+        :returns: True, if the seat has been occupied (or the user has occupied a
+            seat of the license concurrently, in which case no event is logged)
+        """
+        occupied = await self.licensing_repository.occupy_seat(**seat_data)
+        if occupied is False:
+            return False
+        if occupied is None:
+            return True
+        await self.licensing_repository.create_event_log(
+            EventType.SEAT_CREATED,
+            {k: v for k, v in seat_data.items() if k != "ref_license"},
+        )
+        return True
+
     async def update_license(
         self, license_uuid: str, license_filter_restrictions=None, **license_data
     ) -> License:
@@ -85,16 +122,25 @@ class LicensingService:
         l_ = await self.licensing_repository.update_license(
             license_uuid=license_uuid,
             license_filter_restrictions=license_filter_restrictions,
-            **data
+            **data,
         )
         await self.licensing_repository.create_event_log(
             EventType.LICENSE_UPDATED,
             {"uuid": license_uuid, "manager_eid": l_.manager_eid} | data,
         )
+        if "owner_type" in data or "owner_eids" in data:
+            # we do not know the former owners (and their members) here
+            self.permissions_cache.clear()
+        else:
+            self.permissions_cache.invalidate_owners(l_.owner_type, l_.owner_eids)
         return l_
 
     async def get_accessible_products(
-        self, hierarchy_provider_uri: str, user_eid: str, memberships: Memberships
+        self,
+        hierarchy_provider_uri: str,
+        user_eid: str,
+        memberships: Memberships,
+        memberships_hash: str | None = None,
     ) -> List[str]:
         """
         A just logged-in user (student or teacher) wants to get his accessable
@@ -128,47 +174,48 @@ class LicensingService:
            list 'filtered and sorted valid licenses'.
         5. A seat will be occupied for the FIRST license for EACH product in the
            'filtered and sorted valid licenses' list. We will call those licenses
-           'licenses to occupy'.
+           'licenses to occupy'. If the FIRST license has run out of free seats
+           meanwhile (concurrent requests), the next license of the product is
+           tried.
         6. Return the EIDs merged from 'occupied products' and 'unoccupied products'
 
+        Steps 1, 3 and 4 are done by the data layer in one single round trip,
+        only the seat checks (1.b) and the seat occupation (5) are done here.
+
+        If a memberships hash is given, the result is cached (see PermissionsCache).
+
         :param hierarchy_provider_uri: the URI of the hierarchy provider
         :param user_eid: the user EID
         :param memberships: memberships structure
+        :param memberships_hash: the hash of the memberships (from the token)
         :returns all the product EIDs gotten from the licenses
         :raises HTTPException: possible codes 400, 401, 409, 422
         """
+        cache_key = (hierarchy_provider_uri, user_eid, memberships_hash)
+        if memberships_hash:
+            accessible_products = self.permissions_cache.get_products(cache_key)
+            if accessible_products is not None:
+                return accessible_products
+
         now = datetime.datetime.now(tz=datetime.timezone.utc)
 
-        # 1. get all seats 'occupied' by the requesting user
-        occupied_seats = await self.licensing_repository.get_occupied_seats(user_eid)
+        # 1. get all seats 'occupied' by the requesting user and (3. - 4.) the
+        # 'filtered and sorted valid licenses'
+        occupied_seats, valid_licenses = (
+            await self.licensing_repository.get_occupied_seats_and_candidate_licenses(
+                hierarchy_provider_uri, user_eid, memberships, now.date()
+            )
+        )
 
         # 1.b seats will also be updated ...
-        occupied_seats_to_remove = []
-
-        for seat in occupied_seats:
-            # update 'last_accessed_at' in any case!
-            seat.last_accessed_at = now
-
-            # has the attached license expired?
-            if seat.license.valid_to < now.date():
-                occupied_seats_to_remove.append(seat)
-                seat.status = SeatStatus.EXPIRED
-                seat.is_occupied = False
-                continue
-
-            # is the memberships disjoint with the owners?
-            owners = {
-                Entity(type_=seat.license.owner_type, eid=o_eid)
-                for o_eid in seat.license.owner_eids
-            }
-            members = {k for k in memberships}
-            if not owners.intersection(members):
-                occupied_seats_to_remove.append(seat)
-                seat.status = SeatStatus.NOT_A_MEMBER
-                seat.is_occupied = False
+        occupied_seats_to_remove, accessed_seats = self.check_seats(
+            occupied_seats, memberships, now
+        )
 
         # 1.b.1 ok, update the seats in the data layer
-        await self.licensing_repository.update_seats(occupied_seats)
+        await self.update_checked_seats(
+            occupied_seats, occupied_seats_to_remove, accessed_seats, now
+        )
 
         # 1.b.2 .. and remove the seats from the occupied seats list
         for seat in occupied_seats_to_remove:
@@ -179,52 +226,8 @@ class LicensingService:
             {seat.license.product_eid for seat in occupied_seats}
         )
 
-        # 3. get all the 'valid licenses'
-        valid_licenses = (
-            await self.licensing_repository.get_valid_licenses_for_entities(
-                hierarchy_provider_uri,
-                memberships,
-                now.date(),
-            )
-        )
-
-        # 4. apply the filters and sorting mentioned above
-        filtered_and_sorted_valid_licenses = sorted(
-            filter(
-                lambda l_: nof_free_seats(l_.nof_seats, l_.extra_seats, len(l_.seats))
-                > 0
-                and l_.product_eid not in occupied_product_eids,
-                valid_licenses,
-            ),
-            # sort by 'product' and 'owner level' and free seats desc. (step 3)
-            key=lambda l_: (
-                l_.product_eid,
-                l_.owner_level,
-                -1 * nof_free_seats(l_.nof_seats, l_.extra_seats, len(l_.seats)),
-            ),
-        )
-
-        # 5. ok, create a new list, in which only the first elements for every
-        # distinct product eid are inserted. This gives a list of all licenses,
-        # where all possible products are available ...
-        licenses_to_occupy = reduce(
-            lambda acc, l_: (
-                acc + [l_] if not acc or acc[-1].product_eid != l_.product_eid else acc
-            ),
-            filtered_and_sorted_valid_licenses,
-            [],
-        )
-        # occupy the seats
-        for _l in licenses_to_occupy:
-            await self.create_seat(
-                user_eid=user_eid,
-                occupied_at=now,
-                last_accessed_at=now,
-                is_occupied=True,
-                status=SeatStatus.ACTIVE,
-                ref_license=_l.id,
-                uuid=_l.uuid,  # uuid will only be used to build up events
-            )
+        # 5. occupy the seats
+        licenses_to_occupy = await self.occupy_seats(user_eid, valid_licenses, now)
 
         # 6.  merge the relevant products
         accessible_products = occupied_product_eids + [
@@ -239,14 +242,232 @@ class LicensingService:
                 "accessible_products": accessible_products,
             },
         )
+        if memberships_hash:
+            self.permissions_cache.set_products(
+                cache_key,
+                accessible_products,
+                [(m.type_, m.eid) for m in memberships],
+            )
         return accessible_products
 
+    async def get_accessible_products_batch(
+        self, hierarchy_provider_uri: str, members: Dict[str, Memberships]
+    ) -> Dict[str, List[str]]:
+        """
+        The accessible products for many users at once (e.g. all students of a
+        class). Follows the same seat occupying algorithm as
+        'get_accessible_products', but reads the seats of all users and all valid
+        licenses of all their memberships with a constant number of queries.
+        Only the seat occupation itself is done per seat (see 'occupy_seat').
+        :param hierarchy_provider_uri: the URI of the hierarchy provider
+        :param members: the memberships structures per user EID
+        :returns: the accessible product EIDs per user EID
+        """
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+
+        # 1. & 3. get all seats 'occupied' by the requesting users and all licenses
+        # valid for their memberships ...
+        occupied_seats = await self.licensing_repository.get_occupied_seats_of_users(
+            list(members)
+        )
+        valid_licenses = (
+            await self.licensing_repository.get_valid_licenses_for_entities(
+                hierarchy_provider_uri,
+                list({m for memberships in members.values() for m in memberships}),
+                now.date(),
+            )
+        )
+        occupied_seats_of_user = {user_eid: [] for user_eid in members}
+        for seat in occupied_seats:
+            occupied_seats_of_user[seat.user_eid].append(seat)
+
+        # 1.b check the seats of all users ...
+        occupied_seats_to_remove, accessed_seats = [], []
+        for user_eid, memberships in members.items():
+            seats_to_remove, seats_accessed = self.check_seats(
+                occupied_seats_of_user[user_eid], memberships, now
+            )
+            occupied_seats_to_remove += seats_to_remove
+            accessed_seats += seats_accessed
+
+        # 1.b.1 ... and update them in the data layer in one go
+        await self.update_checked_seats(
+            occupied_seats, occupied_seats_to_remove, accessed_seats, now
+        )
+
+        accessible_products = {}
+        for user_eid, memberships in members.items():
+            # 1.b.2 & 2. the 'occupied products' of the user
+            occupied_product_eids = list(
+                {
+                    seat.license.product_eid
+                    for seat in occupied_seats_of_user[user_eid]
+                    if seat not in occupied_seats_to_remove
+                }
+            )
+            # 4. filter and sort the valid licenses of the user
+            members_ = set(memberships)
+            licenses = sorted(
+                [
+                    l_
+                    for l_ in valid_licenses
+                    if l_.product_eid not in occupied_product_eids
+                    and nof_free_seats(
+                        l_.nof_seats, l_.extra_seats, l_.nof_occupied_seats
+                    )
+                    > 0
+                    and members_.intersection(
+                        Entity(type_=l_.owner_type, eid=o_eid)
+                        for o_eid in l_.owner_eids
+                    )
+                ],
+                key=lambda l_: (
+                    l_.product_eid,
+                    l_.owner_level,
+                    -1
+                    * nof_free_seats(
+                        l_.nof_seats, l_.extra_seats, l_.nof_occupied_seats
+                    ),
+                    l_.id,
+                ),
+            )
+            # 5. occupy the seats
+            licenses_to_occupy = await self.occupy_seats(user_eid, licenses, now)
+
+            # 6.  merge the relevant products
+            accessible_products[user_eid] = occupied_product_eids + [
+                l_.product_eid for l_ in licenses_to_occupy
+            ]
+            await self.licensing_repository.create_event_log(
+                EventType.PERMISSIONS_REQUESTED,
+                {
+                    "hierarchy_provider_uri": hierarchy_provider_uri,
+                    "user_eid": user_eid,
+                    "accessible_products": accessible_products[user_eid],
+                },
+            )
+        return accessible_products
+
+    @staticmethod
+    def check_seats(
+        occupied_seats: List[Seat], memberships: Memberships, now: datetime.datetime
+    ) -> Tuple[List[Seat], List[Seat]]:
+        """
+        checks the occupied seats of a user and updates the state of the seats
+        (see step 1.b of 'get_accessible_products')
+        :returns: a tuple (the no longer valid seats, the seats with an access due
+            to be persisted)
+        """
+        occupied_seats_to_remove = []
+        accessed_seats = []
+        members = {k for k in memberships}
+
+        for seat in occupied_seats:
+            # update 'last_accessed_at' in any case!
+            last_accessed_at, seat.last_accessed_at = seat.last_accessed_at, now
+
+            # has the attached license expired?
+            if seat.license.valid_to < now.date():
+                occupied_seats_to_remove.append(seat)
+                seat.status = SeatStatus.EXPIRED
+                seat.is_occupied = False
+                continue
+
+            # is the memberships disjoint with the owners?
+            owners = {
+                Entity(type_=seat.license.owner_type, eid=o_eid)
+                for o_eid in seat.license.owner_eids
+            }
+            if not owners.intersection(members):
+                occupied_seats_to_remove.append(seat)
+                seat.status = SeatStatus.NOT_A_MEMBER
+                seat.is_occupied = False
+                continue
+
+            if is_seat_access_due(last_accessed_at, now):
+                accessed_seats.append(seat)
+
+        return occupied_seats_to_remove, accessed_seats
+
+    async def update_checked_seats(
+        self,
+        occupied_seats: List[Seat],
+        occupied_seats_to_remove: List[Seat],
+        accessed_seats: List[Seat],
+        now: datetime.datetime,
+    ) -> None:
+        """
+        updates the checked seats (see 'check_seats') in the data layer
+        """
+        if settings.seat_access_granularity_secs or self.seat_access_buffer.enabled:
+            # status changes are written immediately, mere accesses are coalesced
+            if occupied_seats_to_remove:
+                await self.licensing_repository.update_seats(occupied_seats_to_remove)
+            await self.record_seat_accesses(accessed_seats, now)
+        else:
+            await self.licensing_repository.update_seats(occupied_seats)
+
+        # the released seats are free again for the members of the license owners
+        for seat in occupied_seats_to_remove:
+            self.permissions_cache.invalidate_owners(
+                seat.license.owner_type, seat.license.owner_eids
+            )
+
+    async def occupy_seats(
+        self, user_eid: str, valid_licenses: List[License], now: datetime.datetime
+    ) -> List[License]:
+        """
+        occupies a seat for the FIRST license (with free seats left) for EACH
+        product in the 'filtered and sorted valid licenses' list (see step 5 of
+        'get_accessible_products')
+        :returns: the licenses, a seat has been occupied for
+        """
+        licenses_to_occupy = []
+        for _, licenses in groupby(valid_licenses, key=lambda l_: l_.product_eid):
+            for _l in licenses:
+                if await self.occupy_seat(
+                    user_eid=user_eid,
+                    occupied_at=now,
+                    last_accessed_at=now,
+                    is_occupied=True,
+                    status=SeatStatus.ACTIVE,
+                    ref_license=_l.id,
+                    uuid=_l.uuid,  # uuid will only be used to build up events
+                ):
+                    _l.nof_occupied_seats += 1
+                    licenses_to_occupy.append(_l)
+                    # fewer free seats for the members of the license owners
+                    self.permissions_cache.invalidate_owners(
+                        _l.owner_type, _l.owner_eids
+                    )
+                    break
+                # no free seats left (for now)
+                _l.nof_occupied_seats = max(
+                    _l.nof_occupied_seats, _l.nof_seats + _l.extra_seats
+                )
+        return licenses_to_occupy
+
+    async def record_seat_accesses(
+        self, seats: List[Seat], accessed_at: datetime.datetime
+    ) -> None:
+        """
+        persists the access timestamp of the given seats: either buffered (and
+        flushed in bulk later on) or immediately (just the 'last_accessed_at')
+        """
+        if self.seat_access_buffer.enabled:
+            for seat in seats:
+                self.seat_access_buffer.add(seat.id, accessed_at)
+        elif seats:
+            await self.licensing_repository.update_seats_last_accessed_at(
+                {seat.id: accessed_at for seat in seats}
+            )
+
     async def get_valid_licenses_for_entity_tree(
         self,
         hierarchy_provider_uri: str,
         entity_type: str,
         entity_eid: str,
-        hierarchies: Hierarchies,
+        hierarchies: HierarchyIndex,
     ) -> List[License]:
         """
         gets all valid licenses for a given entity in a hierarchy structure.
@@ -257,10 +478,10 @@ class LicensingService:
         :param hierarchy_provider_uri:
         :param entity_type: the entity type
         :param entity_eid: the entity eid to get the valid licenses for
-        :param hierarchies: a hierarchies structure
+        :param hierarchies: a (compiled) hierarchies structure
         :return: all valid licenses for an entity
         """
-        ancestors = get_ancestors(entity_type, entity_eid, hierarchies)
+        ancestors = hierarchies.get_ancestors(entity_type, entity_eid)
         licenses = await self.licensing_repository.get_valid_licenses_for_entities(
             hierarchy_provider_uri,
             ancestors + [Entity(type_=entity_type, eid=entity_eid)],
@@ -269,7 +490,9 @@ class LicensingService:
         # check for free seats!
         return list(
             filter(
-                lambda l_: nof_free_seats(l_.nof_seats, l_.extra_seats, len(l_.seats))
+                lambda l_: nof_free_seats(
+                    l_.nof_seats, l_.extra_seats, l_.nof_occupied_seats
+                )
                 > 0,
                 licenses,
             )
@@ -280,7 +503,7 @@ class LicensingService:
         hierarchy_provider_uri: str,
         entity_type: str,
         entity_eid: str,
-        hierarchies: Hierarchies,
+        hierarchies: HierarchyIndex,
     ) -> License | None:
         """
         the 'active license' for a given entity, that is the license taken
@@ -291,7 +514,7 @@ class LicensingService:
         :param hierarchy_provider_uri:
         :param entity_type: the entity type
         :param entity_eid: the entity eid to get the valid licenses for
-        :param hierarchies: a hierarchies structure
+        :param hierarchies: a (compiled) hierarchies structure
         :return: the active entity for an entity (or None)
         """
         sorted_valid_licenses = sorted(
@@ -300,11 +523,118 @@ class LicensingService:
             ),
             key=lambda l_: (
                 l_.owner_level,
-                -1 * nof_free_seats(l_.nof_seats, l_.extra_seats, len(l_.seats)),
+                -1
+                * nof_free_seats(l_.nof_seats, l_.extra_seats, l_.nof_occupied_seats),
             ),
         )
         return sorted_valid_licenses[0] if sorted_valid_licenses else None
 
+    async def get_valid_licenses_for_entity_trees(
+        self,
+        hierarchy_provider_uri: str,
+        entities: List[Entity],
+        hierarchies: HierarchyIndex | None = None,
+    ) -> Dict[Entity, List[License]]:
+        """
+        gets all valid licenses (see 'get_valid_licenses_for_entity_tree') for
+        many entities of the same hierarchies at once: the licenses of all
+        entities and their ancestors are queried just once and assigned to the
+        entities afterwards.
+        :param hierarchy_provider_uri:
+        :param entities: the entities to get the valid licenses for
+        :param hierarchies: a (compiled) hierarchies structure (if not given, the
+            ancestors are taken from the hierarchy store)
+        :return: all valid licenses per entity
+        """
+        if hierarchies is None:
+            ancestors = await self.licensing_repository.get_stored_ancestors(
+                hierarchy_provider_uri, entities
+            )
+        else:
+            ancestors = {
+                entity_: hierarchies.ancestors(entity_) for entity_ in entities
+            }
+        owners = {
+            entity_: ancestors_ | {entity_} for entity_, ancestors_ in ancestors.items()
+        }
+        licenses = await self.licensing_repository.get_valid_licenses_for_entities(
+            hierarchy_provider_uri,
+            list(frozenset().union(*owners.values())),
+            datetime.date.today(),
+        )
+        # check for free seats!
+        licenses_by_owner: Dict[Entity, List[License]] = {}
+        for l_ in licenses:
+            if nof_free_seats(l_.nof_seats, l_.extra_seats, l_.nof_occupied_seats) > 0:
+                for owner_eid in l_.owner_eids:
+                    licenses_by_owner.setdefault(
+                        Entity(type_=l_.owner_type, eid=owner_eid), []
+                    ).append(l_)
+        return {
+            entity_: list(
+                {
+                    l_.id: l_
+                    for owner in owners_
+                    for l_ in licenses_by_owner.get(owner, [])
+                }.values()
+            )
+            for entity_, owners_ in owners.items()
+        }
+
+    async def store_hierarchies(
+        self, hierarchy_provider_uri: str, hierarchies: HierarchyIndex
+    ) -> int:
+        """
+        stores a snapshot of some hierarchies of a hierarchy provider in the
+        hierarchy store, replacing the stored ones of the provider (see
+        'LicensingRepository.replace_hierarchy_snapshot')
+        :param hierarchy_provider_uri:
+        :param hierarchies: a (compiled) hierarchies structure
+        :return: the number of stored ancestor relations
+        """
+        return await self.licensing_repository.replace_hierarchy_snapshot(
+            hierarchy_provider_uri,
+            hierarchies.entities,
+            {
+                entity_: hierarchies.ancestors(entity_)
+                for entity_ in hierarchies.entities
+            },
+        )
+
+    async def get_active_licenses_for_entity_trees(
+        self,
+        hierarchy_provider_uri: str,
+        entities: List[Entity],
+        hierarchies: HierarchyIndex | None = None,
+    ) -> Dict[Entity, License | None]:
+        """
+        gets the 'active license' (see 'get_active_license_for_entity_tree') for
+        many entities of the same hierarchies at once.
+        :param hierarchy_provider_uri:
+        :param entities: the entities to get the active license for
+        :param hierarchies: a (compiled) hierarchies structure (if not given, the
+            ancestors are taken from the hierarchy store)
+        :return: the active license (or None) per entity
+        """
+        return {
+            entity_: min(
+                valid_licenses,
+                key=lambda l_: (
+                    l_.owner_level,
+                    -1
+                    * nof_free_seats(
+                        l_.nof_seats, l_.extra_seats, l_.nof_occupied_seats
+                    ),
+                ),
+                default=None,
+            )
+            for entity_, valid_licenses in (
+                await self.get_valid_licenses_for_entity_trees(
+                    hierarchy_provider_uri, entities, hierarchies
+                )
+            ).items()
+        }
+
     async def get_valid_licenses_for_entity(
         self, hierarchy_provider_uri, entity_type, entity_eid
     ) -> List[License]:
@@ -326,7 +656,9 @@ class LicensingService:
         # check for free seats!
         return list(
             filter(
-                lambda l_: nof_free_seats(l_.nof_seats, l_.extra_seats, len(l_.seats))
+                lambda l_: nof_free_seats(
+                    l_.nof_seats, l_.extra_seats, l_.nof_occupied_seats
+                )
                 > 0,
                 licenses,
             )
@@ -339,9 +671,35 @@ class LicensingService:
         order_by_fields: List[Tuple[str, str]],
         hierarchy_provider_uri: str,
         user_eid: str,
-    ) -> List[License]:
+        with_seats: bool = False,
+        total_mode: TotalMode = TotalMode.EXACT,
+    ) -> Tuple[List[License], int | None]:
         return await self.licensing_repository.get_managed_licenses_paginated(
-            page, page_size, order_by_fields, hierarchy_provider_uri, user_eid
+            page,
+            page_size,
+            order_by_fields,
+            hierarchy_provider_uri,
+            user_eid,
+            with_seats=with_seats,
+            total_mode=total_mode,
+        )
+
+    async def get_managed_licenses_keyset(
+        self,
+        page_size: int,
+        order_by_fields: List[Tuple[str, str]],
+        after: List[Any] | None,
+        hierarchy_provider_uri: str,
+        user_eid: str,
+        with_seats: bool = False,
+    ) -> Tuple[List[License], List[Any] | None]:
+        return await self.licensing_repository.get_managed_licenses_keyset(
+            page_size,
+            order_by_fields,
+            after,
+            hierarchy_provider_uri,
+            user_eid,
+            with_seats=with_seats,
         )
 
     async def get_managed_licenses_by_id(
@@ -349,9 +707,10 @@ class LicensingService:
         license_id: str,
         hierarchy_provider_uri: str,
         user_eid: str,
+        with_seats: bool = False,
     ) -> License:
         return await self.licensing_repository.get_managed_licenses_by_id(
-            license_id, hierarchy_provider_uri, user_eid
+            license_id, hierarchy_provider_uri, user_eid, with_seats=with_seats
         )
 
     async def get_licenses_for_entities_paginated(
@@ -361,9 +720,27 @@ class LicensingService:
         order_by_fields: List[Tuple[str, str]],
         hierarchy_provider_uri: str,
         entities: List[Entity],
-    ) -> Tuple[List[License], int]:
+        total_mode: TotalMode = TotalMode.EXACT,
+    ) -> Tuple[List[License], int | None]:
         return await self.licensing_repository.get_licenses_for_entities_paginated(
-            page, page_size, order_by_fields, hierarchy_provider_uri, entities
+            page,
+            page_size,
+            order_by_fields,
+            hierarchy_provider_uri,
+            entities,
+            total_mode=total_mode,
+        )
+
+    async def get_licenses_for_entities_keyset(
+        self,
+        page_size: int,
+        order_by_fields: List[Tuple[str, str]],
+        after: List[Any] | None,
+        hierarchy_provider_uri: str,
+        entities: List[Entity],
+    ) -> Tuple[List[License], List[Any] | None]:
+        return await self.licensing_repository.get_licenses_for_entities_keyset(
+            page_size, order_by_fields, after, hierarchy_provider_uri, entities
         )
 
     async def get_licenses_paginated(
@@ -373,15 +750,39 @@ class LicensingService:
         order_by_fields: List[Tuple[str, str]],
         filter_restrictions: Dict[str, List[str]],
         allowed_filter_restrictions: List[str],
-        **filters
-    ) -> Tuple[List[License], int]:
+        with_seats: bool = False,
+        total_mode: TotalMode = TotalMode.EXACT,
+        **filters,
+    ) -> Tuple[List[License], int | None]:
         return await self.licensing_repository.get_licenses_paginated(
             page,
             page_size,
             order_by_fields,
             filter_restrictions,
             allowed_filter_restrictions,
-            **filters
+            with_seats=with_seats,
+            total_mode=total_mode,
+            **filters,
+        )
+
+    async def get_licenses_keyset(
+        self,
+        page_size: int,
+        order_by_fields: List[Tuple[str, str]],
+        after: List[Any] | None,
+        filter_restrictions: Dict[str, List[str]],
+        allowed_filter_restrictions: List[str],
+        with_seats: bool = False,
+        **filters,
+    ) -> Tuple[List[License], List[Any] | None]:
+        return await self.licensing_repository.get_licenses_keyset(
+            page_size,
+            order_by_fields,
+            after,
+            filter_restrictions,
+            allowed_filter_restrictions,
+            with_seats=with_seats,
+            **filters,
         )
 
     async def get_license(
@@ -389,9 +790,35 @@ class LicensingService:
         license_uuid: str,
         filter_restrictions: Dict[str, List[str]],
         allowed_filter_restrictions: List[str],
+        archived: bool = False,
+        with_seats: bool = False,
     ) -> License:
         return await self.licensing_repository.get_license(
-            license_uuid, filter_restrictions, allowed_filter_restrictions
+            license_uuid,
+            filter_restrictions,
+            allowed_filter_restrictions,
+            archived,
+            with_seats=with_seats,
+        )
+
+    async def get_license_seats_keyset(
+        self,
+        license_uuid: str,
+        page_size: int,
+        after: List[Any] | None,
+        filter_restrictions: Dict[str, List[str]],
+        allowed_filter_restrictions: List[str],
+        status: SeatStatus | None = None,
+        archived: bool = False,
+    ) -> Tuple[List[Seat], List[Any] | None] | None:
+        return await self.licensing_repository.get_license_seats_keyset(
+            license_uuid,
+            page_size,
+            after,
+            filter_restrictions,
+            allowed_filter_restrictions,
+            status,
+            archived,
         )
 
     async def get_event_log_stats(self) -> Tuple[int, int]:
@@ -408,3 +835,23 @@ class LicensingService:
         await self.licensing_repository.update_event_log(
             event_log_id=event_log_id, **data
         )
+
+    async def get_license_ids(self, after_id: int = 0, limit: int = 1000) -> List[int]:
+        return await self.licensing_repository.get_license_ids(after_id, limit)
+
+    async def recount_occupied_seats(self, license_ids: List[int]) -> Dict[int, int]:
+        return await self.licensing_repository.recount_occupied_seats(license_ids)
+
+    async def archive_released_seats(
+        self, released_before: datetime.datetime, limit: int = 1000
+    ) -> int:
+        return await self.licensing_repository.archive_released_seats(
+            released_before, limit
+        )
+
+    async def archive_expired_licenses(
+        self, expired_before: datetime.date, limit: int = 1000
+    ) -> Tuple[int, int]:
+        return await self.licensing_repository.archive_expired_licenses(
+            expired_before, limit
+        )
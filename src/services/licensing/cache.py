@@ -0,0 +1,232 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Set, Tuple
+
+from services.licensing import settings
+
+
+class TTLCache:
+    """
+    A simple in-process cache with a maximum number of entries (least recently
+    used entries are evicted first) and a 'time to live' per entry.
+    A cache with a 'ttl_secs' of 0 (or less) is disabled: nothing gets cached.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl_secs: float,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl_secs = ttl_secs
+        self.timer = timer
+        self.hits = 0
+        self.misses = 0
+        # key -> (expires at, value)
+        self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_secs > 0 and self.maxsize > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > self.timer()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= self.timer():
+            self.pop(key)
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_secs: float | None = None) -> None:
+        """
+        caches a value for 'ttl_secs' (if given, but at most for the configured
+        'ttl_secs' of the cache)
+        """
+        if not self.enabled:
+            return
+        ttl_secs = self.ttl_secs if ttl_secs is None else min(ttl_secs, self.ttl_secs)
+        if ttl_secs <= 0:
+            return
+        self._entries[key] = (self.timer() + ttl_secs, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self.pop(next(iter(self._entries)))
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class PermissionsCache(TTLCache):
+    """
+    Cache for the accessible products of a user keyed by
+    (hierarchy provider URI, user EID, memberships hash), that is, everything
+    that determines the input of 'LicensingService.get_accessible_products'.
+    Every entry is indexed by the memberships of the user, so entries can be
+    invalidated by license owners: whenever a license changes (or some of its
+    seats get released), all entries of the users being members of one of the
+    license owners are invalidated.
+    Please note: the cache is 'per process', so entries of other processes only
+    get invalid after 'ttl_secs'.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (owner type, owner eid) -> keys of the entries of the members
+        self._keys_by_owner: Dict[Tuple[str, str], Set[Hashable]] = {}
+
+    def set_products(
+        self, key: Hashable, products: List[str], owners: Iterable[Tuple[str, str]]
+    ) -> None:
+        if not self.enabled:
+            return
+        owners = frozenset(owners)
+        self.pop(key)
+        self.set(key, (products, owners))
+        for owner in owners:
+            self._keys_by_owner.setdefault(owner, set()).add(key)
+
+    def get_products(self, key: Hashable) -> List[str] | None:
+        if not self.enabled:
+            return None
+        entry = self.get(key)
+        return entry[0] if entry is not None else None
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = super().pop(key)
+        if entry is None:
+            return default
+        for owner in entry[1]:
+            keys = self._keys_by_owner.get(owner)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_owner[owner]
+        return entry
+
+    def clear(self) -> None:
+        super().clear()
+        self._keys_by_owner.clear()
+
+    def invalidate_owners(self, owner_type: str, owner_eids: Iterable[str]) -> None:
+        """
+        invalidates the entries of all users being members of one of the owners
+        """
+        for owner_eid in owner_eids:
+            for key in list(self._keys_by_owner.get((owner_type, owner_eid), ())):
+                self.pop(key)
+
+
+class LRUCache:
+    """
+    A simple in-process cache bounded by the total 'weight' of its entries
+    (e.g. the number of entities of a compiled hierarchy). Least recently used
+    entries are evicted first. Entries do not expire, so this cache is meant for
+    content addressed entries only.
+    A cache with a 'max_weight' of 0 (or less) is disabled: nothing gets cached.
+    """
+
+    def __init__(self, max_weight: int, weigh: Callable[[Any], int] = lambda _: 1):
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> (weight, value)
+        self._entries: OrderedDict[Hashable, Tuple[int, Any]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_weight > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        weight = self.weigh(value)
+        # entries heavier than the whole cache are not cached at all
+        if not self.enabled or weight > self.max_weight:
+            return
+        self.pop(key)
+        self._entries[key] = (weight, value)
+        self.weight += weight
+        while self.weight > self.max_weight:
+            self.pop(next(iter(self._entries)))
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return default
+        self.weight -= entry[0]
+        return entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.weight = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "weight": self.weight,
+            "max_weight": self.max_weight,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+permissions_cache = PermissionsCache(
+    maxsize=settings.permissions_cache_maxsize,
+    ttl_secs=settings.permissions_cache_ttl_secs,
+)
+
+# totals of paginated listings (see 'data.sqlalchemy.pagination.count_query')
+# keyed by the (compiled) query and its parameters
+count_cache = TTLCache(
+    maxsize=settings.pagination_count_cache_maxsize,
+    ttl_secs=settings.pagination_count_cache_ttl_secs,
+)
+
+# compiled hierarchies (see 'hierarchies.HierarchyIndex') keyed by the hash of
+# the hierarchies payload, weighted by their number of entities. Please note: the
+# memoized ancestors (growing while an index is in use) are not weighed.
+hierarchy_index_cache = LRUCache(
+    max_weight=settings.hierarchy_index_cache_max_entities,
+    weigh=lambda index: max(len(index), 1),
+)
@@ -18,6 +18,10 @@ ALLOWED_LICENSE_ORDER_BY_FIELDS = [
 
 ALLOWED_LICENSE_FILTER_RESTRICTIONS = ["manager_eid"]
 
+# the scope (claim) required for tokens of hierarchy providers accessing the
+# hierarchy store
+HIERARCHY_STORE_SCOPE = "hierarchy_store"
+
 # internal infinity representation
 INFINITE_INT: int = int(1e18)
 
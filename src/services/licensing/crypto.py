@@ -0,0 +1,132 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+from services.licensing import settings
+
+
+def _timed(func: Callable, *args) -> Tuple[Any, float]:
+    """runs a function and returns its result and its execution time in secs"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def _preload_keys() -> None:
+    """
+    initializer of the worker processes: parses all configured keys in advance, so
+    the first requests handled by a new worker do not suffer from a cold key cache.
+    """
+    from services.licensing.keys import key_registry
+    from services.licensing.tokens import get_key_from_pem
+
+    key_registry.load()
+    if settings.licensing_service_private_key:
+        get_key_from_pem(settings.licensing_service_private_key)
+
+
+class CryptoExecutor:
+    """
+    runs (CPU bound) signing and verification of tokens off the event loop.
+    Supported kinds are
+    - 'none': run within the event loop (blocking it)
+    - 'thread': run in a thread pool
+    - 'process': run in a process pool (keys get pre-loaded by every process).
+      Please note: functions, arguments, results and exceptions have to be
+      picklable in this case.
+    """
+
+    def __init__(self, kind: str, max_workers: int):
+        self.kind = kind
+        self.max_workers = max_workers
+        self._executor: Executor | None = None
+        # number of submitted, but not yet finished calls
+        self.pending = 0
+        self.calls = 0
+        self.errors = 0
+        # durations including the time waiting for a free worker
+        self.total_secs = 0.0
+        self.max_secs = 0.0
+        # execution time only (successful calls)
+        self.total_run_secs = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_preload_keys,
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="crypto"
+                )
+        return self._executor
+
+    async def run(self, func: Callable, *args) -> Any:
+        """
+        runs the given function with the given (positional) arguments
+        :return: the result of the function call
+        """
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            if self.kind == "none":
+                result, run_secs = _timed(func, *args)
+            else:
+                result, run_secs = await asyncio.get_running_loop().run_in_executor(
+                    self._get_executor(), _timed, func, *args
+                )
+        except Exception:
+            self.errors += 1
+            raise
+        else:
+            self.total_run_secs += run_secs
+            return result
+        finally:
+            duration = time.perf_counter() - start
+            self.pending -= 1
+            self.calls += 1
+            self.total_secs += duration
+            self.max_secs = max(self.max_secs, duration)
+
+    def restart(self) -> None:
+        """
+        replaces the workers by new ones (e.g. to pick up changed keys), calls
+        already submitted are still finished by the old workers.
+        """
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            executor.shutdown(wait=False)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        successful_calls = self.calls - self.errors
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "pending": self.pending,
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_duration_ms": (
+                self.total_secs / self.calls * 1000 if self.calls else 0.0
+            ),
+            "max_duration_ms": self.max_secs * 1000,
+            "avg_run_duration_ms": (
+                self.total_run_secs / successful_calls * 1000
+                if successful_calls
+                else 0.0
+            ),
+        }
+
+
+crypto_executor = CryptoExecutor(
+    settings.crypto_executor_kind, settings.crypto_executor_max_workers
+)
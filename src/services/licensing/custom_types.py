@@ -27,6 +27,27 @@ class OrderByDirection(enum.Enum):
     DESC = "DESC"
 
 
+class MatchMode(enum.Enum):
+    """
+    how a string filter matches a value
+    """
+
+    CONTAINS = "contains"
+    PREFIX = "prefix"
+    EXACT = "exact"
+
+
+class TotalMode(enum.Enum):
+    """
+    how the total number of items of a paginated listing is determined
+    """
+
+    EXACT = "exact"  # counted with every request
+    ESTIMATED = "estimated"  # the row estimate of the query planner
+    CACHED = "cached"  # counted, but cached per query for some seconds
+    NONE = "none"  # not determined at all
+
+
 @dataclass
 class Entity:
     """
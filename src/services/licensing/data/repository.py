@@ -27,7 +27,7 @@ implementation of the data storage and retrieval operations.
 """
 
 import datetime
-from typing import List, Any, Tuple, Dict
+from typing import List, Any, Tuple, Dict, FrozenSet
 from abc import ABC, abstractmethod
 
 from services.licensing.custom_types import (
@@ -36,6 +36,9 @@ from services.licensing.custom_types import (
     EventLog,
     EventType,
     Entity,
+    Memberships,
+    SeatStatus,
+    TotalMode,
 )
 
 
@@ -57,7 +60,11 @@ class LicensingRepository(ABC):
         pass
 
     @abstractmethod
-    async def delete_license(self, license_uuid: str) -> None:
+    async def occupy_seat(self, **seat_data) -> bool | None:
+        pass
+
+    @abstractmethod
+    async def delete_license(self, license_uuid: str) -> License | None:
         pass
 
     @abstractmethod
@@ -70,6 +77,12 @@ class LicensingRepository(ABC):
     async def update_seats(self, seats: List[Seat]) -> None:
         pass
 
+    @abstractmethod
+    async def update_seats_last_accessed_at(
+        self, accesses: Dict[int, datetime.datetime]
+    ) -> None:
+        pass
+
     @abstractmethod
     async def get_licenses_for_entities_paginated(
         self,
@@ -78,7 +91,21 @@ class LicensingRepository(ABC):
         order_by_fields: List[Tuple[str, str]],
         hierarchy_provider_uri: str,
         entities: List[Entity],
-    ) -> Tuple[List[License], int]:
+        with_seats: bool = False,
+        total_mode: TotalMode = TotalMode.EXACT,
+    ) -> Tuple[List[License], int | None]:
+        pass
+
+    @abstractmethod
+    async def get_licenses_for_entities_keyset(
+        self,
+        page_size: int,
+        order_by_fields: List[Tuple[str, str]],
+        after: List[Any] | None,
+        hierarchy_provider_uri: str,
+        entities: List[Entity],
+        with_seats: bool = False,
+    ) -> Tuple[List[License], List[Any] | None]:
         pass
 
     @abstractmethod
@@ -89,7 +116,21 @@ class LicensingRepository(ABC):
         order_by_fields: List[Tuple[str, str]],
         hierarchy_provider_uri: str,
         user_eid: str,
-    ) -> Tuple[List[License], int]:
+        with_seats: bool = False,
+        total_mode: TotalMode = TotalMode.EXACT,
+    ) -> Tuple[List[License], int | None]:
+        pass
+
+    @abstractmethod
+    async def get_managed_licenses_keyset(
+        self,
+        page_size: int,
+        order_by_fields: List[Tuple[str, str]],
+        after: List[Any] | None,
+        hierarchy_provider_uri: str,
+        user_eid: str,
+        with_seats: bool = False,
+    ) -> Tuple[List[License], List[Any] | None]:
         pass
 
     @abstractmethod
@@ -98,6 +139,7 @@ class LicensingRepository(ABC):
         license_id: str,
         hierarchy_provider_uri: str,
         user_eid: str,
+        with_seats: bool = False,
     ) -> License:
         pass
 
@@ -109,8 +151,23 @@ class LicensingRepository(ABC):
         order_by_fields: List[Tuple[str, str]],
         filter_restrictions: Dict[str, List[str]],
         allowed_filter_restrictions: List[str],
-        **filters
-    ) -> Tuple[List[License], int]:
+        with_seats: bool = False,
+        total_mode: TotalMode = TotalMode.EXACT,
+        **filters,
+    ) -> Tuple[List[License], int | None]:
+        pass
+
+    @abstractmethod
+    async def get_licenses_keyset(
+        self,
+        page_size: int,
+        order_by_fields: List[Tuple[str, str]],
+        after: List[Any] | None,
+        filter_restrictions: Dict[str, List[str]],
+        allowed_filter_restrictions: List[str],
+        with_seats: bool = False,
+        **filters,
+    ) -> Tuple[List[License], List[Any] | None]:
         pass
 
     async def get_license(
@@ -118,15 +175,31 @@ class LicensingRepository(ABC):
         license_uuid: str,
         filter_restrictions: Dict[str, List[str]],
         allowed_filter_restrictions: List[str],
+        archived: bool = False,
+        with_seats: bool = False,
     ) -> License:
         pass
 
+    @abstractmethod
+    async def get_license_seats_keyset(
+        self,
+        license_uuid: str,
+        page_size: int,
+        after: List[Any] | None,
+        filter_restrictions: Dict[str, List[str]],
+        allowed_filter_restrictions: List[str],
+        status: SeatStatus | None = None,
+        archived: bool = False,
+    ) -> Tuple[List[Seat], List[Any] | None] | None:
+        pass
+
     @abstractmethod
     async def get_valid_licenses_for_entities(
         self,
         hierarchy_provider_uri: str,
         entities: List[Entity],
         when: datetime.date,
+        with_seats: bool = False,
     ) -> List[License]:
         pass
 
@@ -134,6 +207,20 @@ class LicensingRepository(ABC):
     async def get_occupied_seats(self, user_eid: str) -> List[Seat]:
         pass
 
+    @abstractmethod
+    async def get_occupied_seats_of_users(self, user_eids: List[str]) -> List[Seat]:
+        pass
+
+    @abstractmethod
+    async def get_occupied_seats_and_candidate_licenses(
+        self,
+        hierarchy_provider_uri: str,
+        user_eid: str,
+        memberships: Memberships,
+        when: datetime.date,
+    ) -> Tuple[List[Seat], List[License]]:
+        pass
+
     async def create_event_log(
         self,
         type_: EventType,
@@ -153,3 +240,38 @@ class LicensingRepository(ABC):
 
     async def update_event_log(self, event_log_id: int, **data) -> None:
         pass
+
+    @abstractmethod
+    async def get_license_ids(self, after_id: int = 0, limit: int = 1000) -> List[int]:
+        pass
+
+    @abstractmethod
+    async def recount_occupied_seats(self, license_ids: List[int]) -> Dict[int, int]:
+        pass
+
+    @abstractmethod
+    async def archive_released_seats(
+        self, released_before: datetime.datetime, limit: int = 1000
+    ) -> int:
+        pass
+
+    @abstractmethod
+    async def archive_expired_licenses(
+        self, expired_before: datetime.date, limit: int = 1000
+    ) -> Tuple[int, int]:
+        pass
+
+    @abstractmethod
+    async def get_stored_ancestors(
+        self, hierarchy_provider_uri: str, entities: List[Entity]
+    ) -> Dict[Entity, FrozenSet[Entity]]:
+        pass
+
+    @abstractmethod
+    async def replace_hierarchy_snapshot(
+        self,
+        hierarchy_provider_uri: str,
+        entities: List[Entity],
+        ancestors: Dict[Entity, FrozenSet[Entity]],
+    ) -> int:
+        pass
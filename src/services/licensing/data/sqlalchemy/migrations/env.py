@@ -28,8 +28,25 @@ target_metadata.naming_convention = {
 from services.licensing.data.sqlalchemy.model.license import (
     LicenseModel,
 )
+from services.licensing.data.sqlalchemy.model.license_owner import LicenseOwnerModel
 from services.licensing.data.sqlalchemy.model.seat import SeatModel
 from services.licensing.data.sqlalchemy.model.event_log import EventLogModel
+from services.licensing.data.sqlalchemy.model.hierarchy import (
+    HierarchyEntityModel,
+    HierarchyAncestorModel,
+)
+from services.licensing.data.sqlalchemy.model.archive import (
+    LicenseArchiveModel,
+    SeatArchiveModel,
+)
+
+
+def include_object(object_, name, type_, reflected, compare_to):
+    """
+    the (optional) trigram indexes are not part of the model, see migration
+    'a9d4c2e7f5b3_trigram_indexes'
+    """
+    return not (type_ == "index" and reflected and name.endswith("_trgm"))
 
 
 def run_migrations_offline() -> None:
@@ -37,6 +54,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -80,7 +98,11 @@ async def run_async_migrations(connectable):
 
 
 def do_run_migrations(connection):
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,74 @@
+"""trigram indexes
+
+Revision ID: a9d4c2e7f5b3
+Revises: f7c2d9e4a8b1
+Create Date: 2026-10-18 19:21:07.284613
+
+"""
+
+import logging
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a9d4c2e7f5b3"
+down_revision = "f7c2d9e4a8b1"
+branch_labels = None
+depends_on = None
+
+
+# RSC Custom code BEGIN
+# (the logger of alembic's migration runs, see 'alembic.ini')
+logger = logging.getLogger("alembic.runtime.migration")
+
+# GIN trigram indexes for the substring and prefix filters of the admin license
+# search (LIKE '%...%', LIKE '...%'). These indexes are not part of the model
+# (see 'include_object' in env.py), because 'pg_trgm' is optional: if it is not
+# available, the migration just skips them (and the filters scan the tables).
+TRIGRAM_INDEXES = [
+    ("ix_license_product_eid_trgm", "license", "product_eid"),
+    ("ix_license_manager_eid_trgm", "license", "manager_eid"),
+    # the unnested 'owner_eids' of the licenses
+    ("ix_license_owner_owner_eid_trgm", "license_owner", "owner_eid"),
+]
+
+
+def is_pg_trgm_available() -> bool:
+    return (
+        op.get_bind()
+        .execute(
+            sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        )
+        .scalar()
+        is not None
+    )
+
+
+def upgrade() -> None:
+    # (offline, the SQL is generated unconditionally)
+    if not context.is_offline_mode() and not is_pg_trgm_available():
+        logger.warning(
+            "Extension 'pg_trgm' is not available, trigram indexes are skipped"
+        )
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for index_name, table_name, column_name in TRIGRAM_INDEXES:
+        op.create_index(
+            index_name,
+            table_name,
+            [column_name],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={column_name: "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    # the extension is kept, it might be in use elsewhere
+    for index_name, table_name, _ in TRIGRAM_INDEXES:
+        op.drop_index(index_name, table_name=table_name, if_exists=True)
+
+
+# RSC Custom code END
@@ -0,0 +1,98 @@
+import datetime
+import uuid as uuid_module
+from typing import List, Optional
+
+from sqlalchemy import Index, String
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from services.licensing.constants import INFINITE_INT_JSON
+from services.licensing.custom_types import License, Seat, SeatStatus
+from services.licensing.data.sqlalchemy.model.base import Model, UtcNow, int8
+from services.licensing.utils import nof_free_seats
+
+#
+# The archive ('cold') tables for released seats and long expired licenses (see
+# 'maintenance.archive'). Rows are moved there with their IDs and all columns of
+# the 'hot' tables, so the column names have to match the ones of 'SeatModel'
+# and 'LicenseModel'. Archived rows are only read by the admin API on request.
+#
+
+
+class LicenseArchiveModel(Model):
+    __tablename__ = "license_archive"
+
+    uuid: Mapped[uuid_module.UUID] = mapped_column(UUID(as_uuid=True), index=True)
+    hierarchy_provider_uri: Mapped[str] = mapped_column(String(256))
+    product_eid: Mapped[str] = mapped_column(String(256))
+    manager_eid: Mapped[str] = mapped_column(String(256))
+    owner_type: Mapped[str] = mapped_column(String(256))
+    owner_level: Mapped[int]
+    owner_eids: Mapped[List[str]] = mapped_column(ARRAY(String(255)))
+    valid_from: Mapped[datetime.date]
+    valid_to: Mapped[datetime.date]
+    nof_seats: Mapped[int]
+    extra_seats: Mapped[int]
+    order_id: Mapped[str | None] = mapped_column(String(256))
+    is_trial: Mapped[bool]
+    notes: Mapped[str] = mapped_column(String(4096), nullable=True)
+    nof_occupied_seats: Mapped[int] = mapped_column(default=0, server_default="0")
+    archived_at: Mapped[datetime.datetime] = mapped_column(server_default=UtcNow())
+
+    def to_dto(self) -> License:
+        return License(
+            id=self.id,
+            uuid=self.uuid,
+            hierarchy_provider_uri=self.hierarchy_provider_uri,
+            product_eid=self.product_eid,
+            manager_eid=self.manager_eid,
+            owner_type=self.owner_type,
+            owner_level=self.owner_level,
+            owner_eids=self.owner_eids,
+            valid_from=self.valid_from,
+            valid_to=self.valid_to,
+            nof_seats=self.nof_seats,
+            nof_free_seats=(
+                nof_free_seats(self.nof_seats, 0, self.nof_occupied_seats)
+                if self.nof_seats != INFINITE_INT_JSON
+                else INFINITE_INT_JSON
+            ),
+            nof_occupied_seats=self.nof_occupied_seats,
+            extra_seats=self.extra_seats,
+            is_trial=self.is_trial,
+            notes=self.notes,
+            # the archived seats are listed separately (see 'seat_archive')
+            seats=None,
+            released_seats=None,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+        )
+
+
+class SeatArchiveModel(Model):
+    __tablename__ = "seat_archive"
+
+    # no foreign key: the license is either 'hot' or archived itself
+    ref_license: Mapped[int8]
+    user_eid: Mapped[str] = mapped_column(String(256))
+    occupied_at: Mapped[datetime.datetime]
+    last_accessed_at: Mapped[Optional[datetime.datetime]]
+    is_occupied: Mapped[bool]
+    status: Mapped[SeatStatus]
+    archived_at: Mapped[datetime.datetime] = mapped_column(server_default=UtcNow())
+
+    __table_args__ = (
+        # the archived seats of a license ordered by ID (keyset pagination)
+        Index("ix_seat_archive_ref_license_id", "ref_license", "id"),
+    )
+
+    def to_dto(self) -> Seat:
+        return Seat(
+            id=self.id,
+            user_eid=self.user_eid,
+            occupied_at=self.occupied_at,
+            last_accessed_at=self.last_accessed_at,
+            is_occupied=self.is_occupied,
+            status=self.status,
+            license=None,
+        )
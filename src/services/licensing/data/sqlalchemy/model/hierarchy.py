@@ -0,0 +1,53 @@
+from typing import Optional
+
+from sqlalchemy import String, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from services.licensing.custom_types import Entity
+from services.licensing.data.sqlalchemy.model.base import Model, int8
+
+
+class HierarchyEntityModel(Model):
+    """
+    an entity of some stored hierarchy (see 'hierarchy store')
+    """
+
+    __tablename__ = "hierarchy_entity"
+
+    # columns
+    hierarchy_provider_uri: Mapped[str] = mapped_column(String(256))
+    entity_type: Mapped[str] = mapped_column(String(256))
+    entity_eid: Mapped[str] = mapped_column(String(256))
+    level: Mapped[Optional[int]] = mapped_column()
+    name: Mapped[Optional[str]] = mapped_column(String(256))
+
+    __table_args__ = (
+        UniqueConstraint("hierarchy_provider_uri", "entity_type", "entity_eid"),
+    )
+
+    def to_dto(self) -> Entity:
+        return Entity(
+            type_=self.entity_type,
+            eid=self.entity_eid,
+            level=self.level,
+            name=self.name,
+        )
+
+
+class HierarchyAncestorModel(Model):
+    """
+    the 'closure table' of the stored hierarchies: one row per entity and each
+    of its ancestors
+    """
+
+    __tablename__ = "hierarchy_ancestor"
+
+    # columns
+    ref_entity: Mapped[int8] = mapped_column(
+        ForeignKey("hierarchy_entity.id", ondelete="CASCADE")
+    )
+    ref_ancestor: Mapped[int8] = mapped_column(
+        ForeignKey("hierarchy_entity.id", ondelete="CASCADE"), index=True
+    )
+
+    __table_args__ = (UniqueConstraint("ref_entity", "ref_ancestor"),)
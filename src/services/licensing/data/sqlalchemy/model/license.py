@@ -2,13 +2,14 @@ import datetime
 import uuid as uuid_module
 from typing import List
 
-from sqlalchemy import String, UniqueConstraint, select, func
+from sqlalchemy import Index, String, UniqueConstraint
 from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from services.licensing.constants import INFINITE_INT_JSON
 from services.licensing.custom_types import License
-from services.licensing.data.sqlalchemy.model.base import Model, BaseModel
+from services.licensing.data.sqlalchemy.model.base import Model
+from services.licensing.data.sqlalchemy.model.license_owner import LicenseOwnerModel
 from services.licensing.data.sqlalchemy.model.seat import SeatModel
 from services.licensing.utils import nof_free_seats
 
@@ -22,7 +23,8 @@ class LicenseModel(Model):
     manager_eid: Mapped[str] = mapped_column(String(256), index=True)
     owner_type: Mapped[str] = mapped_column(String(256), index=True)
     owner_level: Mapped[int] = mapped_column(index=True)
-    owner_eids: Mapped[List[str]] = mapped_column(ARRAY(String(255)), index=True)
+    # GIN indexed (see below) for array overlap queries ('owner_eids && ARRAY[...]')
+    owner_eids: Mapped[List[str]] = mapped_column(ARRAY(String(255)))
     valid_from: Mapped[datetime.date] = mapped_column(index=True)
     valid_to: Mapped[datetime.date] = mapped_column(index=True)
     nof_seats: Mapped[int]
@@ -30,6 +32,9 @@ class LicenseModel(Model):
     order_id: Mapped[str | None] = mapped_column(String(256), index=True)
     is_trial: Mapped[bool] = mapped_column(index=True)
     notes: Mapped[str] = mapped_column(String(4096), nullable=True)
+    # denormalized number of 'occupied' seats, kept up to date by the repository
+    # whenever seats get occupied or released (see also 'reconcile_seats')
+    nof_occupied_seats: Mapped[int] = mapped_column(default=0, server_default="0")
 
     # Relationships
     # as 'seats' we only list 'occupied' seats, that means
@@ -51,6 +56,10 @@ class LicenseModel(Model):
         "SeatModel.is_occupied==False)",
         viewonly=True,
     )
+    # the owners as rows (written only, see 'LICENSE_OWNERS_STORAGE')
+    owners: Mapped[List[LicenseOwnerModel]] = relationship(
+        lazy="raise", passive_deletes=True
+    )
 
     __table_args__ = (
         UniqueConstraint(
@@ -62,10 +71,13 @@ class LicenseModel(Model):
             "valid_from",
             "valid_to",
         ),
+        Index("ix_license_owner_eids", "owner_eids", postgresql_using="gin"),
     )
 
     def to_dto(self, with_seats=True) -> License:
-        nof_occupied_seats = len(self.seats) if with_seats else None
+        """
+        :param with_seats: include the (eagerly loaded!) seat lists
+        """
         return License(
             id=self.id,
             uuid=self.uuid,
@@ -80,11 +92,11 @@ class LicenseModel(Model):
             nof_seats=self.nof_seats,
             # for API response we ignore extra-seats
             nof_free_seats=(
-                nof_free_seats(self.nof_seats, 0, nof_occupied_seats)
+                nof_free_seats(self.nof_seats, 0, self.nof_occupied_seats)
                 if self.nof_seats != INFINITE_INT_JSON
                 else INFINITE_INT_JSON
             ),
-            nof_occupied_seats=nof_occupied_seats,
+            nof_occupied_seats=self.nof_occupied_seats,
             extra_seats=self.extra_seats,
             is_trial=self.is_trial,
             notes=self.notes,
@@ -95,26 +107,3 @@ class LicenseModel(Model):
             created_at=self.created_at,
             updated_at=self.updated_at,
         )
-
-
-class LicensesUnnestedOwnersModel(BaseModel):
-    """
-    Just a query representing all unnested (by owner) licenses:
-    For example, a license with
-        id=1 and owner_eids={3,4,5}
-    would be transformed to (3 rows)
-        id=1, owner_eid=3
-        id=1, owner_eid=4
-        id=1, owner_eid=5
-    """
-
-    unnested = select(
-        LicenseModel.id,
-        func.unnest(LicenseModel.owner_eids).label("owner_eid"),
-    ).subquery()
-
-    __table__ = (
-        select(LicenseModel, unnested.c.owner_eid)
-        .join(unnested, unnested.c.id == LicenseModel.id)
-        .subquery()
-    )
@@ -0,0 +1,40 @@
+import datetime
+
+from sqlalchemy import String, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from services.licensing.data.sqlalchemy.model.base import Model, int8
+
+
+class LicenseOwnerModel(Model):
+    """
+    the owners of the licenses 'normalized' to one row per license and owner EID
+    (see 'LICENSE_OWNERS_STORAGE'). Kept in sync with the 'owner_eids' (and the
+    validity) of the licenses by the repository.
+    """
+
+    __tablename__ = "license_owner"
+
+    # columns
+    ref_license: Mapped[int8] = mapped_column(
+        ForeignKey("license.id", ondelete="CASCADE")
+    )
+    hierarchy_provider_uri: Mapped[str] = mapped_column(String(256))
+    owner_type: Mapped[str] = mapped_column(String(256))
+    owner_eid: Mapped[str] = mapped_column(String(255))
+    valid_from: Mapped[datetime.date]
+    valid_to: Mapped[datetime.date]
+
+    __table_args__ = (
+        UniqueConstraint("ref_license", "owner_eid"),
+        # covering index: license lookups by owners are index only scans
+        Index(
+            "ix_license_owner_lookup",
+            "hierarchy_provider_uri",
+            "owner_type",
+            "owner_eid",
+            "valid_from",
+            "valid_to",
+            postgresql_include=["ref_license"],
+        ),
+    )
@@ -1,7 +1,7 @@
 import datetime
 from typing import Optional
 
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import String, ForeignKey, Index, true
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from services.licensing.data.sqlalchemy.model.base import Model, int8
@@ -12,7 +12,7 @@ class SeatModel(Model):
     __tablename__ = "seat"
 
     # columns
-    ref_license: Mapped[int8] = mapped_column(ForeignKey("license.id"), index=True)
+    ref_license: Mapped[int8] = mapped_column(ForeignKey("license.id"))
     user_eid: Mapped[str] = mapped_column(String(256), index=True)
     occupied_at: Mapped[datetime.datetime] = mapped_column(index=True)
     last_accessed_at: Mapped[Optional[datetime.datetime]] = mapped_column(index=True)
@@ -24,6 +24,19 @@ class SeatModel(Model):
         back_populates="seats", lazy="raise"
     )
 
+    __table_args__ = (
+        # the seats of a license ordered by ID (keyset pagination)
+        Index("ix_seat_ref_license_id", "ref_license", "id"),
+        # a user can occupy (at most) one seat per license
+        Index(
+            "ix_seat_ref_license_user_eid_occupied",
+            "ref_license",
+            "user_eid",
+            unique=True,
+            postgresql_where=is_occupied == true(),
+        ),
+    )
+
     def to_dto(self, with_license=False) -> Seat:
         return Seat(
             id=self.id,
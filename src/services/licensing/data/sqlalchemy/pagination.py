@@ -1,16 +1,213 @@
-from typing import Any
+import datetime
+import json
+import uuid
+from typing import Any, List, Tuple
 
-from sqlalchemy import Select, select, func
+from fastapi import status as http_status
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    and_,
+    or_,
+    select,
+    func,
+    literal,
+    tuple_,
+)
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import InstrumentedAttribute
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from services.licensing.cache import count_cache
+from services.licensing.custom_types import OrderByDirection, TotalMode
+from services.licensing.exceptions import HTTPException
+
+
+class Explain(Executable, ClauseElement):
+    """the (JSON formatted) plan of a query, the query itself is not executed"""
+
+    inherit_cache = False
+
+    def __init__(self, stmt: Select):
+        self.stmt = stmt
+
+
+@compiles(Explain, "postgresql")
+def pg_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.stmt, **kw)
+
+
+async def count_query(
+    session: AsyncSession,
+    stmt: Select,
+    total_mode: TotalMode = TotalMode.EXACT,
+    cache_key: Tuple | None = None,
+) -> int | None:
+    """
+    the total number of rows of a query, depending on the total mode:
+    - EXACT: counted
+    - ESTIMATED: the row estimate of the query planner (no rows are read)
+    - CACHED: counted, but cached (per query and parameters) for
+      'PAGINATION_COUNT_CACHE_TTL_SECS', so the total may be slightly outdated
+    - NONE: None
+    :param cache_key: the key to cache the total by (CACHED), e.g. built from the
+        filter arguments of the query. Has to be given for queries with volatile
+        parameters (like the current time), the compiled query is used otherwise.
+    """
+    if total_mode == TotalMode.NONE:
+        return None
+    if total_mode == TotalMode.ESTIMATED:
+        plan = (await session.execute(Explain(stmt))).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    count_stmt = select(func.count()).select_from(stmt)
+    if total_mode != TotalMode.CACHED or not count_cache.enabled:
+        return (await session.execute(count_stmt)).scalar()
+    if cache_key is None:
+        compiled = count_stmt.compile(dialect=session.get_bind().dialect)
+        cache_key = (str(compiled), repr(sorted(compiled.params.items())))
+    total = count_cache.get(cache_key)
+    if total is None:
+        total = (await session.execute(count_stmt)).scalar()
+        count_cache.set(cache_key, total)
+    return total
 
 
 async def execute_paginated_query(
-    session: AsyncSession, stmt: Select, page: int, page_size: int
+    session: AsyncSession,
+    stmt: Select,
+    page: int,
+    page_size: int,
+    total_mode: TotalMode = TotalMode.EXACT,
+    cache_key: Tuple | None = None,
 ) -> Any:
-    total = (await session.execute(select(func.count()).select_from(stmt))).scalar()
+    """
+    gets a page of the items of a query (OFFSET pagination)
+    :param total_mode: how the total number of items is determined (see
+        'count_query'), it is None for TotalMode.NONE
+    :param cache_key: the key to cache the total by (see 'count_query')
+    :return: a tuple with (the items of the page, the total number of items)
+    """
     items = (
         (await session.execute(stmt.offset((page - 1) * page_size).limit(page_size)))
         .scalars()
         .all()
     )
+    total = await count_query(session, stmt, total_mode, cache_key)
+    if total is not None and total_mode != TotalMode.EXACT:
+        # an estimated (or outdated) total must not contradict the page itself
+        total = max(total, (page - 1) * page_size + len(items))
     return items, total
+
+
+def keyset_value(column: InstrumentedAttribute, value: Any) -> Any:
+    """
+    helper: converts a (JSON) value of a keyset back to the type of its column
+    :raises: 400, if the value does not match the column
+    """
+    python_type = column.type.python_type
+    try:
+        if value is None or isinstance(value, python_type):
+            return value
+        if python_type in (datetime.date, datetime.datetime):
+            return python_type.fromisoformat(value)
+        if python_type is uuid.UUID:
+            return uuid.UUID(value)
+        raise TypeError(f"{value!r} is not of type {python_type.__name__}")
+    except (TypeError, ValueError) as e:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            message="Invalid cursor",
+            field=column.key,
+            error=str(e),
+        )
+
+
+def keyset_condition(
+    order_by_columns: List[Tuple[InstrumentedAttribute, OrderByDirection]],
+    keys: List[Any],
+) -> ColumnElement[bool]:
+    """
+    helper: the condition for all rows 'behind' the row with the given keys (the
+    values of the order by columns). Uses a row value comparison, if all columns
+    are ordered in the same direction (which can be served by a composite index),
+    an equivalent disjunction otherwise:
+        (c1 > k1) OR (c1 = k1 AND c2 < k2) OR ...
+    """
+
+    def behind(column, direction, key):
+        return column < key if direction == OrderByDirection.DESC else column > key
+
+    # (typed) literals: booleans can not be compared with Python's True/False
+    keys = [literal(k_, c_.type) for (c_, _), k_ in zip(order_by_columns, keys)]
+    directions = {d_ for _, d_ in order_by_columns}
+    if len(directions) == 1:
+        return behind(
+            tuple_(*[c_ for c_, _ in order_by_columns]),
+            directions.pop(),
+            tuple_(*keys),
+        )
+    return or_(
+        *[
+            and_(
+                *[c_ == k_ for (c_, _), k_ in zip(order_by_columns[:i], keys[:i])],
+                behind(*order_by_columns[i], keys[i]),
+            )
+            for i in range(len(order_by_columns))
+        ]
+    )
+
+
+async def execute_keyset_query(
+    session: AsyncSession,
+    stmt: Select,
+    order_by_columns: List[Tuple[InstrumentedAttribute, OrderByDirection]],
+    after: List[Any] | None,
+    page_size: int,
+) -> Tuple[List[Any], List[Any] | None]:
+    """
+    keyset ('cursor') pagination: gets the next page of items behind the item with
+    the given keys (the values of its order by columns) instead of skipping the
+    items of all former pages (OFFSET), so deep pages are as fast as the first.
+    Please note: the order by columns must not be NULL and have to identify an
+    item uniquely (e.g. by ending with the primary key).
+    :param stmt: the (unordered) query
+    :param order_by_columns: the columns (and directions) to order by
+    :param after: the keys of the last item of the former page (None: first page)
+    :param page_size:
+    :return: the items of the page and the keys of the last item (None, if there
+        are no more items)
+    """
+    if after is not None:
+        if len(after) != len(order_by_columns):
+            raise HTTPException(
+                status_code=http_status.HTTP_400_BAD_REQUEST,
+                message="Invalid cursor",
+            )
+        stmt = stmt.where(
+            keyset_condition(
+                order_by_columns,
+                [keyset_value(c_, k_) for (c_, _), k_ in zip(order_by_columns, after)],
+            )
+        )
+    items = (
+        (
+            await session.execute(
+                stmt.order_by(
+                    *[
+                        c_.desc() if d_ == OrderByDirection.DESC else c_
+                        for c_, d_ in order_by_columns
+                    ]
+                ).limit(page_size + 1)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    return items, [getattr(items[-1], c_.key) for c_, _ in order_by_columns]
@@ -1,5 +1,6 @@
 import datetime
-from typing import List, Tuple, Dict, Any
+from collections import Counter
+from typing import List, Tuple, Dict, Any, FrozenSet, Iterator
 
 from fastapi import status as http_status
 from sqlalchemy import (
@@ -8,18 +9,30 @@ from sqlalchemy import (
     update,
     text,
     Select,
+    Update,
     or_,
     func,
     false,
     and_,
     true,
     case,
-    distinct,
     delete,
+    union,
+    literal,
+    BigInteger,
+    bindparam,
+    ColumnElement,
+    Executable,
+    cast,
+    exists,
+    Insert,
 )
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
+from services.licensing import settings
+from services.licensing.constants import INFINITE_INT
 from services.licensing.custom_types import (
     Seat,
     License,
@@ -28,22 +41,67 @@ from services.licensing.custom_types import (
     EventLog,
     EventType,
     SeatStatus,
+    Memberships,
+    MatchMode,
+    TotalMode,
 )
 from services.licensing.data.repository import LicensingRepository
+from services.licensing.data.sqlalchemy.model.archive import (
+    LicenseArchiveModel,
+    SeatArchiveModel,
+)
 from services.licensing.data.sqlalchemy.model.event_log import EventLogModel
-from services.licensing.data.sqlalchemy.model.license import (
-    LicenseModel,
-    LicensesUnnestedOwnersModel,
+from services.licensing.data.sqlalchemy.model.hierarchy import (
+    HierarchyAncestorModel,
+    HierarchyEntityModel,
 )
+from services.licensing.data.sqlalchemy.model.license import LicenseModel
+from services.licensing.data.sqlalchemy.model.license_owner import LicenseOwnerModel
 from services.licensing.data.sqlalchemy.model.seat import SeatModel
-from services.licensing.data.sqlalchemy.pagination import execute_paginated_query
+from services.licensing.data.sqlalchemy.pagination import (
+    execute_keyset_query,
+    execute_paginated_query,
+)
 from services.licensing.exceptions import HTTPException
 
 
+# the license fields copied to the 'license_owner' table
+LICENSE_OWNER_FIELDS = {
+    "hierarchy_provider_uri",
+    "owner_type",
+    "owner_eids",
+    "valid_from",
+    "valid_to",
+}
+
+
+def chunks(items: List, size: int) -> Iterator[List]:
+    """helper: splits a list into chunks of a given size (the last may be smaller)"""
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def match_condition(
+    column: Any, value: str, match_mode: MatchMode = MatchMode.CONTAINS
+) -> ColumnElement[bool]:
+    """
+    helper: a string column matching a value: containing it (LIKE '%value%'),
+    starting with it (LIKE 'value%') or being equal to it. Substring and prefix
+    matches can be served by the trigram indexes (if 'pg_trgm' is available),
+    exact matches by the btree indexes.
+    """
+    if match_mode == MatchMode.EXACT:
+        return column == value
+    if match_mode == MatchMode.PREFIX:
+        return column.startswith(value, autoescape=True)
+    return column.contains(value)
+
+
 def apply_filter_restrictions(
     query: Select,
     filter_restrictions: Dict[str, List[str]],
     allowed_filter_restrictions: List[str],
+    model: Any = LicenseModel,
 ):
     """
     We have introduced some additional security mechanism for admin routes
@@ -55,16 +113,28 @@ def apply_filter_restrictions(
     This function interprets the 'filter restrictions' like so: A given license
     passes the function with 'True' in the example case above, if and only if
     it has a 'manager_eid' like '*DE_bettermarks*' OR '*DE_test*'.
+    Instead of a list, the values may be given with an explicit match mode (see
+    'MatchMode'), e.g. {"manager_eid": {"exact": ["DE_bettermarks"]}}.
     :param query: the query to apply the filters to
     :param filter_restrictions: see above
     :param allowed_filter_restrictions: list of allowed filter restrictions to apply
+    :param model: the license model to filter (e.g. the archived licenses)
     :return: the modified query
     :raise: HttpException, if filter_restrictions is malformed or not allowed
     """
     filtered_query = query
+    match_modes = {m_.value: m_ for m_ in MatchMode}
     for f_key, f_values in filter_restrictions.items():
+        match_mode = MatchMode.CONTAINS
+        if isinstance(f_values, dict) and len(f_values) == 1:
+            mode, f_values = next(iter(f_values.items()))
+            match_mode = match_modes.get(mode)
         # only lists allowed ...
-        if not isinstance(f_values, list) or f_key not in allowed_filter_restrictions:
+        if (
+            not isinstance(f_values, list)
+            or match_mode is None
+            or f_key not in allowed_filter_restrictions
+        ):
             raise HTTPException(
                 status_code=http_status.HTTP_400_BAD_REQUEST,
                 message=(
@@ -76,7 +146,7 @@ def apply_filter_restrictions(
         filtered_query = filtered_query.where(
             or_(
                 *[
-                    getattr(LicenseModel, f_key).contains(f_value)
+                    match_condition(getattr(model, f_key), f_value, match_mode)
                     for f_value in f_values
                 ]
             )
@@ -84,6 +154,411 @@ def apply_filter_restrictions(
     return filtered_query
 
 
+def nof_occupied_seats_query():
+    """
+    helper: a (correlated) scalar subquery counting the occupied seats of the
+    license given by the enclosing query.
+    """
+    return (
+        select(func.count(SeatModel.id))
+        .where(
+            SeatModel.ref_license == LicenseModel.id, SeatModel.is_occupied == true()
+        )
+        .correlate(LicenseModel)
+        .scalar_subquery()
+    )
+
+
+def nof_free_seats_expression(nof_seats, extra_seats, nof_occupied_seats):
+    """
+    helper: the SQL counterpart of 'utils.nof_free_seats' (with INFINITE_INT for
+    licenses with an infinite number of seats).
+    """
+    return case(
+        (nof_seats < 0, literal(INFINITE_INT, BigInteger)),
+        else_=func.greatest(nof_seats + extra_seats - nof_occupied_seats, 0),
+    )
+
+
+def order_by_clauses(order_by_fields: List[Tuple[str, OrderByDirection]]) -> List:
+    """helper: the order by clauses of the licenses for some order by fields"""
+    return [
+        (
+            getattr(LicenseModel, field).desc()
+            if dir_ == OrderByDirection.DESC
+            else getattr(LicenseModel, field)
+        )
+        for field, dir_ in order_by_fields
+    ]
+
+
+def keyset_order_by_columns(
+    order_by_fields: List[Tuple[str, OrderByDirection]],
+) -> List[Tuple[Any, OrderByDirection]]:
+    """
+    helper: the order by columns of the licenses for keyset pagination, that is,
+    the columns of the order by fields followed by the id (to identify a license)
+    """
+    return [(getattr(LicenseModel, field), dir_) for field, dir_ in order_by_fields] + (
+        []
+        if "id" in dict(order_by_fields)
+        else [(LicenseModel.id, OrderByDirection.ASC)]
+    )
+
+
+def select_licenses(with_seats: bool) -> Select:
+    """
+    helper: the base query for licenses. Either with eagerly loaded seat lists
+    (with_seats) or 'count only', that is, with the number of occupied seats
+    (a column of the license) only. No seat gets loaded at all then.
+    """
+    if with_seats:
+        return (
+            select(LicenseModel)
+            .options(selectinload(LicenseModel.seats))
+            .options(selectinload(LicenseModel.released_seats))
+        )
+    return select(LicenseModel)
+
+
+def recount_occupied_seats_query(license_ids: List[int] | Select) -> Update:
+    """
+    helper: an update statement, that recounts the occupied seats of the given
+    licenses and repairs 'nof_occupied_seats' where it differs. Only licenses
+    with a differing number are updated (and therefore locked) and returned
+    as (id, nof_occupied_seats) tuples.
+    """
+    nof_occupied_seats = nof_occupied_seats_query()
+    return (
+        update(LicenseModel)
+        .where(
+            LicenseModel.id.in_(license_ids),
+            LicenseModel.nof_occupied_seats.is_distinct_from(nof_occupied_seats),
+        )
+        # a recount is no license update, so keep 'updated_at' untouched
+        .values(
+            nof_occupied_seats=nof_occupied_seats, updated_at=LicenseModel.updated_at
+        )
+        .returning(LicenseModel.id, LicenseModel.nof_occupied_seats)
+    )
+
+
+def archive_rows_query(
+    model: Any, archive_model: Any, condition: ColumnElement[bool]
+) -> Insert:
+    """
+    helper: a statement moving all rows matching a condition from a table to its
+    archive table in one go (a DELETE ... RETURNING within the INSERT):
+
+        WITH moved AS (DELETE FROM seat WHERE ... RETURNING ...)
+        INSERT INTO seat_archive (...) SELECT ... FROM moved RETURNING id
+    """
+    columns = [c_.name for c_ in model.__table__.columns]
+    moved = (
+        delete(model).where(condition).returning(*model.__table__.columns).cte("moved")
+    )
+    return (
+        insert(archive_model)
+        .from_select(columns, select(*[moved.c[c_] for c_ in columns]))
+        .add_cte(moved)
+        .returning(archive_model.id)
+    )
+
+
+def owned_by_entities(entities: List[Entity]) -> ColumnElement[bool]:
+    """
+    helper: a condition for all licenses, that are owned by at least one of the
+    given entities. The owner EIDs are grouped by owner type and matched by array
+    overlap ('owner_eids && ARRAY[...]'), which is served by the GIN index on
+    'owner_eids' (instead of unnesting the owners of all licenses).
+    """
+    owner_eids: Dict[str, List[str]] = {}
+    for e_ in entities:
+        owner_eids.setdefault(e_.type_, []).append(e_.eid)
+    if not owner_eids:
+        return false()
+    return or_(
+        *[
+            and_(
+                LicenseModel.owner_type == owner_type,
+                LicenseModel.owner_eids.overlap(
+                    cast(eids, LicenseModel.owner_eids.type)
+                ),
+            )
+            for owner_type, eids in owner_eids.items()
+        ]
+    )
+
+
+def owned_by_entities_from_table(
+    entities: List[Entity],
+    hierarchy_provider_uri: str | None = None,
+    when: datetime.date | None = None,
+) -> ColumnElement[bool]:
+    """
+    helper: like 'owned_by_entities' (optionally restricted to a hierarchy provider
+    and a date), but using the 'license_owner' table: a semi join served by an
+    index only scan of its covering index.
+    """
+    return LicenseModel.id.in_(
+        select(LicenseOwnerModel.ref_license).where(
+            (
+                LicenseOwnerModel.hierarchy_provider_uri == hierarchy_provider_uri
+                if hierarchy_provider_uri
+                else true()
+            ),
+            tuple_(LicenseOwnerModel.owner_type, LicenseOwnerModel.owner_eid).in_(
+                [(e_.type_, e_.eid) for e_ in entities]
+            ),
+            LicenseOwnerModel.valid_from <= when if when else true(),
+            LicenseOwnerModel.valid_to >= when if when else true(),
+        )
+    )
+
+
+def licenses_owned_by(
+    entities: List[Entity],
+    hierarchy_provider_uri: str | None = None,
+    when: datetime.date | None = None,
+) -> ColumnElement[bool]:
+    """
+    helper: a condition for all licenses, that are owned by at least one of the
+    given entities. Optionally restricted to a hierarchy provider and to licenses,
+    that are valid at a given date (when). Depending on 'LICENSE_OWNERS_STORAGE'
+    the owners are taken from the licenses or from the 'license_owner' table.
+    """
+    if not entities:
+        return false()
+    if settings.license_owners_storage == "table":
+        return owned_by_entities_from_table(entities, hierarchy_provider_uri, when)
+    return and_(
+        (
+            LicenseModel.hierarchy_provider_uri == hierarchy_provider_uri
+            if hierarchy_provider_uri
+            else true()
+        ),
+        LicenseModel.valid_from <= when if when else true(),
+        LicenseModel.valid_to >= when if when else true(),
+        owned_by_entities(entities),
+    )
+
+
+def has_owner_eid_matching(
+    owner_eid: str, match_mode: MatchMode = MatchMode.CONTAINS
+) -> ColumnElement[bool]:
+    """
+    helper: a condition for all licenses with at least one owner EID matching the
+    given one. A semi join (EXISTS), so a license is neither multiplied by its
+    number of owners nor has to be made distinct again. Depending on
+    'LICENSE_OWNERS_STORAGE' the owner EIDs of the license are unnested or taken
+    from the (trigram indexed) 'license_owner' table.
+    """
+    if settings.license_owners_storage == "table":
+        return exists().where(
+            LicenseOwnerModel.ref_license == LicenseModel.id,
+            match_condition(LicenseOwnerModel.owner_eid, owner_eid, match_mode),
+        )
+    owner_eids = (
+        func.unnest(LicenseModel.owner_eids).table_valued("owner_eid").render_derived()
+    )
+    return (
+        exists()
+        .select_from(owner_eids)
+        .where(match_condition(owner_eids.c.owner_eid, owner_eid, match_mode))
+    )
+
+
+def licenses_owned_by_entities(
+    entities: List[Entity],
+    hierarchy_provider_uri: str | None = None,
+    when: datetime.date | None = None,
+) -> Select:
+    """
+    helper: a query for all license ids, that are owned by at least one of the given
+    entities. Optionally restricted to a hierarchy provider and to licenses, that
+    are valid at a given date (when).
+    """
+    return select(LicenseModel.id).where(
+        licenses_owned_by(entities, hierarchy_provider_uri, when)
+    )
+
+
+def sync_license_owners_queries(
+    license_ids: List[int] | Select,
+) -> List[Executable]:
+    """
+    helper: the queries (re)writing the rows of the 'license_owner' table of some
+    licenses from their 'owner_eids' (and validity)
+    """
+    unnested = select(
+        LicenseModel.id,
+        LicenseModel.hierarchy_provider_uri,
+        LicenseModel.owner_type,
+        func.unnest(LicenseModel.owner_eids),
+        LicenseModel.valid_from,
+        LicenseModel.valid_to,
+    ).where(LicenseModel.id.in_(license_ids))
+    return [
+        delete(LicenseOwnerModel).where(LicenseOwnerModel.ref_license.in_(license_ids)),
+        insert(LicenseOwnerModel)
+        .from_select(
+            [
+                LicenseOwnerModel.ref_license,
+                LicenseOwnerModel.hierarchy_provider_uri,
+                LicenseOwnerModel.owner_type,
+                LicenseOwnerModel.owner_eid,
+                LicenseOwnerModel.valid_from,
+                LicenseOwnerModel.valid_to,
+            ],
+            unnested,
+        )
+        .on_conflict_do_nothing(),
+    ]
+
+
+def licenses_count_key(
+    filter_restrictions: Dict[str, List[str]],
+    allowed_filter_restrictions: List[str],
+    **filters,
+) -> Tuple:
+    """
+    helper: the key to cache the total of 'licenses_query' by. Unlike the query,
+    it does not contain the current time, but the current day (the validity of a
+    license is given by dates, so 'is_valid' does not change within a day).
+    """
+    return (
+        "licenses",
+        repr(sorted(filter_restrictions.items())),
+        repr(sorted(allowed_filter_restrictions)),
+        repr(sorted(filters.items())),
+        (
+            datetime.datetime.now(tz=datetime.timezone.utc).date()
+            if filters.get("is_valid") is not None
+            else None
+        ),
+    )
+
+
+def licenses_query(
+    filter_restrictions: Dict[str, List[str]],
+    allowed_filter_restrictions: List[str],
+    with_seats: bool = False,
+    **filters,
+) -> Select:
+    """
+    helper: the (unordered) query for all licenses matching the given filters
+    (and filter restrictions). Every license is selected at most once (no joins),
+    so neither DISTINCT nor GROUP BY is needed.
+    """
+    date_now = datetime.datetime.now(tz=datetime.timezone.utc)
+    filter_is_valid = filters.get("is_valid")
+    match_mode = filters.get("match_mode") or MatchMode.CONTAINS
+    stmt = select_licenses(with_seats).where(
+        (
+            match_condition(
+                LicenseModel.product_eid, filters["product_eid"], match_mode
+            )
+            if filters.get("product_eid")
+            else text("")
+        ),
+        (
+            LicenseModel.owner_type == filters["owner_type"]
+            if filters.get("owner_type")
+            else text("")
+        ),
+        (
+            LicenseModel.owner_level == filters["owner_level"]
+            if filters.get("owner_level")
+            else text("")
+        ),
+        (
+            has_owner_eid_matching(filters["owner_eid"], match_mode)
+            if filters.get("owner_eid")
+            else text("")
+        ),
+        (
+            match_condition(
+                LicenseModel.manager_eid, filters["manager_eid"], match_mode
+            )
+            if filters.get("manager_eid")
+            else text("")
+        ),
+        (
+            LicenseModel.valid_from >= filters["valid_from"]
+            if filters.get("valid_from")
+            else text("")
+        ),
+        (
+            LicenseModel.valid_to <= filters["valid_to"]
+            if filters.get("valid_to")
+            else text("")
+        ),
+        (
+            LicenseModel.is_trial.is_(filters["is_trial"])
+            if filters.get("is_trial") is not None
+            else text("")
+        ),
+        (
+            LicenseModel.created_at >= filters["created_at"]
+            if filters.get("created_at")
+            else text("")
+        ),
+        # filter by `is_valid`
+        (
+            LicenseModel.valid_from <= date_now
+            if filter_is_valid is True
+            else (
+                LicenseModel.valid_from > date_now
+                if filter_is_valid is False
+                else text("")
+            )
+        ),
+        (
+            LicenseModel.valid_to >= date_now
+            if filter_is_valid is True
+            else (
+                LicenseModel.valid_to < date_now
+                if filter_is_valid is False
+                else text("")
+            )
+        ),
+    )
+    #
+    # special aggregation filters:
+    #
+    if filters.get("redeemed_seats"):
+        # Filter uses the following logic:
+        # - number of redeemed seats * 1/10000000000  >= 80% (or something)
+        # [if nof_seats is infinity (NEVER TRUE)]
+        # - number of redeemed seats * 10000000000  >= 80% (or something)
+        # [if nof_seats is 0 (ALWAYS TRUE)]
+        # - number of redeemed seats * 1.0/nof_seats  >= 80% (or something)
+        # [true if, redeemed seats / nof_seats >= 0.8 etc. (The usual case)]
+        stmt = stmt.where(
+            1.0
+            * LicenseModel.nof_occupied_seats
+            * case(
+                (LicenseModel.nof_seats <= -1, 1.0 / 10000000000),
+                (LicenseModel.nof_seats <= 0, 10000000000),
+                else_=1.0 / LicenseModel.nof_seats,
+            )
+            >= filters["redeemed_seats"] / 100.0
+        )
+    return apply_filter_restrictions(
+        stmt, filter_restrictions, allowed_filter_restrictions
+    )
+
+
+def managed_licenses_query(
+    hierarchy_provider_uri: str, user_eid: str, with_seats: bool = False
+) -> Select:
+    """helper: the (unordered) query for all licenses managed by a given user"""
+    return select_licenses(with_seats).where(
+        LicenseModel.hierarchy_provider_uri == hierarchy_provider_uri,
+        LicenseModel.manager_eid == user_eid,
+    )
+
+
 class LicensingRepositorySqlalchemyImpl(LicensingRepository):
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -96,15 +571,99 @@ class LicensingRepositorySqlalchemyImpl(LicensingRepository):
             return False
 
     async def create_license(self, **data) -> None:
-        self.session.add(LicenseModel(**data))
+        self.session.add(
+            LicenseModel(
+                **data,
+                owners=[
+                    LicenseOwnerModel(
+                        hierarchy_provider_uri=data["hierarchy_provider_uri"],
+                        owner_type=data["owner_type"],
+                        owner_eid=owner_eid,
+                        valid_from=data["valid_from"],
+                        valid_to=data["valid_to"],
+                    )
+                    for owner_eid in dict.fromkeys(data["owner_eids"])
+                ],
+            )
+        )
 
     async def create_seat(self, **data) -> None:
         self.session.add(SeatModel(**{k: v for k, v in data.items() if k != "uuid"}))
+        if data.get("is_occupied"):
+            await self.session.execute(
+                update(LicenseModel)
+                .where(LicenseModel.id == data["ref_license"])
+                .values(
+                    nof_occupied_seats=LicenseModel.nof_occupied_seats + 1,
+                    updated_at=LicenseModel.updated_at,
+                )
+            )
 
-    async def delete_license(self, license_uuid: str) -> None:
-        await self.session.execute(
-            delete(LicenseModel).where(LicenseModel.uuid == license_uuid)
-        )
+    async def occupy_seat(self, **data) -> bool | None:
+        """
+        occupies a seat of a license, if (and only if) the license still has free
+        seats. This is safe under concurrency: the number of occupied seats of the
+        license is incremented by an atomic conditional update (concurrent updates
+        of the same license wait for each other and recheck the condition), so only
+        the chosen license gets locked (until the end of the transaction).
+        :returns: True, if the seat has been occupied, False, if there are no free
+            seats left, None, if the user has (concurrently) occupied a seat of the
+            license already (no seat has been created).
+        """
+        if (
+            await self.session.execute(
+                update(LicenseModel)
+                .where(
+                    LicenseModel.id == data["ref_license"],
+                    nof_free_seats_expression(
+                        LicenseModel.nof_seats,
+                        LicenseModel.extra_seats,
+                        LicenseModel.nof_occupied_seats,
+                    )
+                    > 0,
+                )
+                .values(
+                    nof_occupied_seats=LicenseModel.nof_occupied_seats + 1,
+                    updated_at=LicenseModel.updated_at,
+                )
+                .returning(LicenseModel.id)
+            )
+        ).scalar_one_or_none() is None:
+            return False
+
+        seat_id = (
+            await self.session.execute(
+                insert(SeatModel)
+                .values(**{k: v for k, v in data.items() if k != "uuid"})
+                .on_conflict_do_nothing(
+                    index_elements=[SeatModel.ref_license, SeatModel.user_eid],
+                    index_where=SeatModel.is_occupied == true(),
+                )
+                .returning(SeatModel.id)
+            )
+        ).scalar_one_or_none()
+        if seat_id is None:
+            # the user has (concurrently) occupied a seat of the license already
+            await self.session.execute(
+                update(LicenseModel)
+                .where(LicenseModel.id == data["ref_license"])
+                .values(
+                    nof_occupied_seats=LicenseModel.nof_occupied_seats - 1,
+                    updated_at=LicenseModel.updated_at,
+                )
+            )
+            return None
+        return True
+
+    async def delete_license(self, license_uuid: str) -> License | None:
+        l_ = (
+            await self.session.scalars(
+                delete(LicenseModel)
+                .where(LicenseModel.uuid == license_uuid)
+                .returning(LicenseModel)
+            )
+        ).one_or_none()
+        return l_.to_dto(with_seats=False) if l_ else None
 
     async def update_license(
         self, license_uuid: str, license_filter_restrictions: Any, **data
@@ -119,9 +678,49 @@ class LicensingRepositorySqlalchemyImpl(LicensingRepository):
                 .returning(LicenseModel)
             )
         ).one_or_none()
+        if l_ and LICENSE_OWNER_FIELDS & data.keys():
+            for query in sync_license_owners_queries([l_.id]):
+                await self.session.execute(query)
         return l_.to_dto()
 
     async def update_seats(self, seats: List[Seat]) -> None:
+        # keep the number of occupied seats of the affected licenses up to date
+        # (without recounting them): only seats, that are actually released by
+        # this call (are still occupied), are subtracted
+        released_seat_ids = [s_.id for s_ in seats if not s_.is_occupied]
+        released = Counter()
+        if released_seat_ids:
+            released = Counter(
+                (
+                    await self.session.execute(
+                        update(SeatModel.__table__)
+                        .where(
+                            SeatModel.id.in_(released_seat_ids),
+                            SeatModel.is_occupied == true(),
+                        )
+                        .values(is_occupied=False)
+                        .returning(SeatModel.ref_license)
+                    )
+                )
+                .scalars()
+                .all()
+            )
+        if released:
+            await self.session.execute(
+                update(LicenseModel.__table__).where(
+                    LicenseModel.id == bindparam("license_id")
+                )
+                # a changed number of occupied seats is no license update
+                .values(
+                    nof_occupied_seats=LicenseModel.nof_occupied_seats
+                    - bindparam("nof_released_seats"),
+                    updated_at=LicenseModel.updated_at,
+                ),
+                [
+                    {"license_id": id_, "nof_released_seats": n_}
+                    for id_, n_ in released.items()
+                ],
+            )
         await self.session.execute(
             update(SeatModel),
             [
@@ -151,6 +750,33 @@ class LicensingRepositorySqlalchemyImpl(LicensingRepository):
                     },
                 )
 
+    async def update_seats_last_accessed_at(
+        self, accesses: Dict[int, datetime.datetime]
+    ) -> None:
+        """
+        updates just the 'last_accessed_at' of seats (in bulk). A newer stored
+        'last_accessed_at' is kept.
+        :param accesses: {seat id: access timestamp}
+        """
+        await self.session.execute(
+            update(SeatModel.__table__).where(
+                SeatModel.id == bindparam("seat_id"),
+                or_(
+                    SeatModel.last_accessed_at.is_(None),
+                    SeatModel.last_accessed_at < bindparam("accessed_at"),
+                ),
+            )
+            # a mere access is no seat update, so keep 'updated_at' untouched
+            .values(
+                last_accessed_at=bindparam("accessed_at"),
+                updated_at=SeatModel.updated_at,
+            ),
+            [
+                {"seat_id": seat_id, "accessed_at": accessed_at}
+                for seat_id, accessed_at in accesses.items()
+            ],
+        )
+
     async def get_managed_licenses_paginated(
         self,
         page: int,
@@ -158,52 +784,53 @@ class LicensingRepositorySqlalchemyImpl(LicensingRepository):
         order_by_fields: List[Tuple[str, str]],
         hierarchy_provider_uri: str,
         user_eid: str,
-    ) -> Tuple[List[License], int]:
+        with_seats: bool = False,
+        total_mode: TotalMode = TotalMode.EXACT,
+    ) -> Tuple[List[License], int | None]:
         items, total = await execute_paginated_query(
             self.session,
-            select(LicenseModel)
-            .where(
-                LicenseModel.hierarchy_provider_uri == hierarchy_provider_uri,
-                LicenseModel.manager_eid == user_eid,
-            )
-            .options(selectinload(LicenseModel.seats))
-            .options(selectinload(LicenseModel.released_seats))
-            .order_by(
-                *[
-                    (
-                        getattr(LicenseModel, field).desc()
-                        if dir_ == OrderByDirection.DESC
-                        else getattr(LicenseModel, field)
-                    )
-                    for field, dir_ in order_by_fields
-                ]
-            ),
+            managed_licenses_query(
+                hierarchy_provider_uri, user_eid, with_seats
+            ).order_by(*order_by_clauses(order_by_fields)),
             page,
             page_size,
+            total_mode,
+        )
+        return [l_.to_dto(with_seats=with_seats) for l_ in items], total
+
+    async def get_managed_licenses_keyset(
+        self,
+        page_size: int,
+        order_by_fields: List[Tuple[str, str]],
+        after: List[Any] | None,
+        hierarchy_provider_uri: str,
+        user_eid: str,
+        with_seats: bool = False,
+    ) -> Tuple[List[License], List[Any] | None]:
+        items, keys = await execute_keyset_query(
+            self.session,
+            managed_licenses_query(hierarchy_provider_uri, user_eid, with_seats),
+            keyset_order_by_columns(order_by_fields),
+            after,
+            page_size,
         )
-        return [l_.to_dto() for l_ in items], total
+        return [l_.to_dto(with_seats=with_seats) for l_ in items], keys
 
     async def get_managed_licenses_by_id(
         self,
         license_id: str,
         hierarchy_provider_uri: str,
         user_eid: str,
+        with_seats: bool = False,
     ) -> License:
-        license_item_stmt = (
-            select(LicenseModel)
-            .where(
-                LicenseModel.uuid == license_id,
-                LicenseModel.hierarchy_provider_uri == hierarchy_provider_uri,
-                LicenseModel.manager_eid == user_eid,
-            )
-            .options(
-                selectinload(LicenseModel.seats),
-                selectinload(LicenseModel.released_seats),
-            )
+        license_item_stmt = select_licenses(with_seats).where(
+            LicenseModel.uuid == license_id,
+            LicenseModel.hierarchy_provider_uri == hierarchy_provider_uri,
+            LicenseModel.manager_eid == user_eid,
         )
         result = await self.session.execute(license_item_stmt)
         license_item = result.scalar()
-        return license_item.to_dto() if license_item else None
+        return license_item.to_dto(with_seats=with_seats) if license_item else None
 
     async def get_licenses_for_entities_paginated(
         self,
@@ -212,45 +839,39 @@ class LicensingRepositorySqlalchemyImpl(LicensingRepository):
         order_by_fields: List[Tuple[str, str]],
         hierarchy_provider_uri: str,
         entities: List[Entity],
-    ) -> Tuple[List[License], int]:
-        # subquery for all license ids with owners unnested to rows ...
-        subquery_licenses = (
-            select(LicensesUnnestedOwnersModel.id)
-            .where(
-                LicensesUnnestedOwnersModel.hierarchy_provider_uri
-                == hierarchy_provider_uri,
-                tuple_(
-                    LicensesUnnestedOwnersModel.owner_type,
-                    LicensesUnnestedOwnersModel.owner_eid,
-                ).in_([(e_.type_, e_.eid) for e_ in entities]),
-            )
-            .distinct()
-        ).subquery()
-
-        stmt = (
-            select(LicenseModel)
-            .join(subquery_licenses, subquery_licenses.c.id == LicenseModel.id)
-            .options(selectinload(LicenseModel.seats))
-            .options(selectinload(LicenseModel.released_seats))
-            .order_by(
-                *[
-                    (
-                        getattr(LicenseModel, field).desc()
-                        if dir_ == OrderByDirection.DESC
-                        else getattr(LicenseModel, field)
-                    )
-                    for field, dir_ in order_by_fields
-                ]
-            )
-        )
-
+        with_seats: bool = False,
+        total_mode: TotalMode = TotalMode.EXACT,
+    ) -> Tuple[List[License], int | None]:
         items, total = await execute_paginated_query(
             self.session,
-            stmt,
+            select_licenses(with_seats)
+            .where(licenses_owned_by(entities, hierarchy_provider_uri))
+            .order_by(*order_by_clauses(order_by_fields)),
             page,
             page_size,
+            total_mode,
+        )
+        return [l_.to_dto(with_seats=with_seats) for l_ in items], total
+
+    async def get_licenses_for_entities_keyset(
+        self,
+        page_size: int,
+        order_by_fields: List[Tuple[str, str]],
+        after: List[Any] | None,
+        hierarchy_provider_uri: str,
+        entities: List[Entity],
+        with_seats: bool = False,
+    ) -> Tuple[List[License], List[Any] | None]:
+        items, keys = await execute_keyset_query(
+            self.session,
+            select_licenses(with_seats).where(
+                licenses_owned_by(entities, hierarchy_provider_uri)
+            ),
+            keyset_order_by_columns(order_by_fields),
+            after,
+            page_size,
         )
-        return [l_.to_dto() for l_ in items], total
+        return [l_.to_dto(with_seats=with_seats) for l_ in items], keys
 
     async def get_licenses_paginated(
         self,
@@ -259,164 +880,87 @@ class LicensingRepositorySqlalchemyImpl(LicensingRepository):
         order_by_fields: List[Tuple[str, str]],
         filter_restrictions: Dict[str, List[str]],
         allowed_filter_restrictions: List[str],
+        with_seats: bool = False,
+        total_mode: TotalMode = TotalMode.EXACT,
         **filters,
-    ) -> Tuple[List[License], int]:
+    ) -> Tuple[List[License], int | None]:
         """
         helper: gets all licenses, paginated, with order by and filters
+        :param with_seats: load the seat lists (not only the number of occupied seats)
+        :param total_mode: how the total number of licenses is determined
         :returns: a tuple with
             (a list of License DTO objects, the total number of licenses)
         """
-        date_now = datetime.datetime.now(tz=datetime.timezone.utc)
-        filter_is_valid = filters.get("is_valid")
-        stmt = (
-            select(LicenseModel)
-            .join(
-                LicensesUnnestedOwnersModel,
-                LicensesUnnestedOwnersModel.id == LicenseModel.id,
-            )
-            .where(
-                (
-                    LicenseModel.product_eid.contains(filters["product_eid"])
-                    if filters.get("product_eid")
-                    else text("")
-                ),
-                (
-                    LicenseModel.owner_type == filters["owner_type"]
-                    if filters.get("owner_type")
-                    else text("")
-                ),
-                (
-                    LicenseModel.owner_level == filters["owner_level"]
-                    if filters.get("owner_level")
-                    else text("")
-                ),
-                (
-                    LicensesUnnestedOwnersModel.owner_eid.contains(filters["owner_eid"])
-                    if filters.get("owner_eid")
-                    else text("")
-                ),
-                (
-                    LicenseModel.manager_eid.contains(filters["manager_eid"])
-                    if filters.get("manager_eid")
-                    else text("")
-                ),
-                (
-                    LicenseModel.valid_from >= filters["valid_from"]
-                    if filters.get("valid_from")
-                    else text("")
-                ),
-                (
-                    LicenseModel.valid_to <= filters["valid_to"]
-                    if filters.get("valid_to")
-                    else text("")
-                ),
-                (
-                    LicenseModel.is_trial.is_(filters["is_trial"])
-                    if filters.get("is_trial") is not None
-                    else text("")
-                ),
-                (
-                    LicenseModel.created_at >= filters["created_at"]
-                    if filters.get("created_at")
-                    else text("")
-                ),
-                # filter by `is_valid`
-                (
-                    LicenseModel.valid_from <= date_now
-                    if filter_is_valid is True
-                    else (
-                        LicenseModel.valid_from > date_now
-                        if filter_is_valid is False
-                        else text("")
-                    )
-                ),
-                (
-                    LicenseModel.valid_to >= date_now
-                    if filter_is_valid is True
-                    else (
-                        LicenseModel.valid_to < date_now
-                        if filter_is_valid is False
-                        else text("")
-                    )
-                ),
-            )
-            .options(selectinload(LicenseModel.seats))
-            .options(selectinload(LicenseModel.released_seats))
-            .order_by(
-                *[
-                    (
-                        getattr(LicenseModel, field).desc()
-                        if dir == OrderByDirection.DESC
-                        else getattr(LicenseModel, field)
-                    )
-                    for field, dir in order_by_fields
-                ]
-            )
-        )
-        #
-        # special aggregation filters:
-        #
-        if filters.get("redeemed_seats"):
-            # Filter uses the following logic in `having` clause:
-            # - number of redeemed seats * 1/10000000000  >= 80% (or something)
-            # [if nof_seats is infinity (NEVER TRUE)]
-            # - number of redeemed seats * 10000000000  >= 80% (or something)
-            # [if nof_seats is 0 (ALWAYS TRUE)]
-            # - number of redeemed seats * 1.0/nof_seats  >= 80% (or something)
-            # [true if, redeemed seats / nof_seats >= 0.8 etc. (The usual case)]
-            stmt = (
-                stmt.join(
-                    SeatModel,
-                    and_(
-                        SeatModel.ref_license == LicenseModel.id,
-                        SeatModel.is_occupied == true(),
-                    ),
-                    isouter=True,
-                )
-                .group_by(LicenseModel.id)
-                .having(
-                    1.0
-                    # distinct is important here to reflect the possibility of
-                    # multiple owner eids per license. Otherwise, the count
-                    # would be multiplied by the number of owner eids!
-                    * func.count(distinct(SeatModel.id))
-                    * case(
-                        (LicenseModel.nof_seats <= -1, 1.0 / 10000000000),
-                        (LicenseModel.nof_seats <= 0, 10000000000),
-                        else_=1.0 / LicenseModel.nof_seats,
-                    )
-                    >= filters["redeemed_seats"] / 100.0
-                )
-            )
-        stmt = stmt.distinct()
-
         items, total = await execute_paginated_query(
             self.session,
-            apply_filter_restrictions(
-                stmt, filter_restrictions, allowed_filter_restrictions
-            ),
+            licenses_query(
+                filter_restrictions, allowed_filter_restrictions, with_seats, **filters
+            ).order_by(*order_by_clauses(order_by_fields)),
             page,
             page_size,
+            total_mode,
+            licenses_count_key(
+                filter_restrictions, allowed_filter_restrictions, **filters
+            ),
         )
+        return [l_.to_dto(with_seats=with_seats) for l_ in items], total
 
-        return [l_.to_dto() for l_ in items], total
+    async def get_licenses_keyset(
+        self,
+        page_size: int,
+        order_by_fields: List[Tuple[str, str]],
+        after: List[Any] | None,
+        filter_restrictions: Dict[str, List[str]],
+        allowed_filter_restrictions: List[str],
+        with_seats: bool = False,
+        **filters,
+    ) -> Tuple[List[License], List[Any] | None]:
+        """
+        helper: gets the next page of all licenses (see 'get_licenses_paginated')
+        behind the license with the given keys (after)
+        :returns: a tuple with
+            (a list of License DTO objects, the keys of the last license or None)
+        """
+        items, keys = await execute_keyset_query(
+            self.session,
+            licenses_query(
+                filter_restrictions, allowed_filter_restrictions, with_seats, **filters
+            ),
+            keyset_order_by_columns(order_by_fields),
+            after,
+            page_size,
+        )
+        return [l_.to_dto(with_seats=with_seats) for l_ in items], keys
 
     async def get_license(
         self,
         license_uuid: str,
         filter_restrictions: Dict[str, List[str]],
         allowed_filter_restrictions: List[str],
+        archived: bool = False,
+        with_seats: bool = False,
     ) -> License | None:
         """
         helper: gets all details for a given license ID
+        :param archived: get an archived license (without seats) instead
+        :param with_seats: load the seat lists (not only the number of occupied seats)
         :returns: a License DTO or None
         """
-        stmt = (
-            select(LicenseModel)
-            .where(LicenseModel.uuid == license_uuid)
-            .options(selectinload(LicenseModel.seats))
-            .options(selectinload(LicenseModel.released_seats))
-        )
+        if archived:
+            license_ = (
+                await self.session.execute(
+                    apply_filter_restrictions(
+                        select(LicenseArchiveModel).where(
+                            LicenseArchiveModel.uuid == license_uuid
+                        ),
+                        filter_restrictions,
+                        allowed_filter_restrictions,
+                        LicenseArchiveModel,
+                    )
+                )
+            ).scalar()
+            return license_.to_dto() if license_ else None
+        stmt = select_licenses(with_seats).where(LicenseModel.uuid == license_uuid)
         license_ = (
             (
                 await self.session.execute(
@@ -428,50 +972,78 @@ class LicensingRepositorySqlalchemyImpl(LicensingRepository):
             .scalars()
             .first()
         )
-        return license_.to_dto() if license_ else None
+        return license_.to_dto(with_seats=with_seats) if license_ else None
+
+    async def get_license_seats_keyset(
+        self,
+        license_uuid: str,
+        page_size: int,
+        after: List[Any] | None,
+        filter_restrictions: Dict[str, List[str]],
+        allowed_filter_restrictions: List[str],
+        status: SeatStatus | None = None,
+        archived: bool = False,
+    ) -> Tuple[List[Seat], List[Any] | None] | None:
+        """
+        helper: the seats of a license (optionally with a given status) ordered by
+        their IDs, with keyset pagination
+        :param archived: get the archived seats instead (of a license being
+            archived itself or not)
+        :returns: a tuple with (a list of Seat DTOs, the keys of the last seat) or
+            None, if there is no such license (respecting the filter restrictions)
+        """
+        license_models = (
+            (LicenseModel, LicenseArchiveModel) if archived else (LicenseModel,)
+        )
+        seat_model = SeatArchiveModel if archived else SeatModel
+        license_id = (
+            await self.session.execute(
+                union(
+                    *[
+                        apply_filter_restrictions(
+                            select(m_.id).where(m_.uuid == license_uuid),
+                            filter_restrictions,
+                            allowed_filter_restrictions,
+                            m_,
+                        )
+                        for m_ in license_models
+                    ]
+                )
+            )
+        ).scalar()
+        if license_id is None:
+            return None
+        items, keys = await execute_keyset_query(
+            self.session,
+            select(seat_model).where(
+                seat_model.ref_license == license_id,
+                seat_model.status == status if status else true(),
+            ),
+            [(seat_model.id, OrderByDirection.ASC)],
+            after,
+            page_size,
+        )
+        return [s_.to_dto() for s_ in items], keys
 
     async def get_valid_licenses_for_entities(
         self,
         hierarchy_provider_uri: str,
         entities: List[Entity],
         when: datetime.date,
+        with_seats: bool = False,
     ) -> List[License]:
         """
         helper: gets all (distinct) licenses, that are valid at a given date (when),
         that are owned by the given entities under a given hierarchy provider.
+        :param with_seats: load the seat lists (not only the number of occupied seats)
         :returns: a list of License DTO objects
         """
-        # query for all license ids, that are currently valid ...
-        valid_licenses = (
-            select(LicensesUnnestedOwnersModel.id)
-            .where(
-                LicensesUnnestedOwnersModel.hierarchy_provider_uri
-                == hierarchy_provider_uri,
-                LicensesUnnestedOwnersModel.valid_from <= when,
-                LicensesUnnestedOwnersModel.valid_to >= when,
-                tuple_(
-                    LicensesUnnestedOwnersModel.owner_type,
-                    LicensesUnnestedOwnersModel.owner_eid,
-                ).in_([(e_.type_, e_.eid) for e_ in entities]),
-            )
-            .distinct()
-        ).subquery()
-
-        return [
-            l_.to_dto()
-            for l_ in (
-                (
-                    await self.session.execute(
-                        select(LicenseModel)
-                        .join(valid_licenses, valid_licenses.c.id == LicenseModel.id)
-                        .options(selectinload(LicenseModel.seats))
-                        .options(selectinload(LicenseModel.released_seats))
-                    )
-                )
-                .scalars()
-                .all()
+        result = await self.session.execute(
+            select_licenses(with_seats).where(
+                licenses_owned_by(entities, hierarchy_provider_uri, when)
             )
-        ]
+        )
+        return [l_.to_dto(with_seats=with_seats) for l_ in result.scalars().all()]
 
     async def get_occupied_seats(self, user_eid: str) -> List[Seat]:
         """
@@ -495,6 +1067,137 @@ class LicensingRepositorySqlalchemyImpl(LicensingRepository):
         )
         return [s_.to_dto(with_license=True) for s_ in occupied_seats]
 
+    async def get_occupied_seats_of_users(self, user_eids: List[str]) -> List[Seat]:
+        """
+        Gets all seats, that are currently 'occupied' by one of the given users
+        :param user_eids: the EIDs of the requesting users
+        :return: a list of 'seats' with their licenses
+        """
+        rows = (
+            await self.session.execute(
+                select(SeatModel, LicenseModel)
+                .join(LicenseModel, LicenseModel.id == SeatModel.ref_license)
+                .where(SeatModel.user_eid.in_(user_eids), SeatModel.is_occupied)
+            )
+        ).all()
+        seats = []
+        for s_, l_ in rows:
+            seat = s_.to_dto()
+            seat.license = l_.to_dto(with_seats=False)
+            seats.append(seat)
+        return seats
+
+    async def get_occupied_seats_and_candidate_licenses(
+        self,
+        hierarchy_provider_uri: str,
+        user_eid: str,
+        memberships: Memberships,
+        when: datetime.date,
+    ) -> Tuple[List[Seat], List[License]]:
+        """
+        Gets (using one single SQL statement)
+        - all seats, that are currently 'occupied' by the requesting user (with
+          their licenses) and
+        - the 'candidate licenses': for every product, the user does not already
+          have a still valid seat for, all licenses valid at a given date (when)
+          and owned by one of the users memberships, that still have free seats.
+          The candidate licenses are ordered by product and (per product) by
+          preference: minimum owner level and (for same owner level) maximum number
+          of free seats first.
+        A seat is 'still valid', if its license has not expired and the user is
+        still member of one of its owners.
+        :param hierarchy_provider_uri: the URI of the hierarchy provider
+        :param user_eid: the EID of the requesting user
+        :param memberships: the memberships of the requesting user
+        :param when: the date the licenses have to be valid
+        :return: a tuple (occupied seats with licenses, candidate licenses)
+        """
+        occupied_seats = (
+            select(SeatModel.ref_license)
+            .where(SeatModel.user_eid == user_eid, SeatModel.is_occupied == true())
+            .cte("occupied_seats")
+        )
+        # products, the user already has a still valid seat for ...
+        occupied_product_eids = (
+            select(LicenseModel.product_eid)
+            .join(occupied_seats, occupied_seats.c.ref_license == LicenseModel.id)
+            .where(
+                LicenseModel.valid_to >= when,
+                LicenseModel.id.in_(licenses_owned_by_entities(memberships)),
+            )
+        )
+        valid_licenses = (
+            select(
+                LicenseModel.id,
+                LicenseModel.nof_seats,
+                LicenseModel.extra_seats,
+                LicenseModel.nof_occupied_seats,
+            ).where(
+                LicenseModel.id.in_(
+                    licenses_owned_by_entities(
+                        memberships, hierarchy_provider_uri, when
+                    )
+                ),
+                LicenseModel.product_eid.not_in(occupied_product_eids),
+            )
+        ).subquery("valid_licenses")
+        nof_free_seats = nof_free_seats_expression(
+            valid_licenses.c.nof_seats,
+            valid_licenses.c.extra_seats,
+            valid_licenses.c.nof_occupied_seats,
+        )
+        # ... and the licenses with free seats for all other products
+        candidate_licenses = (
+            select(valid_licenses.c.id)
+            .where(nof_free_seats > 0)
+            .cte("candidate_licenses")
+        )
+
+        rows = (
+            await self.session.execute(
+                select(LicenseModel, SeatModel, candidate_licenses.c.id)
+                .outerjoin(
+                    SeatModel,
+                    and_(
+                        SeatModel.ref_license == LicenseModel.id,
+                        SeatModel.user_eid == user_eid,
+                        SeatModel.is_occupied == true(),
+                    ),
+                )
+                .outerjoin(
+                    candidate_licenses, candidate_licenses.c.id == LicenseModel.id
+                )
+                .where(
+                    LicenseModel.id.in_(
+                        union(
+                            select(occupied_seats.c.ref_license),
+                            select(candidate_licenses.c.id),
+                        )
+                    )
+                )
+                .order_by(
+                    LicenseModel.product_eid,
+                    LicenseModel.owner_level,
+                    nof_free_seats_expression(
+                        LicenseModel.nof_seats,
+                        LicenseModel.extra_seats,
+                        LicenseModel.nof_occupied_seats,
+                    ).desc(),
+                    LicenseModel.id,
+                )
+            )
+        ).all()
+
+        seats, candidates = [], []
+        for l_, s_, candidate_id in rows:
+            if s_ is not None:
+                seat = s_.to_dto()
+                seat.license = l_.to_dto(with_seats=False)
+                seats.append(seat)
+            if candidate_id is not None:
+                candidates.append(l_.to_dto(with_seats=False))
+        return seats, candidates
+
     async def create_event_log(
         self,
         type_: EventType,
@@ -550,3 +1253,193 @@ class LicensingRepositorySqlalchemyImpl(LicensingRepository):
         await self.session.execute(
             update(EventLogModel).where(EventLogModel.id == event_log_id).values(**data)
         )
+
+    async def get_license_ids(self, after_id: int = 0, limit: int = 1000) -> List[int]:
+        return list(
+            (
+                await self.session.execute(
+                    select(LicenseModel.id)
+                    .where(LicenseModel.id > after_id)
+                    .order_by(LicenseModel.id)
+                    .limit(limit)
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+    async def recount_occupied_seats(self, license_ids: List[int]) -> Dict[int, int]:
+        """
+        recounts the occupied seats of the given licenses and repairs the
+        (denormalized) 'nof_occupied_seats' of a license, if it has drifted.
+        :returns: the repaired licenses as {license id: nof occupied seats}
+        """
+        return {
+            id_: nof_occupied_seats
+            for id_, nof_occupied_seats in (
+                await self.session.execute(recount_occupied_seats_query(license_ids))
+            ).all()
+        }
+
+    async def archive_released_seats(
+        self, released_before: datetime.datetime, limit: int = 1000
+    ) -> int:
+        """
+        moves (at most 'limit') seats, that have been released before a given
+        time, to the archive. Seats locked by concurrent transactions are skipped.
+        :returns: the number of archived seats
+        """
+        seat_ids = (
+            select(SeatModel.id)
+            .where(
+                SeatModel.is_occupied == false(),
+                # 'updated_at' is the time of the release
+                func.coalesce(SeatModel.updated_at, SeatModel.occupied_at)
+                < released_before,
+            )
+            .order_by(SeatModel.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.session.execute(
+            archive_rows_query(SeatModel, SeatArchiveModel, SeatModel.id.in_(seat_ids))
+        )
+        return len(result.all())
+
+    async def archive_expired_licenses(
+        self, expired_before: datetime.date, limit: int = 1000
+    ) -> Tuple[int, int]:
+        """
+        moves (at most 'limit') licenses, that have expired before a given date,
+        together with all their seats to the archive (their owners are deleted).
+        Licenses locked by concurrent transactions are skipped.
+        :returns: the number of archived licenses and seats
+        """
+        license_ids = list(
+            (
+                await self.session.execute(
+                    select(LicenseModel.id)
+                    .where(LicenseModel.valid_to < expired_before)
+                    .order_by(LicenseModel.id)
+                    .limit(limit)
+                    .with_for_update(skip_locked=True)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if not license_ids:
+            return 0, 0
+        # the seats first (they reference the licenses)
+        seats = await self.session.execute(
+            archive_rows_query(
+                SeatModel, SeatArchiveModel, SeatModel.ref_license.in_(license_ids)
+            )
+        )
+        nof_seats = len(seats.all())
+        # the owners are deleted by cascade
+        await self.session.execute(
+            archive_rows_query(
+                LicenseModel, LicenseArchiveModel, LicenseModel.id.in_(license_ids)
+            )
+        )
+        return len(license_ids), nof_seats
+
+    def _stored_ancestors_query(
+        self, hierarchy_provider_uri: str, entities: List[Entity]
+    ) -> Select:
+        """
+        helper: (entity type, entity eid, ancestor) for all stored ancestors of
+        the given entities
+        """
+        entity, ancestor = aliased(HierarchyEntityModel), aliased(HierarchyEntityModel)
+        return (
+            select(entity.entity_type, entity.entity_eid, ancestor)
+            .join(
+                HierarchyAncestorModel,
+                HierarchyAncestorModel.ref_entity == entity.id,
+            )
+            .join(ancestor, ancestor.id == HierarchyAncestorModel.ref_ancestor)
+            .where(
+                entity.hierarchy_provider_uri == hierarchy_provider_uri,
+                tuple_(entity.entity_type, entity.entity_eid).in_(
+                    [(e_.type_, e_.eid) for e_ in entities]
+                ),
+            )
+        )
+
+    async def get_stored_ancestors(
+        self, hierarchy_provider_uri: str, entities: List[Entity]
+    ) -> Dict[Entity, FrozenSet[Entity]]:
+        """
+        gets the ancestors of some entities from the hierarchy store
+        :returns: the ancestors per entity (empty for entities not stored)
+        """
+        ancestors: Dict[Entity, set] = {e_: set() for e_ in entities}
+        for entities_ in chunks(list(ancestors), 1000):
+            for entity_type, entity_eid, ancestor in (
+                await self.session.execute(
+                    self._stored_ancestors_query(hierarchy_provider_uri, entities_)
+                )
+            ).all():
+                ancestors[Entity(type_=entity_type, eid=entity_eid)].add(
+                    ancestor.to_dto()
+                )
+        return {e_: frozenset(ancestors_) for e_, ancestors_ in ancestors.items()}
+
+    async def replace_hierarchy_snapshot(
+        self,
+        hierarchy_provider_uri: str,
+        entities: List[Entity],
+        ancestors: Dict[Entity, FrozenSet[Entity]],
+    ) -> int:
+        """
+        stores a snapshot of the hierarchies of a hierarchy provider: all stored
+        entities (and their ancestors) of the provider get replaced by the ones of
+        the snapshot (within the transaction, so readers see either the old or the
+        new snapshot). Concurrent snapshots of the same provider are serialized.
+        :param entities: all entities of the snapshot
+        :param ancestors: the ancestors (within the snapshot) per entity
+        :returns: the number of stored ancestor relations
+        """
+        await self.session.execute(
+            select(func.pg_advisory_xact_lock(func.hashtext(hierarchy_provider_uri)))
+        )
+        # the ancestors are deleted by cascade
+        await self.session.execute(
+            delete(HierarchyEntityModel).where(
+                HierarchyEntityModel.hierarchy_provider_uri == hierarchy_provider_uri
+            )
+        )
+        ids: Dict[Entity, int] = {}
+        for entities_ in chunks(entities, 1000):
+            for id_, entity_type, entity_eid in await self.session.execute(
+                insert(HierarchyEntityModel)
+                .values(
+                    [
+                        {
+                            "hierarchy_provider_uri": hierarchy_provider_uri,
+                            "entity_type": e_.type_,
+                            "entity_eid": e_.eid,
+                            "level": int(e_.level) if e_.level is not None else None,
+                            "name": str(e_.name) if e_.name is not None else None,
+                        }
+                        for e_ in entities_
+                    ]
+                )
+                .returning(
+                    HierarchyEntityModel.id,
+                    HierarchyEntityModel.entity_type,
+                    HierarchyEntityModel.entity_eid,
+                )
+            ):
+                ids[Entity(type_=entity_type, eid=entity_eid)] = id_
+
+        rows = [
+            {"ref_entity": ids[e_], "ref_ancestor": ids[a_]}
+            for e_ in entities
+            for a_ in ancestors.get(e_, ())
+        ]
+        for rows_ in chunks(rows, 10000):
+            await self.session.execute(insert(HierarchyAncestorModel).values(rows_))
+        return len(rows)
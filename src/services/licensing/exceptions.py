@@ -1,3 +1,4 @@
+from functools import partial
 from typing import Any, Optional, Dict
 from fastapi import HTTPException as FastApiHTTPException
 
@@ -14,6 +15,13 @@ class HTTPException(FastApiHTTPException):
         self.message = message
         super().__init__(status_code=status_code, detail=message, headers=headers)
 
+    def __reduce__(self):
+        # keep the exception picklable (e.g. raised within a process pool)
+        return (
+            partial(HTTPException, **self.kwargs),
+            (self.status_code, self.message, self.headers),
+        )
+
 
 class DuplicateEntryException(Exception):
     pass
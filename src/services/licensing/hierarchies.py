@@ -1,6 +1,7 @@
 from functools import reduce
-from typing import List, Dict
+from typing import Dict, FrozenSet, List, Set, Tuple
 
+from services.licensing import cache
 from services.licensing.custom_types import Entity
 
 
@@ -45,3 +46,141 @@ def get_ancestors(entity_type, entity_eid, hierarchies) -> List[Entity]:
         [get_ancestors(p.type_, p.eid, hierarchies) for p in parents],
         parents,
     )
+
+
+class HierarchyIndex:
+    """
+    A compiled index of some hierarchies: the (deduplicated) parent entities of
+    every entity. Every entity is created just once (no matter how often it
+    appears in the hierarchies). The hierarchies are traversed iteratively,
+    visiting every entity at most once, so shared sub-paths (e.g. a class being
+    part of a school and of some course group) are not walked again. Traversal is
+    cycle-safe and the ancestors of an entity get memoized.
+    """
+
+    def __init__(
+        self,
+        parents: Dict[Entity, List[Entity]],
+        entities: List[Entity] | None = None,
+    ):
+        self.parents = parents
+        # all entities (including the ones without parents and children)
+        self.entities = (
+            entities
+            if entities is not None
+            else list(
+                dict.fromkeys(
+                    e_
+                    for child, parents_ in parents.items()
+                    for e_ in [child, *parents_]
+                )
+            )
+        )
+        self._ancestors: Dict[Entity, FrozenSet[Entity]] = {}
+
+    def __len__(self) -> int:
+        # the number of entities (the memoized ancestors are not counted)
+        return len(self.entities)
+
+    @classmethod
+    def from_hierarchies(cls, hierarchies: List) -> "HierarchyIndex":
+        """
+        compiles an index from a list of hierarchies (nested by 'children')
+        """
+        entities: Dict[Tuple[str, str], Entity] = {}
+        parents: Dict[Entity, Dict[Entity, None]] = {}
+
+        def entity(node: Dict) -> Entity:
+            key = (node["type"], node["eid"])
+            if key not in entities:
+                entities[key] = Entity(
+                    type_=node["type"],
+                    eid=node["eid"],
+                    level=node.get("level", -1),
+                    name=node.get("name", node["eid"]),
+                    is_member_of=node.get("is_member_of", False),
+                )
+            return entities[key]
+
+        stack = [(h_, entity(h_)) for h_ in reversed(hierarchies)]
+        while stack:
+            node, node_entity = stack.pop()
+            for c_ in reversed(node.get("children") or []):
+                child_entity = entity(c_)
+                # (a dict keeps the order of the parents)
+                parents.setdefault(child_entity, {})[node_entity] = None
+                stack.append((c_, child_entity))
+        return cls(
+            {child: list(parents_) for child, parents_ in parents.items()},
+            list(entities.values()),
+        )
+
+    def ancestors(self, entity: Entity) -> FrozenSet[Entity]:
+        """
+        all ancestors of a given entity (memoized). The hierarchies are traversed
+        iteratively, reusing the memoized ancestors of entities on the way.
+        In case of cycles, an entity is not part of its own ancestors.
+        """
+        if entity in self._ancestors:
+            return self._ancestors[entity]
+        ancestors: Set[Entity] = set()
+        stack = list(self.parents.get(entity, ()))
+        while stack:
+            parent = stack.pop()
+            if parent in ancestors:
+                continue
+            ancestors.add(parent)
+            if parent in self._ancestors:
+                ancestors |= self._ancestors[parent]
+            else:
+                stack.extend(self.parents.get(parent, ()))
+        ancestors.discard(entity)
+        self._ancestors[entity] = frozenset(ancestors)
+        return self._ancestors[entity]
+
+    def get_ancestors(self, entity_type: str, entity_eid: str) -> List[Entity]:
+        """
+        creates a (deduplicated) list of all ancestors of a given entity in the
+        order of 'get_ancestors' (the parents first, followed by the ancestors of
+        every parent), but iteratively and cycle-safe.
+        """
+        entity = Entity(type_=entity_type, eid=entity_eid)
+        # (a dict keeps the order of the ancestors)
+        ancestors: Dict[Entity, None] = {}
+        expanded: Set[Entity] = set()
+        stack = [iter([entity])]
+        while stack:
+            current = next(stack[-1], None)
+            if current is None:
+                stack.pop()
+                continue
+            if current in expanded:
+                continue
+            expanded.add(current)
+            parents = self.parents.get(current, ())
+            ancestors.update(dict.fromkeys(parents))
+            stack.append(iter(parents))
+        ancestors.pop(entity, None)
+        return list(ancestors)
+
+
+def get_hierarchy_index(
+    hierarchies: List, hierarchies_hash: Dict[str, str] | None = None
+) -> HierarchyIndex:
+    """
+    gets the compiled index of some hierarchies. As the (signed) hash of the
+    hierarchies is a content address of the hierarchies, the index gets cached
+    by this hash (if given).
+    :param hierarchies: a list of hierarchies (nested by 'children')
+    :param hierarchies_hash: the (already checked) hash of the hierarchies as
+    given by the token ({"alg": ..., "hash": ...})
+    :return: the compiled index
+    """
+    if not hierarchies_hash or not cache.hierarchy_index_cache.enabled:
+        return HierarchyIndex.from_hierarchies(hierarchies)
+    key = (hierarchies_hash["alg"].upper(), hierarchies_hash["hash"])
+    index = cache.hierarchy_index_cache.get(key)
+    if index is None:
+        index = HierarchyIndex.from_hierarchies(hierarchies)
+        cache.hierarchy_index_cache.set(key, index)
+    return index
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import os
+from typing import Any, Callable, Dict, Tuple
+
+import structlog
+from jwcrypto import jwt
+
+from services.licensing import settings
+from services.licensing.tokens import get_key_from_pem
+
+logger = structlog.stdlib.get_logger(__name__)
+
+
+def load_keys_from_dir(keys_dir: str) -> Dict[str, jwt.JWK]:
+    """
+    loads (public) keys from a directory (e.g. some mounted secret). Supported are
+    - PEM files '<kid>.pem' (the file name is used as key ID)
+    - JSON files '*.json' containing a JWKS ({"keys": [...]}) or a single JWK, the
+      key IDs are taken from the 'kid' attributes.
+    Files failing to be parsed are skipped (and logged).
+    :param keys_dir: the directory to load the keys from
+    :return: the keys indexed by key ID
+    """
+    keys: Dict[str, jwt.JWK] = {}
+    for entry in sorted(os.scandir(keys_dir), key=lambda e: e.name):
+        if entry.name.startswith(".") or not entry.is_file():
+            continue
+        kid, ext = os.path.splitext(entry.name)
+        try:
+            with open(entry.path, "rb") as f:
+                content = f.read()
+            if ext == ".pem":
+                keys[kid] = jwt.JWK.from_pem(content)
+            elif ext == ".json":
+                data = json.loads(content)
+                for key in data["keys"] if "keys" in data else [data]:
+                    keys[key["kid"]] = jwt.JWK(**key)
+        except Exception as e:
+            logger.exception(
+                "Loading key file failed", file=entry.path, exception=str(e)
+            )
+    return keys
+
+
+class KeyRegistry:
+    """
+    the (already parsed) JWS verification keys indexed by key ID (kid). The keys
+    are taken from the settings ('JWT_VERIFICATION_KEYS') and - if configured -
+    from a directory (keys from the directory take precedence). The directory gets
+    checked for changes periodically (see 'run'), so keys can be rotated without
+    a restart.
+    """
+
+    def __init__(self, keys_dir: str | None, reload_interval_secs: float):
+        self.keys_dir = keys_dir
+        self.reload_interval_secs = reload_interval_secs
+        self._keys: Dict[str, jwt.JWK] = {}
+        self._dir_state: Tuple | None = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, kid: str) -> jwt.JWK | None:
+        return self._keys.get(kid)
+
+    def _get_dir_state(self) -> Tuple | None:
+        """some 'fingerprint' of the keys directory used to detect changes"""
+        if not self.keys_dir:
+            return None
+        return tuple(
+            sorted(
+                (e.name, e.stat().st_mtime_ns, e.stat().st_size)
+                for e in os.scandir(self.keys_dir)
+                if not e.name.startswith(".") and e.is_file()
+            )
+        )
+
+    def load(self) -> None:
+        """(re)builds the registry from the settings and the keys directory"""
+        dir_state = self._get_dir_state()
+        keys = {
+            kid: get_key_from_pem(value["key"].encode("utf-8"))
+            for kid, value in settings.jwt_verification_keys.items()
+        }
+        if self.keys_dir:
+            keys |= load_keys_from_dir(self.keys_dir)
+        # replace all keys at once
+        self._keys = keys
+        self._dir_state = dir_state
+        logger.info("Keys loaded", nof_keys=len(keys), keys_dir=self.keys_dir)
+
+    def reload(self) -> bool:
+        """
+        reloads the keys, if the keys directory has changed
+        :return: True, if the keys have been reloaded
+        """
+        if self._get_dir_state() == self._dir_state:
+            return False
+        self.load()
+        return True
+
+    async def run(self, on_change: Callable[[], Any] | None = None) -> None:
+        """
+        checks the keys directory for changes every 'reload_interval_secs' seconds
+        (until cancelled)
+        :param on_change: an optional callback called after the keys have changed
+        """
+        while True:
+            await asyncio.sleep(self.reload_interval_secs)
+            try:
+                if self.reload() and on_change:
+                    on_change()
+            except Exception as e:
+                logger.exception("Reloading keys failed", exception=str(e))
+
+
+key_registry = KeyRegistry(
+    settings.jwt_verification_keys_dir,
+    settings.jwt_verification_keys_reload_interval_secs,
+)
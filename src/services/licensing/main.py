@@ -1,3 +1,4 @@
+import asyncio
 import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
@@ -20,6 +21,10 @@ from services.licensing.exceptions import HTTPException
 from services.licensing import __version__ as version
 from services.licensing.logging import setup_logging, LogLevel
 from services.licensing.api.v1.api import api_router
+from services.licensing.authorization import claims_cache
+from services.licensing.crypto import crypto_executor
+from services.licensing.keys import key_registry
+from services.licensing.seat_access import seat_access_buffer
 
 
 setup_logging(settings.log_format, settings.log_level)
@@ -28,9 +33,35 @@ error_logger = structlog.stdlib.get_logger("api.error")
 exception_logger = structlog.stdlib.get_logger("api.exception")
 
 
+def on_keys_changed() -> None:
+    # tokens verified with keys, which are gone now, must not be accepted anymore
+    claims_cache.clear()
+    # worker processes (if any) pre-load the keys, so they have to be replaced
+    if crypto_executor.kind == "process":
+        crypto_executor.restart()
+
+
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncGenerator[None, None]:
+    key_registry.load()
+    reload_keys = (
+        asyncio.create_task(key_registry.run(on_change=on_keys_changed))
+        if key_registry.keys_dir
+        else None
+    )
+    flush_seat_accesses = (
+        asyncio.create_task(seat_access_buffer.run())
+        if seat_access_buffer.enabled
+        else None
+    )
     yield
+    if flush_seat_accesses:
+        flush_seat_accesses.cancel()
+        # flush the remaining seat accesses
+        await seat_access_buffer.flush()
+    if reload_keys:
+        reload_keys.cancel()
+    crypto_executor.shutdown()
 
 
 app = FastAPI(
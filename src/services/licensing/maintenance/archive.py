@@ -0,0 +1,60 @@
+import datetime
+from typing import Tuple
+
+import structlog
+
+from services.licensing import settings
+from services.licensing.business.service import LicensingService
+
+logger = structlog.stdlib.get_logger(__name__)
+
+
+async def archive(
+    released_seats_after_days: int = settings.archive_released_seats_after_days,
+    expired_licenses_after_days: int = settings.archive_expired_licenses_after_days,
+    rows_per_run: int = 1000,
+) -> Tuple[int, int]:
+    """
+    moves released seats and long expired licenses (with all their seats) to the
+    archive tables (in chunks of 'rows_per_run' seats or licenses), so the tables
+    used for the permissions requests (and their indexes) stay small. This function
+    is called by some scheduling mechanism ...
+    :param released_seats_after_days: archive seats released more than n days ago
+    :param expired_licenses_after_days: archive licenses expired more than n days ago
+    :param rows_per_run: number of seats or licenses to archive per transaction
+    :return: the number of archived licenses and seats
+    """
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    released_before = now - datetime.timedelta(days=released_seats_after_days)
+    expired_before = now.date() - datetime.timedelta(days=expired_licenses_after_days)
+
+    nof_licenses, nof_seats = 0, 0
+    while True:
+        async with settings.transaction_manager() as tm:
+            licenses, seats = await LicensingService(
+                settings.repository(tm.session)
+            ).archive_expired_licenses(expired_before, limit=rows_per_run)
+            # commit after each chunk!
+            await tm.commit()
+        nof_licenses, nof_seats = nof_licenses + licenses, nof_seats + seats
+        if licenses < rows_per_run:
+            break
+
+    while True:
+        async with settings.transaction_manager() as tm:
+            seats = await LicensingService(
+                settings.repository(tm.session)
+            ).archive_released_seats(released_before, limit=rows_per_run)
+            await tm.commit()
+        nof_seats += seats
+        if seats < rows_per_run:
+            break
+
+    logger.info(
+        "Seats and licenses have been archived",
+        archived_licenses=nof_licenses,
+        archived_seats=nof_seats,
+        released_before=released_before.isoformat(),
+        expired_before=expired_before.isoformat(),
+    )
+    return nof_licenses, nof_seats
@@ -0,0 +1,52 @@
+import structlog
+
+from services.licensing import settings
+from services.licensing.business.service import LicensingService
+
+logger = structlog.stdlib.get_logger(__name__)
+
+
+async def reconcile_seats(licenses_per_run: int = 1000, dry_run: bool = False) -> int:
+    """
+    recounts the occupied seats of all licenses (in chunks of 'licenses_per_run'
+    licenses) and repairs the denormalized number of occupied seats of a license,
+    wherever it has drifted from the actual number. This function is called by
+    some scheduling mechanism ...
+    :param licenses_per_run: number of licenses to recount per transaction
+    :param dry_run: only report drifted licenses, do not repair them
+    :return: the number of drifted licenses
+    """
+    nof_drifted_licenses, last_license_id = 0, 0
+    while True:
+        async with settings.transaction_manager() as tm:
+            service = LicensingService(settings.repository(tm.session))
+
+            license_ids = await service.get_license_ids(
+                after_id=last_license_id, limit=licenses_per_run
+            )
+            if not license_ids:
+                break
+
+            repaired = await service.recount_occupied_seats(license_ids)
+            for license_id, nof_occupied_seats in repaired.items():
+                logger.warn(
+                    "Number of occupied seats has drifted",
+                    license_id=license_id,
+                    nof_occupied_seats=nof_occupied_seats,
+                    repaired=not dry_run,
+                )
+            if dry_run:
+                await tm.rollback()
+            else:
+                # commit after each chunk!
+                await tm.commit()
+
+            nof_drifted_licenses += len(repaired)
+            last_license_id = license_ids[-1]
+
+    logger.info(
+        "Occupied seats have been reconciled",
+        drifted_licenses=nof_drifted_licenses,
+        dry_run=dry_run,
+    )
+    return nof_drifted_licenses
@@ -1,18 +1,53 @@
-from typing import Tuple, List, Any
+import base64
+import json
+from typing import Generic, Tuple, List, Any, TypeVar
+
+from fastapi import Query, status as http_status
+from fastapi.encoders import jsonable_encoder
 from fastapi_pagination.customization import CustomizedPage, UseParamsFields
 from fastapi_pagination.links import Page
+from fastapi_pagination.links.bases import create_links
 from fastapi_pagination.utils import verify_params
+from pydantic import BaseModel
 
 from services.licensing import settings
+from services.licensing.exceptions import HTTPException
 
+T = TypeVar("T")
 
 CustomPage = CustomizedPage[
     Page, UseParamsFields(size=settings.pagination_default_pagesize)
 ]
 
 
-def paginate(items: List[Any], page: int, page_size: int, total: int):
-    """simple wrapper to apply pagination"""
+class CursorPage(BaseModel, Generic[T]):
+    """a page of a 'cursor paginated' route (see 'get_cursor_parameters')"""
+
+    items: List[T]
+    size: int
+    # the cursor of the next page (None: there is no next page)
+    next_cursor: str | None = None
+
+
+def paginate(items: List[Any], page: int, page_size: int, total: int | None):
+    """
+    simple wrapper to apply pagination. Without a total, neither the number of
+    pages nor the 'last' link are known, a 'next' link is given for full pages.
+    """
+    if total is None:
+        return CustomPage(
+            items=items,
+            page=page,
+            size=max(len(items), 1),
+            total=None,
+            pages=None,
+            links=create_links(
+                first={"page": 1},
+                last=None,
+                next={"page": page + 1} if len(items) >= page_size else None,
+                prev={"page": page - 1} if page > 1 else None,
+            ),
+        )
     return CustomPage(
         items=items,
         page=page,
@@ -32,3 +67,56 @@ def get_pagination_parameters() -> Tuple[int, int]:
     """
     params, _ = verify_params(None, "limit-offset")
     return params.page, params.size
+
+
+def encode_cursor(keys: List[Any]) -> str:
+    """helper: an opaque cursor for the keys (order by values) of the last item"""
+    return base64.urlsafe_b64encode(
+        json.dumps(jsonable_encoder(keys), separators=(",", ":")).encode("utf-8")
+    ).decode("ascii")
+
+
+def decode_cursor(cursor: str | None) -> List[Any] | None:
+    """
+    helper: the keys (order by values) of the last item from an opaque cursor
+    :raises: 400, if the cursor is invalid
+    """
+    if not cursor:
+        return None
+    try:
+        keys = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except ValueError:
+        keys = None
+    if not isinstance(keys, list):
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST, message="Invalid cursor"
+        )
+    return keys
+
+
+def get_cursor_parameters(
+    cursor: str = Query(None),
+    size: int = Query(
+        settings.pagination_default_pagesize,
+        ge=settings.pagination_min_pagesize,
+        le=settings.pagination_max_pagesize,
+    ),
+) -> Tuple[List[Any] | None, int]:
+    """
+    dependency for 'cursor paginated' routes: instead of page numbers, the
+    'next_cursor' of the former page is passed to get the next page (no cursor
+    gets the first page).
+    :return: the keys of the last item of the former page and the page size
+    """
+    return decode_cursor(cursor), size
+
+
+def cursor_paginate(
+    items: List[Any], page_size: int, keys: List[Any] | None
+) -> CursorPage:
+    """simple wrapper to apply cursor pagination"""
+    return CursorPage(
+        items=items,
+        size=page_size,
+        next_cursor=encode_cursor(keys) if keys is not None else None,
+    )
@@ -0,0 +1,59 @@
+import asyncio
+import click
+
+from services.licensing import settings
+from services.licensing.maintenance.archive import archive
+from services.licensing.logging import setup_logging
+
+
+@click.command()
+@click.option(
+    "--released-seats-after-days",
+    default=settings.archive_released_seats_after_days,
+    show_default=True,
+    help="archive seats released more than n days ago",
+)
+@click.option(
+    "--expired-licenses-after-days",
+    default=settings.archive_expired_licenses_after_days,
+    show_default=True,
+    help="archive licenses (with all their seats) expired more than n days ago",
+)
+@click.option(
+    "--rows-per-run",
+    default=1000,
+    show_default=True,
+    help="seats or licenses per run",
+)
+@click.option(
+    "--log-format",
+    default="json",
+    type=click.Choice(["json", "console"]),
+    show_default=True,
+    help="Sets the format for the logger",
+)
+@click.option(
+    "--log-level",
+    default="INFO",
+    show_default=True,
+    type=click.Choice(["CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG"]),
+    help="Sets the logging level for the logger",
+)
+def main(
+    released_seats_after_days,
+    expired_licenses_after_days,
+    rows_per_run,
+    log_format,
+    log_level,
+):
+    setup_logging(log_format, log_level)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(
+        archive(released_seats_after_days, expired_licenses_after_days, rows_per_run)
+    )
+
+
+if __name__ == "__main__":
+    main()
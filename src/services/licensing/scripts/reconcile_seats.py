@@ -0,0 +1,41 @@
+import asyncio
+import click
+
+from services.licensing.maintenance.reconcile_seats import reconcile_seats
+from services.licensing.logging import setup_logging
+
+
+@click.command()
+@click.option(
+    "--licenses-per-run", default=1000, show_default=True, help="licenses per run"
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="Only report licenses with drifted seat counts, do not repair them",
+)
+@click.option(
+    "--log-format",
+    default="json",
+    type=click.Choice(["json", "console"]),
+    show_default=True,
+    help="Sets the format for the logger",
+)
+@click.option(
+    "--log-level",
+    default="INFO",
+    show_default=True,
+    type=click.Choice(["CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG"]),
+    help="Sets the logging level for the logger",
+)
+def main(licenses_per_run, dry_run, log_format, log_level):
+    setup_logging(log_format, log_level)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(reconcile_seats(licenses_per_run, dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import asyncio
+import datetime
+from typing import Dict
+
+import structlog
+
+from services.licensing import settings
+
+logger = structlog.stdlib.get_logger(__name__)
+
+
+def is_seat_access_due(
+    last_accessed_at: datetime.datetime | None, now: datetime.datetime
+) -> bool:
+    """
+    checks, if an access of a seat has to be persisted: only if the stored
+    'last_accessed_at' is older than the configured granularity.
+    """
+    return last_accessed_at is None or (
+        (now - last_accessed_at).total_seconds()
+        >= settings.seat_access_granularity_secs
+    )
+
+
+class SeatAccessBuffer:
+    """
+    buffers the (latest) access timestamps of seats in memory. The buffer gets
+    flushed in bulk by some background task (see 'run').
+    A buffer with a 'flush_interval_secs' of 0 (or less) is disabled.
+    """
+
+    def __init__(self, flush_interval_secs: float):
+        self.flush_interval_secs = flush_interval_secs
+        # seat id -> latest access timestamp
+        self._accesses: Dict[int, datetime.datetime] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.flush_interval_secs > 0
+
+    def __len__(self) -> int:
+        return len(self._accesses)
+
+    def add(self, seat_id: int, accessed_at: datetime.datetime) -> None:
+        if seat_id not in self._accesses or self._accesses[seat_id] < accessed_at:
+            self._accesses[seat_id] = accessed_at
+
+    async def flush(self) -> int:
+        """
+        writes all buffered access timestamps in one transaction
+        :return: the number of flushed seat accesses
+        """
+        if not self._accesses:
+            return 0
+        accesses, self._accesses = self._accesses, {}
+        try:
+            async with settings.transaction_manager() as tm:
+                await settings.repository(tm.session).update_seats_last_accessed_at(
+                    accesses
+                )
+                await tm.commit()
+        except Exception:
+            # keep the accesses for the next run (newer accesses win)
+            for seat_id, accessed_at in accesses.items():
+                self.add(seat_id, accessed_at)
+            raise
+        return len(accesses)
+
+    async def run(self) -> None:
+        """
+        flushes the buffer every 'flush_interval_secs' seconds (until cancelled)
+        """
+        while True:
+            await asyncio.sleep(self.flush_interval_secs)
+            try:
+                nof_accesses = await self.flush()
+                if nof_accesses:
+                    logger.debug("Seat accesses flushed", nof_accesses=nof_accesses)
+            except Exception as e:
+                logger.exception("Flushing seat accesses failed", exception=str(e))
+
+
+seat_access_buffer = SeatAccessBuffer(settings.seat_access_flush_interval_secs)
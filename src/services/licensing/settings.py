@@ -38,6 +38,14 @@ pagination_default_pagesize: int = config(
 )
 pagination_min_pagesize: int = config("PAGINATION_MIN_PAGESIZE", default=1, cast=int)
 pagination_max_pagesize: int = config("PAGINATION_MAX_PAGESIZE", default=1000, cast=int)
+# in-process cache for the totals of paginated listings requested with total mode
+# "cached" (keyed by the query and its parameters, 0 disables the cache)
+pagination_count_cache_ttl_secs: int = config(
+    "PAGINATION_COUNT_CACHE_TTL_SECS", default=60, cast=int
+)
+pagination_count_cache_maxsize: int = config(
+    "PAGINATION_COUNT_CACHE_MAXSIZE", default=10000, cast=int
+)
 
 
 # License common settings
@@ -48,6 +56,12 @@ jwt_verification_keys: Dict[str, Any] = config(
     "JWT_VERIFICATION_KEYS",
     cast=lambda v: json.loads(v),
 )
+# optional directory (e.g. a mounted secret) with additional verification keys
+# ('<kid>.pem' or JWKS '*.json' files), checked for changes every n secs
+jwt_verification_keys_dir: str = config("JWT_VERIFICATION_KEYS_DIR", default=None)
+jwt_verification_keys_reload_interval_secs: int = config(
+    "JWT_VERIFICATION_KEYS_RELOAD_INTERVAL_SECS", default=60, cast=int
+)
 
 # Licensing Service URL is used in the permissions tokens
 licensing_service_url: str = config("LICENSING_SERVICE_URL", default=None)
@@ -65,6 +79,87 @@ licensing_service_private_key: str = config(
 permissions_token_livetime_secs = config(
     "PERMISSIONS_TOKEN_LIVETIME_SECS", default=86400
 )
+# in-process cache of the claims of already verified tokens (keyed by a digest of
+# the token). Entries are evicted at the expiration of the token, but kept at most
+# for the given number of secs (0 disables the cache)
+token_claims_cache_ttl_secs: int = config(
+    "TOKEN_CLAIMS_CACHE_TTL_SECS", default=300, cast=int
+)
+token_claims_cache_maxsize: int = config(
+    "TOKEN_CLAIMS_CACHE_MAXSIZE", default=10000, cast=int
+)
+# where tokens get signed and verified: "none" (within the event loop), "thread"
+# (in a thread pool) or "process" (in a process pool with pre-loaded keys)
+crypto_executor_kind: str = config(
+    "CRYPTO_EXECUTOR", default="thread", cast=Choices(["none", "thread", "process"])
+)
+crypto_executor_max_workers: int = config(
+    "CRYPTO_EXECUTOR_MAX_WORKERS", default=4, cast=int
+)
+# permissions tokens (per user, hierarchy provider and accessible products) are
+# reused as long as their remaining livetime is at least the given number of secs
+# (a maxsize of 0 disables the reuse: a new token gets signed for every request)
+permissions_token_cache_maxsize: int = config(
+    "PERMISSIONS_TOKEN_CACHE_MAXSIZE", default=0, cast=int
+)
+permissions_token_reuse_min_remaining_secs: int = config(
+    "PERMISSIONS_TOKEN_REUSE_MIN_REMAINING_SECS", default=3600, cast=int
+)
+# the maximum number of users per 'permissions batch' request
+permissions_batch_max_size: int = config(
+    "PERMISSIONS_BATCH_MAX_SIZE", default=1000, cast=int
+)
+# the maximum number of entities per 'entity licenses batch' request
+entity_licenses_batch_max_size: int = config(
+    "ENTITY_LICENSES_BATCH_MAX_SIZE", default=1000, cast=int
+)
+# how licenses are looked up by their owners: by the (GIN indexed) 'owner_eids'
+# of the licenses ("array") or by the normalized 'license_owner' table ("table").
+# The table is always kept up to date, so the storage can be switched any time.
+license_owners_storage: str = config(
+    "LICENSE_OWNERS_STORAGE", default="array", cast=Choices(["array", "table"])
+)
+# in-process cache for the accessible products of a user (0 disables the cache).
+# Please note: for cached permissions, seats are neither occupied, released nor
+# 'accessed' and no 'PERMISSIONS_REQUESTED' event gets logged!
+# The cache is per process: changed licenses and seats only invalidate the entries
+# of the process (worker) handling the change, so the TTL is the bound for how
+# long other workers may serve outdated (e.g. deleted or changed) licenses.
+permissions_cache_ttl_secs: int = config(
+    "PERMISSIONS_CACHE_TTL_SECS", default=0, cast=int
+)
+permissions_cache_maxsize: int = config(
+    "PERMISSIONS_CACHE_MAXSIZE", default=100000, cast=int
+)
+# optional server side hierarchy store: hierarchy providers may upload snapshots
+# of their hierarchies, so the entity licenses can be looked up without sending
+# the hierarchies with every request
+hierarchy_store_enabled: bool = config(
+    "HIERARCHY_STORE_ENABLED", default=False, cast=bool
+)
+# in-process cache for compiled hierarchies (keyed by the hierarchies hash of the
+# token), bounded by the total number of entities (0 disables the cache). The
+# memoized ancestors of the entities are not counted.
+hierarchy_index_cache_max_entities: int = config(
+    "HIERARCHY_INDEX_CACHE_MAX_ENTITIES", default=200000, cast=int
+)
+# the 'last_accessed_at' of a seat is only persisted, if the stored one is older
+# than this granularity (0 persists every access together with the seat).
+seat_access_granularity_secs: int = config(
+    "SEAT_ACCESS_GRANULARITY_SECS", default=0, cast=int
+)
+# if > 0, seat accesses are buffered in memory and flushed in bulk every n seconds
+seat_access_flush_interval_secs: int = config(
+    "SEAT_ACCESS_FLUSH_INTERVAL_SECS", default=0, cast=int
+)
+# archival (see 'maintenance.archive'): released seats and licenses expired longer
+# than the given number of days ago are moved to the archive tables
+archive_released_seats_after_days: int = config(
+    "ARCHIVE_RELEASED_SEATS_AFTER_DAYS", default=90, cast=int
+)
+archive_expired_licenses_after_days: int = config(
+    "ARCHIVE_EXPIRED_LICENSES_AFTER_DAYS", default=365, cast=int
+)
 
 # Eventlog export function: how to export events for further use ...
 events_export_function = config(
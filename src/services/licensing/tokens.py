@@ -1,8 +1,19 @@
 import datetime
 from functools import lru_cache
+from typing import List
 from jwcrypto import jwt
 
 from services.licensing import settings
+from services.licensing import crypto
+from services.licensing.cache import TTLCache
+
+# all permissions tokens share the same livetime, so a token can be reused until
+# its remaining livetime falls below the configured threshold
+permissions_token_cache = TTLCache(
+    maxsize=settings.permissions_token_cache_maxsize,
+    ttl_secs=int(settings.permissions_token_livetime_secs)
+    - settings.permissions_token_reuse_min_remaining_secs,
+)
 
 
 @lru_cache(maxsize=64)
@@ -42,3 +53,34 @@ def create_licensing_token(claims: dict):
     )
     token.make_signed_token(get_key_from_pem(settings.licensing_service_private_key))
     return token.serialize()
+
+
+async def create_permissions_token(
+    sub: str, hierarchy_provider_uri: str, accessible_products: List[str]
+) -> str:
+    """
+    creates a 'permissions token' for a user. As signing is expensive, a token
+    issued earlier for the same user, hierarchy provider and accessible products
+    is reused (if enabled, see 'permissions_token_cache').
+    :param sub: the user EID
+    :param hierarchy_provider_uri: the issuer of the memberships
+    :param accessible_products: the products accessible by the user
+    :return: the serialized token
+    """
+    key = (sub, hierarchy_provider_uri, tuple(sorted(accessible_products)))
+    if permissions_token_cache.enabled:
+        token = permissions_token_cache.get(key)
+        if token is not None:
+            return token
+    token = await crypto.crypto_executor.run(
+        create_licensing_token,
+        {
+            "iss": settings.licensing_service_url,
+            "exp": get_expiration_timestamp(settings.permissions_token_livetime_secs),
+            "sub": sub,
+            "accessible_products": accessible_products,
+            "hierarchy_provider_uri": hierarchy_provider_uri,
+        },
+    )
+    permissions_token_cache.set(key, token)
+    return token
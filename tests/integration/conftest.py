@@ -18,6 +18,7 @@ from services.licensing.api import endpoints
 from services.licensing.api.v1.api import api_router
 from services.licensing import settings
 from services.licensing.business.service import LicensingService
+from services.licensing.constants import HIERARCHY_STORE_SCOPE
 from services.licensing.custom_types import Entity, SeatStatus, License
 from services.licensing.data.sqlalchemy.unit_of_work import postgres_dsn
 from services.licensing.main import ROUTE_PREFIX
@@ -33,10 +34,14 @@ from tests.conftest import (
 
 
 # we need to import all models here to set up the database ...
-# Please do not remove the following 3 imports!!
+# Please do not remove the following imports!!
 from services.licensing.data.sqlalchemy.model.license import LicenseModel
 from services.licensing.data.sqlalchemy.model.seat import SeatModel
 from services.licensing.data.sqlalchemy.model.event_log import EventLogModel
+from services.licensing.data.sqlalchemy.model.archive import (
+    LicenseArchiveModel,
+    SeatArchiveModel,
+)
 
 # Please do not remove that import!!
 from services.licensing.data.sqlalchemy.model.base import Model
@@ -341,6 +346,23 @@ def teacher_1_hierarchies_authorization_token_no_hierarchies(
     )
 
 
+@pytest.fixture
+def hierarchy_store_authorization_token(
+    teacher_1, hierarchy_provider_1_uri, teacher_1_hierarchies
+):
+    return create_token(
+        HIERARCHY_PROVIDER_KID,
+        hierarchy_provider_1_uri,
+        (
+            datetime.datetime.now(tz=datetime.timezone.utc)
+            + datetime.timedelta(seconds=100)
+        ).timestamp(),
+        teacher_1.eid,
+        hashed_payload("hierarchies", teacher_1_hierarchies)
+        | {"scope": HIERARCHY_STORE_SCOPE},
+    )
+
+
 @pytest.fixture
 def student_1_class_1_memberships(student_1, class_1):
     return [
@@ -358,3 +358,106 @@ async def test_licenses__created_at_format(
         json.loads(response._content)["items"][0]["created_at"],
         "%Y-%m-%dT%H:%M:%S.%f+00:00",
     )
+
+
+@pytest.fixture
+async def license_with_seats(
+    create_license, create_seat, student_1, student_2, student_3
+):
+    license_uuid = "11111111-1111-1111-1111-111111111111"
+    await create_license(id=1, uuid=license_uuid, manager_eid="someone@CH_bettermarks")
+    await create_seat(1, user_eid=student_1.eid)
+    await create_seat(
+        1, user_eid=student_2.eid, is_occupied=False, status=SeatStatus.EXPIRED
+    )
+    await create_seat(1, user_eid=student_3.eid)
+    return license_uuid
+
+
+@pytest.mark.parametrize("route", ["/v1/admin/licenses", "/v1/admin/licenses/cursor"])
+@pytest.mark.asyncio
+async def test_get_licenses_include_seats__ok(
+    route,
+    client: AsyncClient,
+    license_with_seats,
+    admin_backoffice_authorization_token,
+    student_1,
+    student_2,
+    student_3,
+):
+    headers = {"Authorization": f"Bearer {admin_backoffice_authorization_token}"}
+    # by default, just the number of occupied seats
+    response = await client.get(route, headers=headers)
+    assert response.status_code == http_status.HTTP_200_OK
+    (license_,) = json.loads(response._content)["items"]
+    assert license_["nof_occupied_seats"] == 2
+    assert "seats" not in license_
+    assert "released_seats" not in license_
+
+    response = await client.get(f"{route}?include_seats=true", headers=headers)
+    assert response.status_code == http_status.HTTP_200_OK
+    (license_,) = json.loads(response._content)["items"]
+    assert license_["nof_occupied_seats"] == 2
+    assert sorted(s_["user_eid"] for s_ in license_["seats"]) == sorted(
+        [student_1.eid, student_3.eid]
+    )
+    assert [s_["user_eid"] for s_ in license_["released_seats"]] == [student_2.eid]
+
+
+@pytest.mark.asyncio
+async def test_get_license_seats__ok(
+    client: AsyncClient,
+    license_with_seats,
+    admin_backoffice_authorization_token,
+    student_1,
+    student_2,
+    student_3,
+):
+    headers = {"Authorization": f"Bearer {admin_backoffice_authorization_token}"}
+    route = f"/v1/admin/licenses/{license_with_seats}/seats"
+    pages, cursor = [], None
+    while True:
+        response = await client.get(
+            route,
+            params={"size": 2} | ({"cursor": cursor} if cursor else {}),
+            headers=headers,
+        )
+        assert response.status_code == http_status.HTTP_200_OK
+        result = json.loads(response._content)
+        pages.append([(s_["user_eid"], s_["status"]) for s_ in result["items"]])
+        cursor = result["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == [
+        [(student_1.eid, "ACTIVE"), (student_2.eid, "EXPIRED")],
+        [(student_3.eid, "ACTIVE")],
+    ]
+
+    response = await client.get(f"{route}?status=EXPIRED", headers=headers)
+    assert response.status_code == http_status.HTTP_200_OK
+    result = json.loads(response._content)
+    assert [s_["user_eid"] for s_ in result["items"]] == [student_2.eid]
+    assert result["items"][0]["is_occupied"] is False
+    assert result["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_license_seats__404(
+    client: AsyncClient,
+    license_with_seats,
+    admin_backoffice_authorization_token,
+    admin_backoffice_authorization_token_with_filter_restrictions,
+):
+    # no such license ...
+    response = await client.get(
+        "/v1/admin/licenses/99999999-1111-1111-1111-111111111111/seats",
+        headers={"Authorization": f"Bearer {admin_backoffice_authorization_token}"},
+    )
+    assert response.status_code == http_status.HTTP_404_NOT_FOUND
+    # ... or not accessible due to the filter restrictions of the token
+    token = admin_backoffice_authorization_token_with_filter_restrictions
+    response = await client.get(
+        f"/v1/admin/licenses/{license_with_seats}/seats",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == http_status.HTTP_404_NOT_FOUND
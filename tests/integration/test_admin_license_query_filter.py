@@ -7,7 +7,10 @@ from freezegun import freeze_time
 
 import pytest
 
+from services.licensing import settings
 from services.licensing.custom_types import SeatStatus
+from services.licensing.data.sqlalchemy.repository import licenses_query
+from tests.conftest import create_token, BACKOFFICE_KID
 
 
 @pytest.fixture
@@ -72,6 +75,14 @@ async def licenses_for_filtering(
         "valid_to=2022-12-31",
         "valid_to=2024-12-31",
         "valid_from=2022-05-31&valid_to=2025-10-31",
+        "manager_eid=teacher_1.eid&match_mode=exact",
+        "manager_eid=DE_bettermarks&match_mode=exact",
+        "manager_eid=teacher&match_mode=prefix",
+        "manager_eid=DE_bet&match_mode=prefix",
+        "product_eid=pro&match_mode=exact",
+        "owner_eid=class_1.eid&match_mode=exact",
+        "owner_eid=class_1&match_mode=exact",
+        "owner_eid=class&match_mode=prefix",
     ]
 )
 def licenses_filters(
@@ -149,6 +160,22 @@ def licenses_filters(
                 ("valid_from", datetime.date(2022, 5, 31)),
                 ("valid_to", datetime.date(2025, 10, 31)),
             ], [16, 8]
+        case "manager_eid=teacher_1.eid&match_mode=exact":
+            return [("manager_eid", teacher_1.eid), ("match_mode", "exact")], [8, 8]
+        case "manager_eid=DE_bettermarks&match_mode=exact":
+            return [("manager_eid", "DE_bettermarks"), ("match_mode", "exact")], [0, 0]
+        case "manager_eid=teacher&match_mode=prefix":
+            return [("manager_eid", "teacher"), ("match_mode", "prefix")], [16, 8]
+        case "manager_eid=DE_bet&match_mode=prefix":
+            return [("manager_eid", "DE_bet"), ("match_mode", "prefix")], [0, 0]
+        case "product_eid=pro&match_mode=exact":
+            return [("product_eid", "pro"), ("match_mode", "exact")], [0, 0]
+        case "owner_eid=class_1.eid&match_mode=exact":
+            return [("owner_eid", class_1.eid), ("match_mode", "exact")], [4, 2]
+        case "owner_eid=class_1&match_mode=exact":
+            return [("owner_eid", "class_1"), ("match_mode", "exact")], [0, 0]
+        case "owner_eid=class&match_mode=prefix":
+            return [("owner_eid", "class"), ("match_mode", "prefix")], [8, 4]
         case _:
             raise ValueError
 
@@ -272,3 +299,114 @@ async def test_license_filter_redeemed_seats__ok(
     )
     assert response.status_code == http_status.HTTP_200_OK
     assert len(json.loads(response._content)["items"]) == 1
+
+
+@pytest.mark.parametrize(
+    "filter_restrictions, expected_status, expected_nof_licenses",
+    [
+        ({"manager_eid": ["DE_bettermarks"]}, http_status.HTTP_200_OK, 8),
+        ({"manager_eid": {"contains": ["DE_bet"]}}, http_status.HTTP_200_OK, 8),
+        ({"manager_eid": {"prefix": ["teacher_2@"]}}, http_status.HTTP_200_OK, 8),
+        ({"manager_eid": {"prefix": ["DE_bettermarks"]}}, http_status.HTTP_200_OK, 0),
+        (
+            {"manager_eid": {"exact": ["teacher_1@DE_bettermarks", "unknown"]}},
+            http_status.HTTP_200_OK,
+            8,
+        ),
+        ({"manager_eid": {"exact": ["DE_bettermarks"]}}, http_status.HTTP_200_OK, 0),
+        ({"manager_eid": {"fuzzy": ["DE"]}}, http_status.HTTP_400_BAD_REQUEST, None),
+        ({"manager_eid": {"exact": "DE"}}, http_status.HTTP_400_BAD_REQUEST, None),
+    ],
+)
+@pytest.mark.asyncio
+async def test_licenses_filter_restrictions_match_mode(
+    filter_restrictions,
+    expected_status,
+    expected_nof_licenses,
+    client: AsyncClient,
+    licenses_for_filtering,  # needed, do not remove
+    admin_1_eid,
+    backoffice_1_uri,
+):
+    token = create_token(
+        BACKOFFICE_KID,
+        backoffice_1_uri,
+        (
+            datetime.datetime.now(tz=datetime.timezone.utc)
+            + datetime.timedelta(seconds=100)
+        ).timestamp(),
+        admin_1_eid,
+        {"filter_restrictions": filter_restrictions},
+    )
+    response = await client.get(
+        "/v1/admin/licenses", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == expected_status
+    if expected_nof_licenses is not None:
+        assert len(json.loads(response._content)["items"]) == expected_nof_licenses
+
+
+@pytest.mark.parametrize("storage", ["array", "table"])
+@pytest.mark.parametrize(
+    "filters, expected_uuids",
+    [
+        (
+            "",
+            [
+                "11111111-1111-1111-1111-111111111111",
+                "22222222-1111-1111-1111-111111111111",
+            ],
+        ),
+        ("owner_eid=school_", ["11111111-1111-1111-1111-111111111111"]),
+        (
+            "owner_eid=school_4&match_mode=prefix",
+            ["11111111-1111-1111-1111-111111111111"],
+        ),
+        (
+            "owner_eid=school_42&match_mode=exact",
+            ["11111111-1111-1111-1111-111111111111"],
+        ),
+        ("owner_eid=class_1", ["22222222-1111-1111-1111-111111111111"]),
+        ("owner_eid=unknown", []),
+    ],
+)
+@pytest.mark.asyncio
+async def test_licenses_filter_owner_eid__many_owners(
+    storage,
+    filters,
+    expected_uuids,
+    mocker,
+    client: AsyncClient,
+    create_license,
+    school_1,
+    class_1,
+    admin_backoffice_authorization_token,
+):
+    mocker.patch.object(settings, "license_owners_storage", storage)
+    await create_license(
+        id=1,
+        uuid="11111111-1111-1111-1111-111111111111",
+        owner_type=school_1.type_,
+        owner_level=school_1.level,
+        owner_eids=[f"school_{i_}" for i_ in range(500)],
+    )
+    await create_license(
+        id=2, uuid="22222222-1111-1111-1111-111111111111", owner_eids=[class_1.eid]
+    )
+    response = await client.get(
+        f"/v1/admin/licenses?order_by=uuid&{filters}",
+        headers={"Authorization": f"Bearer {admin_backoffice_authorization_token}"},
+    )
+    assert response.status_code == http_status.HTTP_200_OK
+    result = json.loads(response._content)
+    # every license once, regardless of its number of (matching) owners
+    assert [i_["uuid"] for i_ in result["items"]] == expected_uuids
+    assert result["total"] == len(expected_uuids)
+
+
+@pytest.mark.parametrize("owner_eid", [None, "school_1"])
+def test_licenses_query__no_join_no_distinct(owner_eid):
+    sql = str(licenses_query({}, [], owner_eid=owner_eid))
+    assert "JOIN" not in sql
+    assert "DISTINCT" not in sql
+    assert ("EXISTS" in sql) == (owner_eid is not None)
@@ -0,0 +1,145 @@
+import datetime
+import json
+
+import pytest
+from fastapi import status as http_status
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from services.licensing.custom_types import SeatStatus
+from services.licensing.data.sqlalchemy.model.license_owner import LicenseOwnerModel
+from services.licensing.maintenance.archive import archive
+from services.licensing.settings import transaction_manager
+
+LICENSE_UUID_1 = "11111111-1111-1111-1111-111111111111"
+LICENSE_UUID_2 = "22222222-2222-2222-2222-222222222222"
+LICENSE_UUID_3 = "33333333-3333-3333-3333-333333333333"
+
+
+async def get_seats(client, token, license_uuid, **params):
+    response = await client.get(
+        f"/v1/admin/licenses/{license_uuid}/seats",
+        params=params,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == http_status.HTTP_200_OK
+    return [s_["user_eid"] for s_ in json.loads(response._content)["items"]]
+
+
+async def get_license(client, token, license_uuid, **params):
+    response = await client.get(
+        f"/v1/admin/licenses/{license_uuid}",
+        params=params,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == http_status.HTTP_200_OK
+    return json.loads(response._content)
+
+
+@pytest.mark.asyncio
+async def test_archive__released_seats(
+    client: AsyncClient,
+    create_license,
+    create_seat,
+    admin_backoffice_authorization_token,
+    student_1,
+    student_2,
+    student_3,
+):
+    token = admin_backoffice_authorization_token
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    await create_license(
+        id=1, uuid=LICENSE_UUID_1, valid_to=datetime.date.today().replace(year=2099)
+    )
+    await create_seat(1, user_eid=student_1.eid)
+    # released long ago ...
+    await create_seat(
+        1, user_eid=student_2.eid, is_occupied=False, status=SeatStatus.EXPIRED
+    )
+    # ... and just now
+    await create_seat(
+        1,
+        user_eid=student_3.eid,
+        occupied_at=now,
+        is_occupied=False,
+        status=SeatStatus.EXPIRED,
+    )
+
+    assert await archive(released_seats_after_days=30) == (0, 1)
+    assert await get_seats(client, token, LICENSE_UUID_1) == [
+        student_1.eid,
+        student_3.eid,
+    ]
+    assert await get_seats(client, token, LICENSE_UUID_1, archived="true") == [
+        student_2.eid
+    ]
+    assert (await get_license(client, token, LICENSE_UUID_1))["nof_occupied_seats"] == 1
+
+    # nothing left to archive
+    assert await archive(released_seats_after_days=30) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_archive__expired_licenses(
+    client: AsyncClient,
+    create_license,
+    create_seat,
+    admin_backoffice_authorization_token,
+    admin_backoffice_authorization_token_with_filter_restrictions,
+    product_1_eid,
+    product_2_eid,
+    student_1,
+    student_2,
+):
+    token = admin_backoffice_authorization_token
+    today = datetime.date.today()
+    # expired long ago
+    for id_, uuid, product_eid in [
+        (1, LICENSE_UUID_1, product_1_eid),
+        (2, LICENSE_UUID_2, product_2_eid),
+    ]:
+        await create_license(
+            id=id_,
+            uuid=uuid,
+            product_eid=product_eid,
+            manager_eid="someone@CH_bettermarks",
+        )
+    await create_seat(1, user_eid=student_1.eid)
+    await create_seat(
+        1, user_eid=student_2.eid, is_occupied=False, status=SeatStatus.EXPIRED
+    )
+    # expired recently
+    await create_license(id=3, uuid=LICENSE_UUID_3, valid_to=today)
+
+    # (one license per transaction)
+    assert await archive(expired_licenses_after_days=30, rows_per_run=1) == (2, 2)
+
+    # archived licenses are only found, if explicitly requested
+    assert await get_license(client, token, LICENSE_UUID_1) is None
+    license_ = await get_license(client, token, LICENSE_UUID_1, archived="true")
+    assert license_["uuid"] == LICENSE_UUID_1
+    assert license_["nof_occupied_seats"] == 1
+    assert "seats" not in license_
+    assert sorted(
+        await get_seats(client, token, LICENSE_UUID_1, archived="true")
+    ) == sorted([student_1.eid, student_2.eid])
+    assert (await get_license(client, token, LICENSE_UUID_3))["uuid"] == LICENSE_UUID_3
+
+    # ... respecting the filter restrictions of the token
+    assert (
+        await get_license(
+            client,
+            admin_backoffice_authorization_token_with_filter_restrictions,
+            LICENSE_UUID_2,
+            archived="true",
+        )
+        is None
+    )
+
+    # the owners of archived licenses are gone
+    async with transaction_manager() as tm:
+        assert (
+            await tm.session.execute(
+                select(func.count()).select_from(LicenseOwnerModel)
+            )
+        ).scalar() == 1
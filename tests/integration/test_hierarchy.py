@@ -7,6 +7,13 @@ from httpx import AsyncClient
 
 import json
 
+from services.licensing.constants import HIERARCHY_STORE_SCOPE
+from services.licensing.data.sqlalchemy.repository import (
+    LicensingRepositorySqlalchemyImpl,
+)
+from tests.conftest import create_token, HIERARCHY_PROVIDER_KID
+from tests.integration.conftest import hashed_payload
+
 
 @pytest.mark.asyncio
 async def test_get_managed_licenses__ok(
@@ -410,3 +417,327 @@ async def test_get_active_license__ok_no_result(
     )
     assert response.status_code == http_status.HTTP_200_OK
     assert json.loads(response._content) is None
+
+
+@pytest.mark.asyncio
+@freeze_time("2023-01-10")
+async def test_get_active_license_batch__ok(
+    mocker,
+    client: AsyncClient,
+    create_license,
+    teacher_1_hierarchies_authorization_token,
+    teacher_1_hierarchies,
+    class_1,
+    class_2,
+    school_1,
+):
+    await create_license(
+        uuid="11111111-aea8-4de2-bcca-7b1945285502",
+        owner_type=school_1.type_,
+        owner_level=school_1.level,
+        owner_eids=[school_1.eid],
+    )
+    await create_license(
+        uuid="22222222-aea8-4de2-bcca-7b1945285502",
+    )
+    query = mocker.spy(
+        LicensingRepositorySqlalchemyImpl, "get_valid_licenses_for_entities"
+    )
+    entities = [
+        {"entity_type": e_.type_, "entity_eid": e_.eid}
+        for e_ in (class_1, school_1, class_2)
+    ]
+    response = await client.put(
+        "/v1/hierarchy/licenses/entity-license/batch",
+        json={"entities": entities, "hierarchies": teacher_1_hierarchies},
+        headers={
+            "Authorization": f"Bearer {teacher_1_hierarchies_authorization_token}"
+        },
+    )
+    assert response.status_code == http_status.HTTP_200_OK
+    assert [
+        (e_["entity_eid"], e_["license"] and e_["license"]["uuid"])
+        for e_ in json.loads(response._content)
+    ] == [
+        (class_1.eid, "22222222-aea8-4de2-bcca-7b1945285502"),
+        (school_1.eid, "11111111-aea8-4de2-bcca-7b1945285502"),
+        (class_2.eid, None),
+    ]
+    # licenses of all entities (and their ancestors) got queried at once
+    assert query.call_count == 1
+
+    response = await client.put(
+        "/v1/hierarchy/licenses/entity-licenses/batch",
+        json={"entities": entities, "hierarchies": teacher_1_hierarchies},
+        headers={
+            "Authorization": f"Bearer {teacher_1_hierarchies_authorization_token}"
+        },
+    )
+    assert response.status_code == http_status.HTTP_200_OK
+    assert [
+        (e_["entity_type"], sorted(l_["uuid"] for l_ in e_["licenses"]))
+        for e_ in json.loads(response._content)
+    ] == [
+        (
+            class_1.type_,
+            [
+                "11111111-aea8-4de2-bcca-7b1945285502",
+                "22222222-aea8-4de2-bcca-7b1945285502",
+            ],
+        ),
+        (school_1.type_, ["11111111-aea8-4de2-bcca-7b1945285502"]),
+        (class_2.type_, []),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_active_license_batch__422_no_entities(
+    client: AsyncClient,
+    teacher_1_hierarchies_authorization_token,
+    teacher_1_hierarchies,
+):
+    response = await client.put(
+        "/v1/hierarchy/licenses/entity-license/batch",
+        json={"entities": [], "hierarchies": teacher_1_hierarchies},
+        headers={
+            "Authorization": f"Bearer {teacher_1_hierarchies_authorization_token}"
+        },
+    )
+    assert response.status_code == http_status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+@freeze_time("2023-01-10")
+async def test_hierarchy_store__ok(
+    mocker,
+    client: AsyncClient,
+    create_license,
+    hierarchy_store_authorization_token,
+    teacher_1_hierarchies,
+    class_1,
+    class_2,
+    school_1,
+):
+    mocker.patch("services.licensing.settings.hierarchy_store_enabled", True)
+    await create_license(
+        uuid="11111111-aea8-4de2-bcca-7b1945285502",
+        owner_type=school_1.type_,
+        owner_level=school_1.level,
+        owner_eids=[school_1.eid],
+    )
+    await create_license(
+        uuid="22222222-aea8-4de2-bcca-7b1945285502",
+    )
+    headers = {"Authorization": f"Bearer {hierarchy_store_authorization_token}"}
+    entities = [
+        {"entity_type": e_.type_, "entity_eid": e_.eid}
+        for e_ in (class_1, school_1, class_2)
+    ]
+
+    # nothing stored yet: just the licenses of the entities themselves
+    response = await client.put(
+        "/v1/hierarchy/stored/licenses/entity-licenses",
+        json={"entities": entities},
+        headers=headers,
+    )
+    assert response.status_code == http_status.HTTP_200_OK
+    assert [
+        sorted(l_["uuid"] for l_ in e_["licenses"])
+        for e_ in json.loads(response._content)
+    ] == [
+        ["22222222-aea8-4de2-bcca-7b1945285502"],
+        ["11111111-aea8-4de2-bcca-7b1945285502"],
+        [],
+    ]
+
+    # storing the same snapshot twice replaces the stored hierarchies
+    for _ in range(2):
+        response = await client.put(
+            "/v1/hierarchy/snapshot",
+            json={"hierarchies": teacher_1_hierarchies},
+            headers=headers,
+        )
+        assert response.status_code == http_status.HTTP_200_OK
+        snapshot = json.loads(response._content)
+        assert snapshot["nof_entities"] > 0
+        assert snapshot["nof_ancestors"] > 0
+
+    response = await client.put(
+        "/v1/hierarchy/stored/licenses/entity-licenses",
+        json={"entities": entities},
+        headers=headers,
+    )
+    assert response.status_code == http_status.HTTP_200_OK
+    assert [
+        sorted(l_["uuid"] for l_ in e_["licenses"])
+        for e_ in json.loads(response._content)
+    ] == [
+        [
+            "11111111-aea8-4de2-bcca-7b1945285502",
+            "22222222-aea8-4de2-bcca-7b1945285502",
+        ],
+        ["11111111-aea8-4de2-bcca-7b1945285502"],
+        [],
+    ]
+
+    response = await client.put(
+        "/v1/hierarchy/stored/licenses/entity-license",
+        json={"entities": entities},
+        headers=headers,
+    )
+    assert response.status_code == http_status.HTTP_200_OK
+    assert [
+        e_["license"] and e_["license"]["uuid"] for e_ in json.loads(response._content)
+    ] == [
+        "22222222-aea8-4de2-bcca-7b1945285502",
+        "11111111-aea8-4de2-bcca-7b1945285502",
+        None,
+    ]
+
+
+def hierarchy_store_token(teacher, hierarchy_provider_uri, hierarchies, scope):
+    """helper: a token of a hierarchy provider for the hierarchy store"""
+    return create_token(
+        HIERARCHY_PROVIDER_KID,
+        hierarchy_provider_uri,
+        (
+            datetime.datetime.now(tz=datetime.timezone.utc)
+            + datetime.timedelta(seconds=100)
+        ).timestamp(),
+        teacher.eid,
+        hashed_payload("hierarchies", hierarchies) | {"scope": scope},
+    )
+
+
+@pytest.mark.asyncio
+@freeze_time("2023-01-10")
+async def test_hierarchy_store__snapshot_replaced(
+    mocker,
+    client: AsyncClient,
+    create_license,
+    hierarchy_provider_1_uri,
+    teacher_1,
+    teacher_1_hierarchies,
+    class_1,
+    school_1,
+):
+    mocker.patch("services.licensing.settings.hierarchy_store_enabled", True)
+    await create_license(
+        uuid="11111111-aea8-4de2-bcca-7b1945285502",
+        owner_type=school_1.type_,
+        owner_level=school_1.level,
+        owner_eids=[school_1.eid],
+    )
+    entities = [{"entity_type": class_1.type_, "entity_eid": class_1.eid}]
+
+    async def store_and_lookup(hierarchies):
+        headers = {
+            "Authorization": "Bearer "
+            + hierarchy_store_token(
+                teacher_1, hierarchy_provider_1_uri, hierarchies, HIERARCHY_STORE_SCOPE
+            )
+        }
+        response = await client.put(
+            "/v1/hierarchy/snapshot",
+            json={"hierarchies": hierarchies},
+            headers=headers,
+        )
+        assert response.status_code == http_status.HTTP_200_OK
+        response = await client.put(
+            "/v1/hierarchy/stored/licenses/entity-licenses",
+            json={"entities": entities},
+            headers=headers,
+        )
+        assert response.status_code == http_status.HTTP_200_OK
+        return [
+            [l_["uuid"] for l_ in e_["licenses"]]
+            for e_ in json.loads(response._content)
+        ]
+
+    assert await store_and_lookup(teacher_1_hierarchies) == [
+        ["11111111-aea8-4de2-bcca-7b1945285502"]
+    ]
+    # the class has been moved out of the school (and out of the snapshot)
+    school = teacher_1_hierarchies[0]["children"][0] | {"children": []}
+    assert await store_and_lookup([school]) == [[]]
+
+
+@pytest.mark.asyncio
+async def test_hierarchy_store__401_403_scope(
+    mocker,
+    client: AsyncClient,
+    hierarchy_provider_1_uri,
+    teacher_1,
+    teacher_1_hierarchies,
+    teacher_1_hierarchies_authorization_token,
+    class_1,
+):
+    mocker.patch("services.licensing.settings.hierarchy_store_enabled", True)
+    entities = [{"entity_type": class_1.type_, "entity_eid": class_1.eid}]
+    for token, status in [
+        # (a token of a user without any scope)
+        (teacher_1_hierarchies_authorization_token, http_status.HTTP_401_UNAUTHORIZED),
+        (
+            hierarchy_store_token(
+                teacher_1, hierarchy_provider_1_uri, teacher_1_hierarchies, "other"
+            ),
+            http_status.HTTP_403_FORBIDDEN,
+        ),
+    ]:
+        headers = {"Authorization": f"Bearer {token}"}
+        response = await client.put(
+            "/v1/hierarchy/snapshot",
+            json={"hierarchies": teacher_1_hierarchies},
+            headers=headers,
+        )
+        assert response.status_code == status
+        response = await client.put(
+            "/v1/hierarchy/stored/licenses/entity-licenses",
+            json={"entities": entities},
+            headers=headers,
+        )
+        assert response.status_code == status
+
+
+@pytest.mark.asyncio
+async def test_hierarchy_store__422_invalid_level(
+    mocker,
+    client: AsyncClient,
+    hierarchy_provider_1_uri,
+    teacher_1,
+    teacher_1_hierarchies,
+):
+    mocker.patch("services.licensing.settings.hierarchy_store_enabled", True)
+    hierarchies = json.loads(json.dumps(teacher_1_hierarchies))
+    hierarchies[0]["children"][0]["children"][0]["level"] = "class"
+    token = hierarchy_store_token(
+        teacher_1, hierarchy_provider_1_uri, hierarchies, HIERARCHY_STORE_SCOPE
+    )
+    response = await client.put(
+        "/v1/hierarchy/snapshot",
+        json={"hierarchies": hierarchies},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == http_status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_hierarchy_store__404_disabled(
+    client: AsyncClient,
+    teacher_1_hierarchies_authorization_token,
+    teacher_1_hierarchies,
+    class_1,
+):
+    headers = {"Authorization": f"Bearer {teacher_1_hierarchies_authorization_token}"}
+    response = await client.put(
+        "/v1/hierarchy/snapshot",
+        json={"hierarchies": teacher_1_hierarchies},
+        headers=headers,
+    )
+    assert response.status_code == http_status.HTTP_404_NOT_FOUND
+    response = await client.put(
+        "/v1/hierarchy/stored/licenses/entity-licenses",
+        json={"entities": [{"entity_type": class_1.type_, "entity_eid": class_1.eid}]},
+        headers=headers,
+    )
+    assert response.status_code == http_status.HTTP_404_NOT_FOUND
@@ -0,0 +1,217 @@
+import datetime
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from services.licensing import settings
+from services.licensing.business.service import LicensingService
+from services.licensing.custom_types import Entity
+from services.licensing.data.sqlalchemy.model.license import LicenseModel
+from services.licensing.data.sqlalchemy.model.license_owner import LicenseOwnerModel
+from services.licensing.data.sqlalchemy.repository import (
+    licenses_owned_by_entities,
+    owned_by_entities,
+    sync_license_owners_queries,
+)
+from services.licensing.settings import repository, transaction_manager
+
+NOF_LICENSES = 100000
+LICENSE_UUID_1 = "11111111-1111-1111-1111-111111111111"
+LICENSE_UUID_2 = "22222222-2222-2222-2222-222222222222"
+LICENSE_UUID_3 = "33333333-3333-3333-3333-333333333333"
+
+
+async def seed_licenses(nof_licenses: int):
+    """seeds licenses owned by (up to) 3 schools each"""
+    async with transaction_manager() as tm:
+        await tm.session.execute(
+            text(
+                """
+                INSERT INTO license (
+                    uuid, hierarchy_provider_uri, product_eid, manager_eid,
+                    owner_type, owner_level, owner_eids, valid_from, valid_to,
+                    nof_seats, extra_seats, is_trial
+                )
+                SELECT
+                    gen_random_uuid(), 'hp_1', 'product_1', 'manager_1',
+                    'school', 2,
+                    ARRAY['school_' || i, 'school_' || (i + 1), 'school_' || (i + 2)],
+                    DATE '2023-01-01', DATE '2023-12-31', 10, 0, false
+                FROM generate_series(1, :nof_licenses) AS i
+                """
+            ),
+            {"nof_licenses": nof_licenses},
+        )
+        await tm.commit()
+        await tm.session.execute(text("ANALYZE license"))
+
+
+async def explain(stmt) -> str:
+    sql = stmt.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    async with transaction_manager() as tm:
+        return "\n".join(
+            r_[0] for r_ in await tm.session.execute(text(f"EXPLAIN {sql}"))
+        )
+
+
+@pytest.mark.asyncio
+async def test_owned_by_entities__ok(app_with_db):
+    await seed_licenses(10)
+    async with transaction_manager() as tm:
+        ids = (
+            (
+                await tm.session.execute(
+                    select(LicenseModel.id)
+                    .where(
+                        owned_by_entities(
+                            [
+                                Entity(type_="school", eid="school_3"),
+                                Entity(type_="school", eid="school_11"),
+                                Entity(type_="class", eid="school_5"),
+                            ]
+                        )
+                    )
+                    .order_by(LicenseModel.id)
+                )
+            )
+            .scalars()
+            .all()
+        )
+    # 'school_3' is owner of licenses 1 - 3, 'school_11' of 9 and 10 and there are
+    # no licenses owned by classes
+    assert ids == [1, 2, 3, 9, 10]
+
+
+@pytest.mark.asyncio
+async def test_owned_by_entities__no_entities(app_with_db):
+    await seed_licenses(10)
+    async with transaction_manager() as tm:
+        assert (
+            await tm.session.execute(
+                select(LicenseModel.id).where(owned_by_entities([]))
+            )
+        ).all() == []
+
+
+@pytest.mark.asyncio
+async def test_owned_by_entities__gin_index_scan(mocker, app_with_db):
+    await seed_licenses(NOF_LICENSES)
+    mocker.patch.object(settings, "license_owners_storage", "array")
+    plan = await explain(
+        licenses_owned_by_entities(
+            [
+                Entity(type_="school", eid="school_42"),
+                Entity(type_="school", eid="school_4711"),
+                Entity(type_="class", eid="class_1"),
+            ],
+            "hp_1",
+        )
+    )
+    assert "Bitmap Index Scan on ix_license_owner_eids" in plan
+    assert "Seq Scan" not in plan
+
+
+async def get_license_owners():
+    async with transaction_manager() as tm:
+        return (
+            await tm.session.execute(
+                select(
+                    LicenseOwnerModel.ref_license,
+                    LicenseOwnerModel.owner_type,
+                    LicenseOwnerModel.owner_eid,
+                    LicenseOwnerModel.valid_to,
+                ).order_by(LicenseOwnerModel.ref_license, LicenseOwnerModel.owner_eid)
+            )
+        ).all()
+
+
+@pytest.mark.asyncio
+async def test_license_owners__written_with_licenses(
+    app_with_db, create_license, update_license, school_1, school_2
+):
+    await create_license(id=1, uuid=LICENSE_UUID_1)
+    await create_license(
+        id=2,
+        uuid=LICENSE_UUID_2,
+        owner_type=school_1.type_,
+        owner_eids=[school_1.eid, school_2.eid, school_1.eid],
+    )
+    assert [(r_[0], r_[2]) for r_ in await get_license_owners()] == [
+        (1, "class_1@DE_bettermarks"),
+        (2, school_1.eid),
+        (2, school_2.eid),
+    ]
+
+    await update_license(
+        LICENSE_UUID_2, owner_eids=[school_2.eid], valid_to=datetime.date(2025, 1, 1)
+    )
+    assert (await get_license_owners())[1:] == [
+        (2, school_1.type_, school_2.eid, datetime.date(2025, 1, 1))
+    ]
+
+    async with transaction_manager() as tm:
+        await LicensingService(repository(tm.session)).delete_license(LICENSE_UUID_2)
+        await tm.commit()
+    assert [r_[0] for r_ in await get_license_owners()] == [1]
+
+
+@pytest.mark.asyncio
+async def test_license_owners__storages_same_result(
+    mocker, app_with_db, create_license, class_1, class_2, school_1
+):
+    await create_license(id=1, uuid=LICENSE_UUID_1, owner_eids=[class_1.eid])
+    await create_license(
+        id=2, uuid=LICENSE_UUID_2, owner_eids=[class_1.eid, class_2.eid]
+    )
+    await create_license(
+        id=3,
+        uuid=LICENSE_UUID_3,
+        owner_type=school_1.type_,
+        owner_eids=[school_1.eid],
+        valid_to=datetime.date(2023, 6, 1),
+    )
+    entities = [class_2, school_1]
+    ids = {}
+    for storage in ("array", "table"):
+        mocker.patch.object(settings, "license_owners_storage", storage)
+        async with transaction_manager() as tm:
+            ids[storage] = [
+                (
+                    await tm.session.execute(
+                        licenses_owned_by_entities(entities, when=when).order_by(
+                            LicenseModel.id
+                        )
+                    )
+                )
+                .scalars()
+                .all()
+                for when in (None, datetime.date(2023, 3, 1), datetime.date(2023, 9, 1))
+            ]
+    assert ids["array"] == ids["table"] == [[2, 3], [2, 3], [2]]
+
+
+@pytest.mark.asyncio
+async def test_license_owners__index_only_scan(mocker, app_with_db):
+    await seed_licenses(NOF_LICENSES)
+    async with transaction_manager() as tm:
+        for query in sync_license_owners_queries(select(LicenseModel.id)):
+            await tm.session.execute(query)
+        await tm.commit()
+        await tm.session.execute(text("ANALYZE license_owner"))
+
+    mocker.patch.object(settings, "license_owners_storage", "table")
+    plan = await explain(
+        licenses_owned_by_entities(
+            [
+                Entity(type_="school", eid="school_42"),
+                Entity(type_="school", eid="school_4711"),
+            ],
+            "hp_1",
+            datetime.date(2023, 6, 1),
+        )
+    )
+    assert "Index Only Scan using ix_license_owner_lookup" in plan
+    assert "Seq Scan" not in plan
@@ -0,0 +1,128 @@
+import pytest
+
+from services.licensing.custom_types import OrderByDirection, SeatStatus
+from services.licensing.settings import transaction_manager, repository
+
+LICENSE_UUID_1 = "11111111-1111-1111-1111-111111111111"
+LICENSE_UUID_2 = "22222222-2222-2222-2222-222222222222"
+
+ORDER_BY_ID = [("id", OrderByDirection.ASC)]
+
+
+@pytest.fixture
+async def licenses_with_seats(
+    app_with_db,
+    create_license,
+    create_seat,
+    product_2_eid,
+    student_1,
+    student_2,
+    student_3,
+):
+    await create_license(id=1, uuid=LICENSE_UUID_1)
+    await create_seat(1, user_eid=student_1.eid)
+    await create_seat(1, user_eid=student_2.eid)
+    await create_seat(
+        1, user_eid=student_3.eid, is_occupied=False, status=SeatStatus.EXPIRED
+    )
+    await create_license(id=2, uuid=LICENSE_UUID_2, product_eid=product_2_eid)
+
+
+def seats(licenses):
+    return [
+        (
+            sorted(s_.user_eid for s_ in l_.seats),
+            sorted(s_.user_eid for s_ in l_.released_seats),
+        )
+        for l_ in licenses
+    ]
+
+
+@pytest.mark.asyncio
+async def test_list_licenses__count_only(
+    licenses_with_seats,
+    hierarchy_provider_1_uri,
+    teacher_1,
+    class_1,
+    student_1,
+    student_2,
+    student_3,
+):
+    async def list_licenses(with_seats):
+        async with transaction_manager() as tm:
+            repo = repository(tm.session)
+            return [
+                (
+                    await repo.get_licenses_paginated(
+                        1, 10, ORDER_BY_ID, {}, [], with_seats=with_seats
+                    )
+                )[0],
+                (
+                    await repo.get_managed_licenses_paginated(
+                        1,
+                        10,
+                        ORDER_BY_ID,
+                        hierarchy_provider_1_uri,
+                        teacher_1.eid,
+                        with_seats=with_seats,
+                    )
+                )[0],
+                (
+                    await repo.get_licenses_for_entities_paginated(
+                        1,
+                        10,
+                        ORDER_BY_ID,
+                        hierarchy_provider_1_uri,
+                        [class_1],
+                        with_seats=with_seats,
+                    )
+                )[0],
+            ]
+
+    # the number of occupied seats only (no seat gets loaded) ...
+    for licenses in await list_licenses(with_seats=False):
+        assert [l_.nof_occupied_seats for l_ in licenses] == [2, 0]
+        assert seats(licenses) == [([], []), ([], [])]
+
+    # ... or the seat lists, too
+    for licenses in await list_licenses(with_seats=True):
+        assert [l_.nof_occupied_seats for l_ in licenses] == [2, 0]
+        assert seats(licenses) == [
+            (sorted([student_1.eid, student_2.eid]), [student_3.eid]),
+            ([], []),
+        ]
+
+
+@pytest.mark.asyncio
+async def test_get_license__count_only(
+    licenses_with_seats,
+    hierarchy_provider_1_uri,
+    teacher_1,
+    student_1,
+    student_2,
+    student_3,
+):
+    async def get_licenses(with_seats):
+        async with transaction_manager() as tm:
+            repo = repository(tm.session)
+            return [
+                await repo.get_license(LICENSE_UUID_1, {}, [], with_seats=with_seats),
+                await repo.get_managed_licenses_by_id(
+                    LICENSE_UUID_1,
+                    hierarchy_provider_1_uri,
+                    teacher_1.eid,
+                    with_seats=with_seats,
+                ),
+            ]
+
+    # the details of a license without its seats (by default) ...
+    licenses = await get_licenses(with_seats=False)
+    assert [l_.nof_occupied_seats for l_ in licenses] == [2, 2]
+    assert seats(licenses) == [([], []), ([], [])]
+
+    # ... or with its seats
+    licenses = await get_licenses(with_seats=True)
+    assert [l_.nof_occupied_seats for l_ in licenses] == [2, 2]
+    assert seats(licenses) == 2 * [
+        (sorted([student_1.eid, student_2.eid]), [student_3.eid])
+    ]
@@ -1,3 +1,4 @@
+import datetime
 import json
 from typing import Tuple
 
@@ -6,6 +7,7 @@ from fastapi import status as http_status
 
 import pytest
 
+from services.licensing.cache import count_cache
 from services.licensing.main import ROUTE_PREFIX
 
 
@@ -141,3 +143,216 @@ async def test_admin_paginate_full__ok(
         "next": f"{route}?order_by=uuid&size=3&page=4",
         "prev": f"{route}?order_by=uuid&size=3&page=2",
     }
+
+
+async def get_all_pages_by_cursor(client, method, route, token, json_body=None):
+    """helper: follows the 'next_cursor' of all pages, returns the pages"""
+    pages, cursor = [], None
+    while True:
+        response = await client.request(
+            method,
+            route + (f"&cursor={cursor}" if cursor else ""),
+            json=json_body,
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == http_status.HTTP_200_OK
+        page = json.loads(response._content)
+        pages.append([i_["uuid"] for i_ in page["items"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "order_by,expected_ids",
+    [
+        ("uuid", [[1, 2, 3], [4, 5, 6], [7, 8, 9], [10]]),
+        ("-uuid", [[10, 9, 8], [7, 6, 5], [4, 3, 2], [1]]),
+        # mixed directions (and equal values, the id is the 'tie breaker')
+        ("is_trial.-owner_eids", [[1, 2, 3], [4, 5, 6], [7, 8, 9], [10]]),
+        ("-is_trial.valid_from", [[1, 2, 3], [4, 5, 6], [7, 8, 9], [10]]),
+    ],
+)
+async def test_paginate_cursor__ok(
+    client: AsyncClient,
+    licenses_route: Tuple,
+    create_many_licenses_with_seats,
+    order_by,
+    expected_ids,
+):
+    await create_many_licenses_with_seats(10)
+    _, route, token, hierarchies = licenses_route
+    assert await get_all_pages_by_cursor(
+        client,
+        "POST",
+        f"{route}/cursor?order_by={order_by}&size=3",
+        token,
+        {"hierarchies": hierarchies},
+    ) == [[f"{i_:08d}-1111-1111-1111-111111111111" for i_ in p_] for p_ in expected_ids]
+
+
+@pytest.mark.asyncio
+async def test_admin_paginate_cursor__ok(
+    client: AsyncClient, licenses_route_admin: Tuple, create_many_licenses_with_seats
+):
+    await create_many_licenses_with_seats(10)
+    _, route, token, _ = licenses_route_admin
+    pages = await get_all_pages_by_cursor(
+        client, "GET", f"{route}/cursor?order_by=-created_at.-uuid&size=4", token
+    )
+    # same result as with page numbers
+    response = await client.get(
+        f"{route}?order_by=-created_at.-uuid&page=1&size=10",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert [len(p_) for p_ in pages] == [4, 4, 2]
+    assert sum(pages, []) == [
+        i_["uuid"] for i_ in json.loads(response._content)["items"]
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not-a-cursor",
+        # base64 encoded JSON, but no list
+        "eyJpZCI6IDF9",
+        # base64 encoded list, but not matching the order by fields
+        "WyJub3QtYS1kYXRlIiwgMV0=",
+        "WzFd",
+    ],
+)
+async def test_admin_paginate_cursor__400_invalid_cursor(
+    client: AsyncClient,
+    licenses_route_admin: Tuple,
+    create_many_licenses_with_seats,
+    cursor,
+):
+    await create_many_licenses_with_seats(2)
+    _, route, token, _ = licenses_route_admin
+    response = await client.get(
+        f"{route}/cursor?order_by=valid_from&cursor={cursor}",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == http_status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_member_paginate_cursor__ok(
+    client: AsyncClient,
+    create_license,
+    teacher_1_memberships_authorization_token,
+    teacher_1_memberships,
+    class_1,
+    class_2,
+):
+    for i_ in range(1, 6):
+        await create_license(
+            id=i_,
+            uuid=f"{i_:08d}-1111-1111-1111-111111111111",
+            owner_eids=[class_1.eid if i_ % 2 else class_2.eid],
+            valid_to=datetime.date(2024, 1, i_),
+        )
+    assert await get_all_pages_by_cursor(
+        client,
+        "POST",
+        "/v1/member/licenses/cursor?order_by=-id&size=2",
+        teacher_1_memberships_authorization_token,
+        {"memberships": teacher_1_memberships},
+    ) == [
+        [f"{i_:08d}-1111-1111-1111-111111111111" for i_ in p_]
+        for p_ in [[5, 4], [3, 2], [1]]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_admin_paginate_total_none__ok(
+    client: AsyncClient, licenses_route_admin: Tuple, create_many_licenses_with_seats
+):
+    await create_many_licenses_with_seats(10)
+    _, route, token, _ = licenses_route_admin
+    response = await client.get(
+        f"{route}?order_by=uuid&page=2&size=3&total_mode=none",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == http_status.HTTP_200_OK
+    result = json.loads(response._content)
+    assert result["total"] is None
+    assert result["pages"] is None
+    assert result["links"]["last"] is None
+    assert (
+        result["links"]["next"]
+        == f"{route}?order_by=uuid&size=3&total_mode=none&page=3"
+    )
+    assert [i_["uuid"] for i_ in result["items"]] == [
+        "00000004-1111-1111-1111-111111111111",
+        "00000005-1111-1111-1111-111111111111",
+        "00000006-1111-1111-1111-111111111111",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_admin_paginate_total_estimated__ok(
+    client: AsyncClient, licenses_route_admin: Tuple, create_many_licenses_with_seats
+):
+    await create_many_licenses_with_seats(10)
+    _, route, token, _ = licenses_route_admin
+    response = await client.get(
+        f"{route}?order_by=uuid&page=3&size=3&total_mode=estimated",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == http_status.HTTP_200_OK
+    result = json.loads(response._content)
+    assert len(result["items"]) == 3
+    # an estimate, but never less than the items up to the requested page
+    assert isinstance(result["total"], int)
+    assert result["total"] >= 9
+    assert result["pages"] >= 3
+
+
+@pytest.mark.asyncio
+async def test_admin_paginate_total_cached__ok(
+    client: AsyncClient,
+    licenses_route_admin: Tuple,
+    create_many_licenses_with_seats,
+    create_license,
+):
+    count_cache.clear()
+    await create_many_licenses_with_seats(10)
+    _, route, token, _ = licenses_route_admin
+
+    async def get_total(query):
+        response = await client.get(
+            f"{route}?{query}", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == http_status.HTTP_200_OK
+        return json.loads(response._content)["total"]
+
+    assert await get_total("order_by=uuid&size=3&total_mode=cached") == 10
+    await create_license(
+        id=11, uuid="00000011-1111-1111-1111-111111111111", owner_eids=["00000011"]
+    )
+    # cached per query (regardless of the requested page) ...
+    assert await get_total("order_by=uuid&page=2&size=3&total_mode=cached") == 10
+    # ... but not for other filters or other total modes
+    assert await get_total("order_by=uuid&total_mode=cached&is_trial=false") == 11
+    assert await get_total("order_by=uuid&size=3") == 11
+
+    count_cache.clear()
+    assert await get_total("order_by=uuid&size=3&total_mode=cached") == 11
+
+    # the validity filter (by the current time) is cached, too
+    today = datetime.date.today()
+    for id_ in (12, 13):
+        await create_license(
+            id=id_,
+            uuid=f"000000{id_}-1111-1111-1111-111111111111",
+            owner_eids=[f"000000{id_}"],
+            valid_from=today - datetime.timedelta(days=1),
+            valid_to=today + datetime.timedelta(days=7),
+        )
+        assert (
+            await get_total("order_by=uuid&size=1&total_mode=cached&is_valid=true") == 1
+        )
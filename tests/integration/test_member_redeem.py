@@ -10,7 +10,8 @@ import pytest
 from services.licensing import settings
 from services.licensing.custom_types import SeatStatus
 from services.licensing.tokens import get_expiration_timestamp
-from tests.integration.conftest import check_license_service_token
+from tests.conftest import create_token, HIERARCHY_PROVIDER_KID
+from tests.integration.conftest import check_license_service_token, hashed_payload
 
 
 #
@@ -66,6 +67,35 @@ async def test_redeem_license__200_ok_one_product(
     )
 
 
+@pytest.mark.asyncio
+@freeze_time("2023-01-01")
+async def test_redeem_license__200_ok_canonical_body(
+    client: AsyncClient,
+    create_license,
+    student_1_class_1_memberships_authorization_token,
+    student_1_class_1_memberships,
+    product_1_eid,
+):
+    """
+    License redeeming ok for a body sent in canonical form (the memberships hash
+    is checked over the raw body)
+    """
+    await create_license(uuid="22222222-aea8-4de2-bcca-7b1945285502")
+
+    response = await client.post(
+        "/v1/member/permissions",
+        content=json.dumps({"memberships": student_1_class_1_memberships}),
+        headers={
+            "Authorization": f"Bearer {student_1_class_1_memberships_authorization_token}",
+            "Content-Type": "application/json",
+        },
+    )
+    assert response.status_code == http_status.HTTP_200_OK
+    assert check_license_service_token(json.loads(response._content))[
+        "accessible_products"
+    ] == [product_1_eid]
+
+
 @pytest.mark.asyncio
 async def test_redeem_license__200_ok_one_product_two_times(
     client: AsyncClient,
@@ -535,3 +565,209 @@ async def test_redeem_license__200_ok_no_overredeeming_extra_seats(
     assert licenses[0]["nof_occupied_seats"] == 2
     assert licenses[0]["nof_seats"] == 1
     assert licenses[0]["nof_free_seats"] == 0
+
+
+@pytest.mark.asyncio
+@freeze_time("2023-06-01")
+async def test_redeem_license__200_ok_best_license_per_product(
+    client: AsyncClient,
+    create_license,
+    product_1_eid,
+    student_1,
+    class_1,
+    school_1,
+    hierarchy_provider_1_uri,
+    teacher_1_hierarchies_authorization_token,
+    teacher_1_hierarchies,
+):
+    """
+    For a product, the seat gets occupied in the license with the minimum owner
+    level and (for same owner level) the maximum number of free seats.
+    """
+    await create_license(uuid="11111111-aea8-4de2-bcca-7b1945285502", nof_seats=10)
+    await create_license(
+        uuid="22222222-aea8-4de2-bcca-7b1945285502",
+        nof_seats=20,
+        valid_from=datetime.date(2023, 1, 2),
+    )
+    await create_license(
+        uuid="33333333-aea8-4de2-bcca-7b1945285502",
+        owner_type=school_1.type_,
+        owner_level=school_1.level,
+        owner_eids=[school_1.eid],
+        nof_seats=100,
+    )
+    memberships = [
+        {"type": class_1.type_, "level": class_1.level, "eid": class_1.eid},
+        {"type": school_1.type_, "level": school_1.level, "eid": school_1.eid},
+    ]
+    token = create_token(
+        HIERARCHY_PROVIDER_KID,
+        hierarchy_provider_1_uri,
+        (
+            datetime.datetime.now(tz=datetime.timezone.utc)
+            + datetime.timedelta(seconds=100)
+        ).timestamp(),
+        student_1.eid,
+        hashed_payload("memberships", memberships),
+    )
+
+    response = await client.post(
+        "/v1/member/permissions",
+        json={"memberships": memberships},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == http_status.HTTP_200_OK
+    assert check_license_service_token(json.loads(response._content))[
+        "accessible_products"
+    ] == [product_1_eid]
+
+    # check seats in db
+    response = await client.post(
+        "/v1/hierarchy/licenses",
+        json={"hierarchies": teacher_1_hierarchies},
+        headers={
+            "Authorization": f"Bearer {teacher_1_hierarchies_authorization_token}"
+        },
+    )
+    assert {
+        l_["uuid"]: l_["nof_occupied_seats"]
+        for l_ in json.loads(response._content)["items"]
+    } == {
+        "11111111-aea8-4de2-bcca-7b1945285502": 0,
+        "22222222-aea8-4de2-bcca-7b1945285502": 1,
+        "33333333-aea8-4de2-bcca-7b1945285502": 0,
+    }
+
+
+@pytest.mark.asyncio
+@freeze_time("2023-06-01")
+async def test_redeem_license_batch__200_ok(
+    client: AsyncClient,
+    create_license,
+    create_seat,
+    product_1_eid,
+    product_2_eid,
+    teacher_1,
+    student_1,
+    student_2,
+    student_3,
+    class_1,
+    school_1,
+    hierarchy_provider_1_uri,
+):
+    """
+    All students of a class redeem at once: the class license has 2 seats only
+    (one of them already occupied by student 1), so student 3 does not get
+    product 1 any more. Everyone gets product 2 from the school license.
+    """
+    await create_license(id=1, uuid="11111111-aea8-4de2-bcca-7b1945285502", nof_seats=2)
+    await create_license(
+        id=2,
+        uuid="22222222-aea8-4de2-bcca-7b1945285502",
+        product_eid=product_2_eid,
+        owner_type=school_1.type_,
+        owner_level=school_1.level,
+        owner_eids=[school_1.eid],
+        nof_seats=-1,
+    )
+    await create_seat(1, user_eid=student_1.eid)
+
+    memberships = [
+        {"type": class_1.type_, "level": class_1.level, "eid": class_1.eid},
+        {"type": school_1.type_, "level": school_1.level, "eid": school_1.eid},
+    ]
+    members = [
+        {"user_eid": student.eid, "memberships": memberships}
+        for student in [student_1, student_2, student_3]
+    ]
+    token = create_token(
+        HIERARCHY_PROVIDER_KID,
+        hierarchy_provider_1_uri,
+        (
+            datetime.datetime.now(tz=datetime.timezone.utc)
+            + datetime.timedelta(seconds=100)
+        ).timestamp(),
+        teacher_1.eid,
+        hashed_payload("members", members),
+    )
+
+    response = await client.post(
+        "/v1/member/permissions/batch",
+        json={"members": members},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == http_status.HTTP_200_OK
+    tokens = json.loads(response._content)
+    assert {
+        user_eid: sorted(check_license_service_token(token_)["accessible_products"])
+        for user_eid, token_ in tokens.items()
+    } == {
+        student_1.eid: [product_1_eid, product_2_eid],
+        student_2.eid: [product_1_eid, product_2_eid],
+        student_3.eid: [product_2_eid],
+    }
+    assert check_license_service_token(tokens[student_2.eid])["sub"] == student_2.eid
+
+
+@pytest.mark.asyncio
+async def test_redeem_license_batch__422_duplicate_user_eids(
+    client: AsyncClient,
+    teacher_1,
+    student_1,
+    class_1,
+    school_1,
+    hierarchy_provider_1_uri,
+):
+    members = [
+        {
+            "user_eid": student_1.eid,
+            "memberships": [{"type": entity.type_, "eid": entity.eid}],
+        }
+        for entity in [class_1, school_1]
+    ]
+    token = create_token(
+        HIERARCHY_PROVIDER_KID,
+        hierarchy_provider_1_uri,
+        (
+            datetime.datetime.now(tz=datetime.timezone.utc)
+            + datetime.timedelta(seconds=100)
+        ).timestamp(),
+        teacher_1.eid,
+        hashed_payload("members", members),
+    )
+    response = await client.post(
+        "/v1/member/permissions/batch",
+        json={"members": members},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == http_status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert "duplicate user EIDs" in response.text
+
+
+@pytest.mark.asyncio
+async def test_redeem_license_batch__401_hash_mismatch(
+    client: AsyncClient, teacher_1, student_1, class_1, hierarchy_provider_1_uri
+):
+    members = [
+        {
+            "user_eid": student_1.eid,
+            "memberships": [{"type": class_1.type_, "eid": class_1.eid}],
+        }
+    ]
+    token = create_token(
+        HIERARCHY_PROVIDER_KID,
+        hierarchy_provider_1_uri,
+        (
+            datetime.datetime.now(tz=datetime.timezone.utc)
+            + datetime.timedelta(seconds=100)
+        ).timestamp(),
+        teacher_1.eid,
+        hashed_payload("members", []),
+    )
+    response = await client.post(
+        "/v1/member/permissions/batch",
+        json={"members": members},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == http_status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,141 @@
+import asyncio
+import datetime
+
+import pytest
+from freezegun import freeze_time
+from sqlalchemy import func, select
+
+from services.licensing.business.service import LicensingService
+from services.licensing.custom_types import Entity, EventType, SeatStatus
+from services.licensing.data.sqlalchemy.model.seat import SeatModel
+from services.licensing.settings import transaction_manager, repository
+from tests.integration.conftest import query_event_log
+
+NOF_STUDENTS = 30
+NOF_SEATS = 10
+
+
+async def get_accessible_products(hierarchy_provider_uri, user_eid, memberships):
+    async with transaction_manager() as tm:
+        products = await LicensingService(
+            repository(tm.session)
+        ).get_accessible_products(hierarchy_provider_uri, user_eid, memberships)
+        await tm.commit()
+        return products
+
+
+async def get_license(license_uuid):
+    async with transaction_manager() as tm:
+        return await LicensingService(repository(tm.session)).get_license(
+            license_uuid, {}, []
+        )
+
+
+async def count_occupied_seats(user_eid=None):
+    async with transaction_manager() as tm:
+        return (
+            await tm.session.execute(
+                select(func.count(SeatModel.id)).where(
+                    SeatModel.is_occupied.is_(True),
+                    SeatModel.user_eid == user_eid if user_eid else True,
+                )
+            )
+        ).scalar()
+
+
+@pytest.mark.asyncio
+@freeze_time("2023-01-01")
+async def test_redeem_license__concurrent_students_no_oversubscription(
+    app_with_db, create_license, hierarchy_provider_1_uri, product_1_eid, class_1
+):
+    license_uuid = "11111111-1111-1111-1111-111111111111"
+    await create_license(
+        uuid=license_uuid,
+        valid_from=datetime.date(2023, 1, 1),
+        valid_to=datetime.date(2023, 12, 31),
+        nof_seats=NOF_SEATS,
+    )
+    students = [
+        Entity(type_="student", eid=f"student_{i}@DE_bettermarks", level=0)
+        for i in range(NOF_STUDENTS)
+    ]
+
+    results = await asyncio.gather(
+        *[
+            get_accessible_products(
+                hierarchy_provider_1_uri, student.eid, [class_1, student]
+            )
+            for student in students
+        ]
+    )
+
+    assert (
+        sorted(results)
+        == [[]] * (NOF_STUDENTS - NOF_SEATS) + [[product_1_eid]] * NOF_SEATS
+    )
+    assert await count_occupied_seats() == NOF_SEATS
+    assert (await get_license(license_uuid)).nof_occupied_seats == NOF_SEATS
+
+
+@pytest.mark.asyncio
+@freeze_time("2023-01-01")
+async def test_redeem_license__concurrent_requests_of_one_student(
+    app_with_db,
+    create_license,
+    hierarchy_provider_1_uri,
+    product_1_eid,
+    class_1,
+    student_1,
+):
+    license_uuid = "11111111-1111-1111-1111-111111111111"
+    await create_license(
+        uuid=license_uuid,
+        valid_from=datetime.date(2023, 1, 1),
+        valid_to=datetime.date(2023, 12, 31),
+        nof_seats=NOF_SEATS,
+    )
+
+    results = await asyncio.gather(
+        *[
+            get_accessible_products(
+                hierarchy_provider_1_uri, student_1.eid, [class_1, student_1]
+            )
+            for _ in range(5)
+        ]
+    )
+
+    assert results == [[product_1_eid]] * 5
+    assert await count_occupied_seats(student_1.eid) == 1
+    assert (await get_license(license_uuid)).nof_occupied_seats == 1
+    assert [e_.event_type for e_ in await query_event_log()].count(
+        EventType.SEAT_CREATED.value
+    ) == 1
+
+
+@pytest.mark.asyncio
+async def test_occupy_seat__already_occupied_concurrently(
+    app_with_db, create_license, create_seat, student_1
+):
+    license_uuid = "11111111-1111-1111-1111-111111111111"
+    await create_license(id=1, uuid=license_uuid)
+    # the seat occupied by a concurrent request of the same student
+    await create_seat(1, user_eid=student_1.eid)
+
+    async with transaction_manager() as tm:
+        # the product is accessible, but no seat (and event) is created
+        assert await LicensingService(repository(tm.session)).occupy_seat(
+            user_eid=student_1.eid,
+            occupied_at=datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc),
+            is_occupied=True,
+            status=SeatStatus.ACTIVE,
+            ref_license=1,
+            uuid=license_uuid,
+        )
+        await tm.commit()
+
+    assert await count_occupied_seats(student_1.eid) == 1
+    assert (await get_license(license_uuid)).nof_occupied_seats == 1
+    # (just the event of the concurrently created seat)
+    assert [e_.event_type for e_ in await query_event_log()].count(
+        EventType.SEAT_CREATED.value
+    ) == 1
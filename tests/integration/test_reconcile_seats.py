@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import update
+
+from services.licensing.business.service import LicensingService
+from services.licensing.custom_types import SeatStatus
+from services.licensing.data.sqlalchemy.model.license import LicenseModel
+from services.licensing.maintenance.reconcile_seats import reconcile_seats
+from services.licensing.settings import transaction_manager, repository
+
+LICENSE_UUID = "11111111-1111-1111-1111-111111111111"
+
+
+async def get_license():
+    async with transaction_manager() as tm:
+        return await LicensingService(repository(tm.session)).get_license(
+            LICENSE_UUID, {}, []
+        )
+
+
+async def set_nof_occupied_seats(nof_occupied_seats):
+    async with transaction_manager() as tm:
+        await tm.session.execute(
+            update(LicenseModel).values(nof_occupied_seats=nof_occupied_seats)
+        )
+        await tm.commit()
+
+
+@pytest.mark.asyncio
+async def test_nof_occupied_seats__seats_occupied_and_released(
+    app_with_db, create_license, create_seat, student_1, student_2, student_3
+):
+    await create_license(id=1, uuid=LICENSE_UUID)
+    await create_seat(1, user_eid=student_1.eid)
+    await create_seat(1, user_eid=student_2.eid)
+    await create_seat(
+        1, user_eid=student_3.eid, is_occupied=False, status=SeatStatus.EXPIRED
+    )
+    assert (await get_license()).nof_occupied_seats == 2
+
+    async with transaction_manager() as tm:
+        service = LicensingService(repository(tm.session))
+        seats = await service.licensing_repository.get_occupied_seats(student_1.eid)
+        for seat in seats:
+            seat.is_occupied = False
+            seat.status = SeatStatus.EXPIRED
+        await service.licensing_repository.update_seats(seats)
+        await tm.commit()
+
+    assert (await get_license()).nof_occupied_seats == 1
+
+
+@pytest.mark.asyncio
+async def test_nof_occupied_seats__released_seats_subtracted_once(
+    app_with_db, create_license, create_seat, student_1, student_2
+):
+    await create_license(id=1, uuid=LICENSE_UUID)
+    await create_seat(1, user_eid=student_1.eid)
+    await create_seat(1, user_eid=student_2.eid)
+
+    async with transaction_manager() as tm:
+        repo = repository(tm.session)
+        seats = await repo.get_occupied_seats(student_1.eid)
+        seats += await repo.get_occupied_seats(student_2.eid)
+        # updating occupied seats does not change the number ...
+        await repo.update_seats(seats)
+        await tm.commit()
+    assert (await get_license()).nof_occupied_seats == 2
+
+    for seat in seats:
+        if seat.user_eid == student_1.eid:
+            seat.is_occupied = False
+            seat.status = SeatStatus.EXPIRED
+    # ... releasing a seat (even more than once) does
+    for _ in range(2):
+        async with transaction_manager() as tm:
+            await repository(tm.session).update_seats(seats)
+            await tm.commit()
+        assert (await get_license()).nof_occupied_seats == 1
+
+
+@pytest.mark.asyncio
+async def test_reconcile_seats__drift_repaired(
+    app_with_db, create_license, create_seat, student_1, student_2
+):
+    await create_license(id=1, uuid=LICENSE_UUID)
+    await create_seat(1, user_eid=student_1.eid)
+    await create_seat(1, user_eid=student_2.eid)
+    await set_nof_occupied_seats(5)
+
+    assert await reconcile_seats(dry_run=True) == 1
+    assert (await get_license()).nof_occupied_seats == 5
+
+    assert await reconcile_seats(licenses_per_run=1) == 1
+    assert (await get_license()).nof_occupied_seats == 2
+
+    # nothing left to repair
+    assert await reconcile_seats() == 0
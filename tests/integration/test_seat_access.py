@@ -0,0 +1,39 @@
+import datetime
+
+import pytest
+
+from services.licensing.business.service import LicensingService
+from services.licensing.seat_access import SeatAccessBuffer
+from services.licensing.settings import transaction_manager, repository
+
+
+async def get_occupied_seats(user_eid):
+    async with transaction_manager() as tm:
+        return await LicensingService(
+            repository(tm.session)
+        ).licensing_repository.get_occupied_seats(user_eid)
+
+
+@pytest.mark.asyncio
+async def test_seat_access_buffer__flush(
+    app_with_db, create_license, create_seat, student_1
+):
+    await create_license(id=1, uuid="11111111-1111-1111-1111-111111111111")
+    await create_seat(1, user_eid=student_1.eid)
+    (seat,) = await get_occupied_seats(student_1.eid)
+
+    accessed_at = datetime.datetime(2023, 6, 1, tzinfo=datetime.timezone.utc)
+    buffer = SeatAccessBuffer(flush_interval_secs=60)
+    buffer.add(seat.id, accessed_at)
+    assert await buffer.flush() == 1
+    assert len(buffer) == 0
+    (seat,) = await get_occupied_seats(student_1.eid)
+    assert seat.last_accessed_at == accessed_at
+
+    # an older access does not overwrite a newer one
+    buffer.add(seat.id, accessed_at - datetime.timedelta(days=1))
+    assert await buffer.flush() == 1
+    (seat,) = await get_occupied_seats(student_1.eid)
+    assert seat.last_accessed_at == accessed_at
+
+    assert await buffer.flush() == 0
@@ -31,3 +31,17 @@ async def test_version__ok(client: AsyncClient):
     assert response.status_code == 200
     assert response.json()["debug"] is True
     assert response.json()["segment"] == "loc00"
+
+
+@pytest.mark.asyncio
+async def test_stats__ok(client: AsyncClient):
+    response = await client.get("/stats")
+    assert response.status_code == 200
+    assert set(response.json()) == {
+        "crypto_executor",
+        "claims_cache",
+        "permissions_cache",
+        "permissions_token_cache",
+        "hierarchy_index_cache",
+    }
+    assert response.json()["crypto_executor"]["pending"] == 0
@@ -1,11 +1,17 @@
 import datetime
 import json
+from hashlib import sha256
+
 import pytest
 from unittest.mock import MagicMock
 from httpx import AsyncClient
 from fastapi import status as http_status
 
 
+from services.licensing import authorization
+from services.licensing.authorization import Payload, check_hash, raw_payload
+from services.licensing.exceptions import HTTPException
+from services.licensing.cache import TTLCache
 from tests.conftest import (
     create_token,
     NOT_EXISTING_KID,
@@ -158,3 +164,71 @@ async def test_authorization__ok(client: AsyncClient, mocker: MagicMock):
         headers={"Authorization": f"Bearer {token}"},
     )
     assert response.status_code == http_status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_authorization__claims_cached(client: AsyncClient, mocker: MagicMock):
+    """
+    a token presented again is not verified again (until it expires)
+    """
+    mocker.patch(
+        "services.licensing.authorization.claims_cache",
+        TTLCache(maxsize=10, ttl_secs=60),
+    )
+    verify = mocker.spy(authorization, "verify_token")
+    token = create_token(
+        HIERARCHY_PROVIDER_KID,
+        "some-issuer",
+        (
+            datetime.datetime.now(tz=datetime.timezone.utc)
+            + datetime.timedelta(seconds=100)
+        ).timestamp(),
+        "some-subject",
+    )
+
+    for _ in range(3):
+        response = await client.get(
+            "/route-that-expects-authorization",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == http_status.HTTP_200_OK
+    assert verify.call_count == 1
+    assert authorization.claims_cache.stats()["hits"] == 2
+
+
+@pytest.mark.parametrize(
+    "body,expected",
+    [
+        (b'{"memberships": [{"eid": "c1"}]}', b'[{"eid": "c1"}]'),
+        (b'{"memberships": [{"eid": "c1"}]}\n', b'[{"eid": "c1"}]'),
+        (b'{"memberships":[{"eid":"c1"}]}', None),
+        (b'{"other": [], "memberships": []}', None),
+    ],
+)
+def test_raw_payload(body, expected):
+    assert raw_payload(body, "memberships") == expected
+
+
+def test_check_hash__raw_payload(mocker: MagicMock):
+    value = [{"eid": "c1", "name": "Klasse 5ä"}]
+    hash_dict = {
+        "memberships": {
+            "alg": "SHA256",
+            "hash": sha256(json.dumps(value).encode("utf-8")).hexdigest(),
+        }
+    }
+    serialize = mocker.spy(authorization, "canonical_json")
+
+    # raw value in canonical form: no serialization needed
+    check_hash("memberships", Payload(value, json.dumps(value).encode()), hash_dict)
+    assert serialize.call_count == 0
+
+    # raw value in some other form (or not available): canonical serialization
+    compact = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+    check_hash("memberships", Payload(value, compact.encode()), hash_dict)
+    check_hash("memberships", value, hash_dict)
+    assert serialize.call_count == 2
+
+    # tampered payload
+    with pytest.raises(HTTPException):
+        check_hash("memberships", Payload([], json.dumps([]).encode()), hash_dict)
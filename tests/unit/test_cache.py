@@ -0,0 +1,98 @@
+from services.licensing.cache import LRUCache, TTLCache, PermissionsCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache__expires():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl_secs=60, timer=timer)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    timer.now = 60
+    assert cache.get("a") is None
+    assert "a" not in cache
+    assert cache.stats() == {"size": 0, "maxsize": 10, "hits": 1, "misses": 1}
+
+
+def test_ttl_cache__least_recently_used_evicted():
+    cache = TTLCache(maxsize=2, ttl_secs=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_ttl_cache__ttl_per_entry():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl_secs=60, timer=timer)
+    cache.set("a", 1, ttl_secs=10)
+    cache.set("b", 2, ttl_secs=600)  # limited to the ttl of the cache
+    cache.set("c", 3, ttl_secs=-1)  # already expired
+    assert "c" not in cache
+
+    timer.now = 10
+    assert "a" not in cache
+    assert "b" in cache
+    timer.now = 60
+    assert "b" not in cache
+
+
+def test_ttl_cache__disabled():
+    cache = TTLCache(maxsize=10, ttl_secs=0)
+    cache.set("a", 1)
+    assert len(cache) == 0
+    assert cache.get("a") is None
+
+
+def test_permissions_cache__invalidate_owners():
+    cache = PermissionsCache(maxsize=10, ttl_secs=60)
+    cache.set_products("student_1", ["p1"], [("class", "c1"), ("school", "s1")])
+    cache.set_products("student_2", ["p2"], [("class", "c2"), ("school", "s1")])
+    cache.set_products("student_3", ["p3"], [("class", "c3"), ("school", "s2")])
+
+    cache.invalidate_owners("class", ["c1", "c3"])
+    assert cache.get_products("student_1") is None
+    assert cache.get_products("student_2") == ["p2"]
+    assert cache.get_products("student_3") is None
+
+    cache.invalidate_owners("school", ["s1"])
+    assert cache.get_products("student_2") is None
+    assert len(cache) == 0
+    assert cache._keys_by_owner == {}
+
+
+def test_lru_cache__weight_bounded():
+    cache = LRUCache(max_weight=10, weigh=len)
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    assert cache.get("a") == "xxxx"
+    cache.set("c", "xxxx")  # evicts "b" (least recently used)
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.weight == 8
+
+    cache.set("d", "x" * 11)  # too heavy to be cached
+    assert "d" not in cache
+    assert cache.stats() == {
+        "size": 2,
+        "weight": 8,
+        "max_weight": 10,
+        "hits": 1,
+        "misses": 0,
+    }
+
+
+def test_lru_cache__disabled():
+    cache = LRUCache(max_weight=0)
+    cache.set("a", 1)
+    assert len(cache) == 0
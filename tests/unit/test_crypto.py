@@ -0,0 +1,21 @@
+import pytest
+
+from services.licensing.crypto import CryptoExecutor
+
+
+@pytest.mark.parametrize("kind", ["none", "thread", "process"])
+async def test_crypto_executor__run(kind):
+    executor = CryptoExecutor(kind, max_workers=2)
+    try:
+        assert await executor.run(divmod, 7, 2) == (3, 1)
+        with pytest.raises(ZeroDivisionError):
+            await executor.run(divmod, 1, 0)
+    finally:
+        executor.shutdown()
+
+    stats = executor.stats()
+    assert stats["kind"] == kind
+    assert stats["pending"] == 0
+    assert stats["calls"] == 2
+    assert stats["errors"] == 1
+    assert stats["max_duration_ms"] >= stats["avg_duration_ms"] > 0
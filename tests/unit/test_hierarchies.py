@@ -1,7 +1,14 @@
 import pytest
 
 from services.licensing.custom_types import Entity
-from services.licensing.hierarchies import parent_entities, get_ancestors
+from services.licensing import cache
+from services.licensing.cache import LRUCache
+from services.licensing.hierarchies import (
+    HierarchyIndex,
+    get_hierarchy_index,
+    parent_entities,
+    get_ancestors,
+)
 
 
 @pytest.fixture
@@ -144,3 +151,167 @@ def test_ancestors_for_level1_22__ok(hierarchies_payload):
         Entity(eid="cc1_s2", type_="s", level=2, name="cc1_s2", is_member_of=False),
         Entity(eid="cc1", type_="cc", level=3, name="cc1", is_member_of=False),
     ]
+
+
+def test_get_hierarchy_index__cached_by_hash(mocker, hierarchies_payload):
+    mocker.patch(
+        "services.licensing.cache.hierarchy_index_cache",
+        LRUCache(max_weight=100, weigh=lambda index: len(index) + 1),
+    )
+    index = get_hierarchy_index(hierarchies_payload, {"alg": "SHA256", "hash": "h1"})
+    assert len(index) == 7
+    # same hash: the compiled index gets reused (the payload is not used at all)
+    assert get_hierarchy_index([], {"alg": "sha256", "hash": "h1"}) is index
+    assert len(get_hierarchy_index([], {"alg": "SHA256", "hash": "h2"})) == 0
+    # without hash: nothing gets cached
+    assert get_hierarchy_index(hierarchies_payload) is not index
+
+
+def node(type_, eid, level, children=None):
+    return {"type": type_, "eid": eid, "name": eid, "level": level} | (
+        {"children": children} if children is not None else {}
+    )
+
+
+def test_hierarchy_index__same_as_parent_entities(hierarchies_payload):
+    index = HierarchyIndex.from_hierarchies(hierarchies_payload)
+    assert index.parents == parent_entities(hierarchies_payload, {})
+    for entity in index.parents:
+        assert index.get_ancestors(entity.type_, entity.eid) == get_ancestors(
+            entity.type_, entity.eid, parent_entities(hierarchies_payload, {})
+        )
+    assert index.get_ancestors("cc", "cc1") == []
+    assert index.get_ancestors("x", "unknown") == []
+
+
+def test_hierarchy_index__dag_deduplicated():
+    """a class being part of a school and of a course group (of the school)"""
+    class_ = node("c", "k1", 1, [node("u", "u1", 0)])
+    payload = [
+        node("s", "s1", 3, [class_, node("g", "g1", 2, [class_])]),
+        node("s", "s1", 3, [node("g", "g1", 2, [class_])]),
+    ]
+    index = HierarchyIndex.from_hierarchies(payload)
+    assert index.parents[Entity(type_="c", eid="k1")] == [
+        Entity(type_="s", eid="s1"),
+        Entity(type_="g", eid="g1"),
+    ]
+    assert index.get_ancestors("u", "u1") == [
+        Entity(type_="c", eid="k1"),
+        Entity(type_="s", eid="s1"),
+        Entity(type_="g", eid="g1"),
+    ]
+
+
+def test_hierarchy_index__cycle_safe():
+    payload = [
+        node("a", "a", 3, [node("b", "b", 2, [node("a", "a", 3, [node("c", "c", 1)])])])
+    ]
+    index = HierarchyIndex.from_hierarchies(payload)
+    assert index.get_ancestors("c", "c") == [
+        Entity(type_="a", eid="a"),
+        Entity(type_="b", eid="b"),
+    ]
+    assert index.get_ancestors("a", "a") == [Entity(type_="b", eid="b")]
+    assert index.get_ancestors("b", "b") == [Entity(type_="a", eid="a")]
+
+
+def test_hierarchy_index__mixed_and_missing_levels():
+    """levels are not validated: they may be strings or missing"""
+    payload = [
+        {
+            "type": "s",
+            "eid": "s1",
+            "level": "2",
+            "children": [
+                {"type": "c", "eid": "k1", "children": [node("u", "u1", 0)]},
+                {"type": "g", "eid": "g1", "level": 1.5, "children": []},
+            ],
+        }
+    ]
+    index = HierarchyIndex.from_hierarchies(payload)
+    assert index.get_ancestors("u", "u1") == [
+        Entity(type_="c", eid="k1"),
+        Entity(type_="s", eid="s1"),
+    ]
+    assert index.get_ancestors("u", "u1") == get_ancestors(
+        "u", "u1", parent_entities(payload, {})
+    )
+
+
+@pytest.fixture
+def hierarchies_payload_10k():
+    """a district with 10 schools, 100 classes each and 10 students per class"""
+    return [
+        node(
+            "d",
+            "d1",
+            4,
+            [
+                node(
+                    "s",
+                    f"s{s}",
+                    3,
+                    [
+                        node(
+                            "c",
+                            f"s{s}_c{c}",
+                            2,
+                            [node("u", f"s{s}_c{c}_u{u}", 1) for u in range(10)],
+                        )
+                        for c in range(100)
+                    ],
+                )
+                for s in range(10)
+            ],
+        )
+    ]
+
+
+def test_hierarchy_index__10k_nodes(hierarchies_payload_10k):
+    parents = parent_entities(hierarchies_payload_10k, {})
+    old_ancestors = {
+        e: get_ancestors(e.type_, e.eid, parents) for e in parents if e.type_ == "u"
+    }
+
+    index = HierarchyIndex.from_hierarchies(hierarchies_payload_10k)
+    new_ancestors = {
+        e: index.get_ancestors(e.type_, e.eid) for e in index.parents if e.type_ == "u"
+    }
+
+    assert len(index) == 1 + 10 + 1000 + 10000
+    assert new_ancestors == old_ancestors
+
+
+def test_hierarchy_index_cache__weighed_by_entities():
+    """roots and entities without parents or children are weighed, too"""
+    index = HierarchyIndex.from_hierarchies(
+        [
+            node("s", "s1", 2, [node("c", "c1", 1, [node("u", "u1", 0)])]),
+            node("s", "s2", 2),
+        ]
+    )
+    assert len(index.parents) == 2
+    assert cache.hierarchy_index_cache.weigh(index) == len(index.entities) == 4
+
+    lru = LRUCache(max_weight=7, weigh=cache.hierarchy_index_cache.weigh)
+    lru.set("h1", index)
+    lru.set("h2", HierarchyIndex.from_hierarchies([node("s", "s3", 2)]))
+    assert lru.weight == 5
+    # the least recently used index is evicted by the entity count
+    lru.set("h3", index)
+    assert "h1" not in lru and "h2" in lru and "h3" in lru
+    assert lru.weight == 5
+
+
+def test_hierarchy_index__10k_deep():
+    """a chain of 10k entities is far too deep for the recursive functions"""
+    payload = node("n", "0", 0)
+    for i in range(1, 10000):
+        payload = node("n", str(i), i, [payload])
+
+    index = HierarchyIndex.from_hierarchies([payload])
+    assert index.get_ancestors("n", "0") == [
+        Entity(type_="n", eid=str(i)) for i in range(1, 10000)
+    ]
+    assert len(index.get_ancestors("n", "1")) == 9998
@@ -0,0 +1,43 @@
+import json
+import os
+
+from jwcrypto import jwt
+
+from services.licensing.keys import KeyRegistry
+from tests.conftest import (
+    HIERARCHY_PROVIDER_KID,
+    TEST_BO_EC256_PUBLIC_KEY,
+    TEST_SS_EC256_PUBLIC_KEY,
+)
+
+
+def test_key_registry__settings_only():
+    registry = KeyRegistry(None, reload_interval_secs=60)
+    assert registry.get(HIERARCHY_PROVIDER_KID) is None
+
+    registry.load()
+    assert len(registry) == 4
+    assert registry.get(HIERARCHY_PROVIDER_KID) is not None
+    assert registry.reload() is False
+
+
+def test_key_registry__keys_dir(tmp_path):
+    (tmp_path / "NEW_KID.pem").write_text(TEST_SS_EC256_PUBLIC_KEY)
+    (tmp_path / "invalid.pem").write_text("not a key")
+    registry = KeyRegistry(str(tmp_path), reload_interval_secs=60)
+    registry.load()
+    assert len(registry) == 5
+    assert registry.get("NEW_KID").thumbprint() == (
+        jwt.JWK.from_pem(TEST_SS_EC256_PUBLIC_KEY.encode()).thumbprint()
+    )
+    assert registry.reload() is False
+
+    # key rotation: keys of a JWKS get added, removed keys are gone
+    key = jwt.JWK.from_pem(TEST_BO_EC256_PUBLIC_KEY.encode())
+    (tmp_path / "jwks.json").write_text(
+        json.dumps({"keys": [key.export_public(as_dict=True) | {"kid": "HP"}]})
+    )
+    os.remove(tmp_path / "NEW_KID.pem")
+    assert registry.reload() is True
+    assert registry.get("NEW_KID") is None
+    assert registry.get("HP").thumbprint() == key.thumbprint()
@@ -0,0 +1,26 @@
+import datetime
+
+from services.licensing import settings
+from services.licensing.seat_access import SeatAccessBuffer, is_seat_access_due
+
+NOW = datetime.datetime(2023, 1, 1, 12, 0, 0, tzinfo=datetime.timezone.utc)
+
+
+def test_is_seat_access_due(mocker):
+    assert is_seat_access_due(None, NOW)
+    assert is_seat_access_due(NOW, NOW)
+
+    mocker.patch.object(settings, "seat_access_granularity_secs", 3600)
+    assert is_seat_access_due(None, NOW)
+    assert not is_seat_access_due(NOW - datetime.timedelta(minutes=59), NOW)
+    assert is_seat_access_due(NOW - datetime.timedelta(minutes=60), NOW)
+
+
+def test_seat_access_buffer__latest_access_wins():
+    buffer = SeatAccessBuffer(flush_interval_secs=60)
+    buffer.add(1, NOW)
+    buffer.add(1, NOW - datetime.timedelta(minutes=1))
+    buffer.add(2, NOW - datetime.timedelta(minutes=1))
+    buffer.add(2, NOW)
+    assert len(buffer) == 2
+    assert buffer._accesses == {1: NOW, 2: NOW}
@@ -3,7 +3,9 @@ from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock
 from uuid import UUID
 
+from services.licensing import settings
 from services.licensing.business.service import LicensingService
+from services.licensing.cache import PermissionsCache
 from services.licensing.custom_types import (
     Entity,
     Memberships,
@@ -11,6 +13,7 @@ from services.licensing.custom_types import (
     License,
     Seat,
 )
+from services.licensing.seat_access import SeatAccessBuffer
 
 
 @pytest.fixture
@@ -188,11 +191,8 @@ async def test_get_accessible_products(
     valid_licenses,
     expected_accessible_products,
 ):
-    licensing_service.licensing_repository.get_occupied_seats = AsyncMock(
-        return_value=occupied_seats
-    )
-    licensing_service.licensing_repository.get_valid_licenses_for_entities = AsyncMock(
-        return_value=valid_licenses
+    licensing_service.licensing_repository.get_occupied_seats_and_candidate_licenses = (
+        AsyncMock(return_value=(occupied_seats, valid_licenses))
     )
     licensing_service.licensing_repository.update_seats = AsyncMock()
     licensing_service.licensing_repository.create_event_log = AsyncMock()
@@ -211,3 +211,167 @@ async def test_get_accessible_products(
     # SeatCreatedEvent and PermissionsRequestedEvent
     else:
         assert licensing_service.licensing_repository.create_event_log.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_accessible_products__cached(memberships):
+    licensing_service = LicensingService(
+        licensing_repository=AsyncMock(),
+        permissions_cache=PermissionsCache(maxsize=10, ttl_secs=60),
+    )
+    repository = licensing_service.licensing_repository
+    repository.get_occupied_seats_and_candidate_licenses = AsyncMock(
+        return_value=([], [])
+    )
+
+    async def get_accessible_products():
+        return await licensing_service.get_accessible_products(
+            hierarchy_provider_uri="https://school.bettermarks.loc/ucm",
+            user_eid="5@DE_bettermarks",
+            memberships=memberships,
+            memberships_hash="some-hash",
+        )
+
+    assert await get_accessible_products() == []
+    assert await get_accessible_products() == []
+    repository.get_occupied_seats_and_candidate_licenses.assert_called_once()
+
+    # a new license for the class of the user invalidates the cached permissions
+    await licensing_service.create_license(
+        product_eid="full_access",
+        owner_type="class",
+        owner_eids=["2@DE_bettermarks"],
+        nof_seats=10,
+        extra_seats=0,
+        valid_from=datetime.now().date(),
+        valid_to=datetime.now().date() + timedelta(days=30),
+        owner_level=1,
+        is_trial=False,
+    )
+    assert await get_accessible_products() == []
+    assert repository.get_occupied_seats_and_candidate_licenses.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_accessible_products__cache_invalidated_by_batch(memberships):
+    licensing_service = LicensingService(
+        licensing_repository=AsyncMock(),
+        permissions_cache=PermissionsCache(maxsize=10, ttl_secs=60),
+    )
+    repository = licensing_service.licensing_repository
+    repository.get_occupied_seats_and_candidate_licenses = AsyncMock(
+        return_value=([], [])
+    )
+
+    async def get_accessible_products():
+        return await licensing_service.get_accessible_products(
+            hierarchy_provider_uri="https://school.bettermarks.loc/ucm",
+            user_eid="5@DE_bettermarks",
+            memberships=memberships,
+            memberships_hash="some-hash",
+        )
+
+    assert await get_accessible_products() == []
+    assert await get_accessible_products() == []
+    repository.get_occupied_seats_and_candidate_licenses.assert_called_once()
+
+    # a seat occupied by the batch (for some member of the class of the user)
+    # invalidates the cached permissions
+    repository.get_occupied_seats_of_users = AsyncMock(return_value=[])
+    repository.get_valid_licenses_for_entities = AsyncMock(
+        return_value=[
+            License(
+                id=1,
+                uuid=UUID("cf9b263a-3b97-4a76-9e6b-5481edce17ac"),
+                product_eid="full_access",
+                hierarchy_provider_uri="https://school.bettermarks.loc/ucm",
+                manager_eid="9@DE_bettermarks",
+                owner_type="class",
+                owner_level=1,
+                owner_eids=["2@DE_bettermarks"],
+                valid_from=datetime.now().date(),
+                valid_to=datetime.now().date() + timedelta(days=30),
+                nof_seats=15,
+                nof_free_seats=15,
+                nof_occupied_seats=0,
+                extra_seats=0,
+                is_trial=False,
+                notes=None,
+                seats=[],
+                released_seats=[],
+                created_at=datetime.now(),
+                updated_at=datetime.now(),
+            )
+        ]
+    )
+    repository.occupy_seat = AsyncMock(return_value=True)
+    assert await licensing_service.get_accessible_products_batch(
+        "https://school.bettermarks.loc/ucm", {"6@DE_bettermarks": memberships[:2]}
+    ) == {"6@DE_bettermarks": ["full_access"]}
+
+    assert await get_accessible_products() == []
+    assert repository.get_occupied_seats_and_candidate_licenses.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_accessible_products__seat_accesses_coalesced(memberships, mocker):
+    mocker.patch.object(settings, "seat_access_granularity_secs", 3600)
+    licensing_service = LicensingService(
+        licensing_repository=AsyncMock(),
+        seat_access_buffer=SeatAccessBuffer(flush_interval_secs=0),
+    )
+    repository = licensing_service.licensing_repository
+
+    def seat(id_, owner_eid, last_accessed_at):
+        return Seat(
+            id=id_,
+            user_eid="5@DE_bettermarks",
+            last_accessed_at=last_accessed_at,
+            occupied_at=last_accessed_at,
+            license=License(
+                id=id_,
+                uuid=UUID("cf9b263a-3b97-4a76-9e6b-5481edce17ac"),
+                product_eid=f"product_{id_}",
+                hierarchy_provider_uri="https://school.bettermarks.loc/ucm",
+                manager_eid="9@DE_bettermarks",
+                owner_type="class",
+                owner_level=1,
+                owner_eids=[owner_eid],
+                valid_from=datetime.now().date(),
+                valid_to=datetime.now().date() + timedelta(days=30),
+                nof_seats=15,
+                nof_free_seats=0,
+                nof_occupied_seats=15,
+                extra_seats=0,
+                is_trial=False,
+                notes=None,
+                seats=[],
+                released_seats=[],
+                created_at=datetime.now(),
+                updated_at=datetime.now(),
+            ),
+            status=SeatStatus.ACTIVE,
+            is_occupied=True,
+        )
+
+    now = datetime.now(timezone.utc)
+    recently_accessed = seat(1, "2@DE_bettermarks", now - timedelta(minutes=5))
+    accessed_long_ago = seat(2, "2@DE_bettermarks", now - timedelta(hours=2))
+    not_a_member = seat(3, "24@DE_bettermarks", now - timedelta(minutes=5))
+    repository.get_occupied_seats_and_candidate_licenses = AsyncMock(
+        return_value=([recently_accessed, accessed_long_ago, not_a_member], [])
+    )
+
+    result = await licensing_service.get_accessible_products(
+        hierarchy_provider_uri="https://school.bettermarks.loc/ucm",
+        user_eid="5@DE_bettermarks",
+        memberships=memberships,
+    )
+
+    assert sorted(result) == ["product_1", "product_2"]
+    # the status change is written immediately ...
+    repository.update_seats.assert_called_once_with([not_a_member])
+    # ... but only the 'outdated' access
+    repository.update_seats_last_accessed_at.assert_called_once()
+    (accesses,) = repository.update_seats_last_accessed_at.call_args.args
+    assert list(accesses) == [2]
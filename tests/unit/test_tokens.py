@@ -0,0 +1,30 @@
+from services.licensing import tokens
+from services.licensing.cache import TTLCache
+
+
+async def test_create_permissions_token__reused(mocker):
+    mocker.patch.object(
+        tokens, "permissions_token_cache", TTLCache(maxsize=10, ttl_secs=60)
+    )
+    sign = mocker.spy(tokens, "create_licensing_token")
+
+    token = await tokens.create_permissions_token("u1", "hp", ["p2", "p1"])
+    # same products (in another order): the token gets reused
+    assert await tokens.create_permissions_token("u1", "hp", ["p1", "p2"]) == token
+    assert sign.call_count == 1
+
+    # other user or other products: a new token gets signed
+    await tokens.create_permissions_token("u2", "hp", ["p1", "p2"])
+    await tokens.create_permissions_token("u1", "hp", ["p1"])
+    assert sign.call_count == 3
+
+
+async def test_create_permissions_token__disabled(mocker):
+    mocker.patch.object(
+        tokens, "permissions_token_cache", TTLCache(maxsize=0, ttl_secs=60)
+    )
+    sign = mocker.spy(tokens, "create_licensing_token")
+
+    await tokens.create_permissions_token("u1", "hp", ["p1"])
+    await tokens.create_permissions_token("u1", "hp", ["p1"])
+    assert sign.call_count == 2